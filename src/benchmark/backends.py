@@ -0,0 +1,178 @@
+import sys
+import time
+
+import numpy as np
+
+import embedding.dense as dense
+import embedding.sparse as sparse
+from benchmark.utils import load_sample_chunks, pseudo_queries
+from embedding.registry import BACKENDS
+
+# the parity bounds of the backends against the fp32 'torch' baseline: the minimum
+# cosine similarity of the dense and sparse vectors with the baseline ones, and the
+# maximum drop of the recall@k (fp32 ONNX only differs by float rounding, int8
+# quantization by the weights and activations rounding)
+PARITY_BOUNDS = {
+    "onnx": {"min cosine": 0.999, "max recall drop": 0.01},
+    "int8": {"min cosine": 0.9, "max recall drop": 0.05},
+    "onnx-int8": {"min cosine": 0.9, "max recall drop": 0.05},
+}
+
+
+def _use_backend(backend: str) -> None:
+    """
+    Switches both encoders to an inference backend (the registry keeps the
+    models of every backend already loaded).
+
+    Args:
+        backend (str): The inference backend, one of BACKENDS.
+    """
+    dense.BACKEND = backend
+    sparse.BACKEND = backend
+
+
+def _sparse_matrix(vectors: list[dict], vocab_size: int) -> np.ndarray:
+    """
+    Stacks sparse vectors (indices/values dictionaries) into a dense matrix.
+
+    Args:
+        vectors (list[dict]): The sparse vectors.
+        vocab_size (int): The size of the vocabulary.
+
+    Returns:
+        np.ndarray: A float32 matrix of shape (len(vectors), vocab_size).
+    """
+    out = np.zeros((len(vectors), vocab_size), dtype=np.float32)
+    for row, vector in zip(out, vectors):
+        row[vector["indices"]] = vector["values"]
+    return out
+
+
+def _row_cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Computes the cosine similarity between the rows of two matrices.
+    """
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    return (a * b).sum(axis=1) / np.clip(norms, 1e-12, None)
+
+
+def _recall(doc_matrix: np.ndarray, query_matrix: np.ndarray, targets, k: int) -> float:
+    """
+    Computes the recall@k of a brute-force dot-product search.
+    """
+    top_k = np.argsort(-(query_matrix @ doc_matrix.T), axis=1)[:, :k]
+    return float(np.mean([t in row for row, t in zip(top_k, targets)]))
+
+
+def bench_backends(
+    chunks: list[str], backends: list[str] = BACKENDS, k: int = 10
+) -> dict[str, dict[str, float]]:
+    """
+    Compares the inference backends with the fp32 'torch' baseline, for both encoders:
+    throughput, embedding drift (cosine similarity with the baseline vectors) and
+    recall@k drift on pseudo-queries.
+
+    Args:
+        chunks (list[str]): The chunks to encode.
+        backends (list[str]): The backends to compare; the first one is the baseline.
+        k (int): The number of retrieved chunks for the recall.
+
+    Returns:
+        dict[str, dict[str, float]]: The statistics of each backend.
+    """
+    queries = pseudo_queries(chunks, n_queries=100)
+    query_texts = [query for query, _ in queries]
+    targets = [target for _, target in queries]
+    vocab_size = sparse.sparse_vocab_size()
+
+    out, baseline = {}, None
+    for backend in backends:
+        _use_backend(backend)
+        dense.get_encoder(), sparse.get_sparse_model()  # export/load out of the timings
+
+        start = time.perf_counter()
+        de_docs = dense.compute_dense_vectors(chunks)
+        de_time = time.perf_counter() - start
+        start = time.perf_counter()
+        sp_docs = _sparse_matrix(sparse.compute_sparse_vectors(chunks), vocab_size)
+        sp_time = time.perf_counter() - start
+        de_queries = dense.compute_dense_vectors(query_texts)
+        sp_queries = _sparse_matrix(
+            sparse.compute_sparse_vectors(query_texts), vocab_size
+        )
+
+        if baseline is None:
+            baseline = de_docs, sp_docs
+        out[backend] = {
+            "dense chunks/sec": len(chunks) / de_time,
+            "sparse chunks/sec": len(chunks) / sp_time,
+            "dense min cosine": float(_row_cosine(de_docs, baseline[0]).min()),
+            "sparse min cosine": float(_row_cosine(sp_docs, baseline[1]).min()),
+            f"dense recall@{k}": _recall(de_docs, de_queries, targets, k),
+            f"sparse recall@{k}": _recall(sp_docs, sp_queries, targets, k),
+        }
+    return out
+
+
+def check_parity(
+    stats: dict[str, dict[str, float]],
+    k: int = 10,
+    bounds: dict[str, dict[str, float]] = PARITY_BOUNDS,
+) -> list[str]:
+    """
+    Checks the embedding drift and the recall drift of the backends (see
+    bench_backends) against their parity bounds.
+
+    Args:
+        stats (dict[str, dict[str, float]]): The statistics of each backend, the
+            first one being the baseline.
+        k (int): The number of retrieved chunks of the recall.
+        bounds (dict[str, dict[str, float]]): The parity bounds of each backend.
+
+    Returns:
+        list[str]: The violated bounds (empty if the backends are at parity).
+    """
+    baseline = stats[next(iter(stats))]
+    failures = []
+    for backend, backend_stats in stats.items():
+        if backend not in bounds:
+            continue
+        for encoder in ["dense", "sparse"]:
+            cosine = backend_stats[f"{encoder} min cosine"]
+            if cosine < bounds[backend]["min cosine"]:
+                failures.append(
+                    f"{backend}: {encoder} min cosine {cosine:.4f} "
+                    f"< {bounds[backend]['min cosine']}"
+                )
+            drop = (
+                baseline[f"{encoder} recall@{k}"]
+                - backend_stats[f"{encoder} recall@{k}"]
+            )
+            if drop > bounds[backend]["max recall drop"]:
+                failures.append(
+                    f"{backend}: {encoder} recall@{k} drop {drop:.3f} "
+                    f"> {bounds[backend]['max recall drop']}"
+                )
+    return failures
+
+
+if __name__ == "__main__":
+    from utility.read_config import get_config_from_path
+
+    dct_config = get_config_from_path("config.yaml")
+    chunks = load_sample_chunks(dct_config["INPUT_DATA"]["PATH_TO_FOLDER"], 500)
+
+    print(f"Inference backends on {len(chunks)} chunks (baseline: {BACKENDS[0]}):")
+    stats = bench_backends(chunks)
+    for backend, backend_stats in stats.items():
+        print(
+            f"{backend:>10}: "
+            + ", ".join(f"{k} {v:.3f}" for k, v in backend_stats.items())
+        )
+
+    failures = check_parity(stats)
+    for failure in failures:
+        print(f"Parity bound violated, {failure}")
+    if len(failures) > 0:
+        sys.exit(1)
+    print("All the backends are within their parity bounds")
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import time
+
+from embedding.dense import MODEL_NAME, get_dense_tokenizer
+from ingestion.utils import (
+    chunk_text,
+    chunk_text_by_tokens,
+    convert_html_to_text,
+    is_html_file,
+)
+from utility.read_config import get_config_from_path
+
+
+def check_dense_tokenizer() -> None:
+    """
+    Checks that the tokenizer of the tokens chunker (the default INDEXING.CHUNKER)
+    is built from the configured dense model name (PRE_TRAINED_EMB.DENSE_MODEL_NAME,
+    a short sentence-transformers name by default) and splits a text in tokens.
+
+    Raises:
+        AssertionError: If the tokenizer splits a text in no tokens.
+    """
+    tokenizer = get_dense_tokenizer()
+    text = "Gamma-ray bursts are the most energetic explosions in the universe."
+    if len(tokenizer(text, add_special_tokens=False)["input_ids"]) == 0:
+        raise AssertionError(
+            f"The tokenizer of {MODEL_NAME} splits a text in no tokens"
+        )
+    if len(chunk_text_by_tokens(text, tokenizer, 8, 2)) < 2:
+        raise AssertionError(
+            f"The tokens chunker with {MODEL_NAME} does not split a text"
+        )
+
+
+def bench_chunking(
+    texts: list[str], max_tokens: int = 254, overlap_tokens: int = 32
+) -> None:
+    """
+    Prints, for the sentence (characters sized) chunker and the tokens sized one, the
+    throughput, the number of chunks, their mean number of tokens and the share of
+    chunks longer than the dense encoder limit (whose tail is silently truncated).
+
+    Args:
+        texts (list[str]): The texts to chunk.
+        max_tokens (int): The maximum number of tokens per chunk of the tokens chunker.
+        overlap_tokens (int): The tokens shared by consecutive chunks of the tokens chunker.
+    """
+    tokenizer = get_dense_tokenizer()
+    n_chars = sum(len(text) for text in texts)
+    chunkers = {
+        "sentences": lambda text: chunk_text(text),
+        "tokens": lambda text: [
+            chunk.text
+            for chunk in chunk_text_by_tokens(
+                text, tokenizer, max_tokens, overlap_tokens
+            )
+        ],
+    }
+    for name, chunker in chunkers.items():
+        chunker(texts[0])  # warm-up (e.g. NLTK data loading)
+        start = time.perf_counter()
+        chunks = [chunk for text in texts for chunk in chunker(text)]
+        elapsed = time.perf_counter() - start
+
+        n_tokens = [
+            len(ids) for ids in tokenizer(chunks, add_special_tokens=False)["input_ids"]
+        ]
+        n_truncated = sum(n > max_tokens for n in n_tokens)
+        print(
+            f"{name:>9}: {n_chars / elapsed / 1e6:6.2f} M chars/sec, "
+            f"{len(chunks)} chunks, {sum(n_tokens) / len(chunks):6.1f} tokens/chunk, "
+            f"{n_truncated / len(chunks):.1%} chunks truncated by the encoder"
+        )
+
+
+if __name__ == "__main__":
+    from benchmark.html_conversion import synthetic_ar5iv_page
+
+    dct_config = get_config_from_path("config.yaml")
+    html_folder_path = dct_config["INPUT_DATA"]["PATH_TO_FOLDER"]
+
+    texts = []
+    if os.path.isdir(html_folder_path):
+        texts = [
+            convert_html_to_text(os.path.join(html_folder_path, f))
+            for f in sorted(os.listdir(html_folder_path))
+            if is_html_file(f)
+        ][:50]
+    if len(texts) == 0:
+        print("No HTML documents found: using synthetic ar5iv-like pages")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            html_file = os.path.join(tmp_dir, "page.html")
+            for i in range(10):
+                with open(html_file, "w", encoding="utf-8") as file:
+                    file.write(synthetic_ar5iv_page(seed=i))
+                texts.append(convert_html_to_text(html_file))
+
+    check_dense_tokenizer()
+    print(f"Dense tokenizer built from the configured model: {MODEL_NAME}")
+    bench_chunking(
+        texts,
+        max_tokens=dct_config["INDEXING"]["CHUNK_MAX_TOKENS"],
+        overlap_tokens=dct_config["INDEXING"]["CHUNK_OVERLAP_TOKENS"],
+    )
@@ -0,0 +1,32 @@
+from benchmark.utils import load_sample_chunks, time_it
+from embedding.dense import compute_dense_vector, compute_dense_vectors
+
+
+def bench_dense_encoding(chunks: list[str], batch_size: int = 64) -> dict[str, float]:
+    """
+    Compares the throughput of the per-chunk and of the batched dense encoding.
+
+    Args:
+        chunks (list[str]): The chunks to encode.
+        batch_size (int): The batch size of the batched encoding.
+
+    Returns:
+        dict[str, float]: The throughput (chunks/sec) of each encoding mode.
+    """
+    t_loop = time_it(lambda: [compute_dense_vector(chunk) for chunk in chunks])
+    t_batch = time_it(lambda: compute_dense_vectors(chunks, batch_size=batch_size))
+    return {
+        "per-chunk loop": len(chunks) / t_loop,
+        f"batched (batch_size={batch_size})": len(chunks) / t_batch,
+    }
+
+
+if __name__ == "__main__":
+    from utility.read_config import get_config_from_path
+
+    dct_config = get_config_from_path("config.yaml")
+    chunks = load_sample_chunks(dct_config["INPUT_DATA"]["PATH_TO_FOLDER"], 500)
+
+    print(f"Dense encoding of {len(chunks)} chunks:")
+    for mode, chunks_per_sec in bench_dense_encoding(chunks).items():
+        print(f"{mode:>30}: {chunks_per_sec:8.1f} chunks/sec")
@@ -0,0 +1,136 @@
+import sys
+import time
+from typing import Optional
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from benchmark.utils import (
+    build_sample_collection,
+    chunk_id,
+    load_sample_chunks,
+    percentile_ms,
+    pseudo_queries,
+)
+from embedding.dense import compute_dense_vectors
+from retrieval.vdb_wrapper import SearchInVdb
+
+# name -> (quantization of the collection, SearchInVdb arguments)
+QUANTIZATION_SETTINGS = {
+    "none": (None, {}),
+    "scalar": ("scalar", {"rescore": False}),
+    "scalar x2 rescore": ("scalar", {"oversampling": 2.0, "rescore": True}),
+    "binary": ("binary", {"rescore": False}),
+    "binary x3 rescore": ("binary", {"oversampling": 3.0, "rescore": True}),
+}
+
+# bytes per dimension of the vectors held in RAM, by quantization
+BYTES_PER_DIM = {None: 4, "scalar": 1, "binary": 1 / 8}
+
+
+def exact_top_k(
+    doc_vectors: np.ndarray, query_vectors: np.ndarray, k: int
+) -> list[set[str]]:
+    """
+    Finds the exact (brute force, cosine similarity) top k documents of each query.
+
+    Args:
+        doc_vectors (np.ndarray): The dense vectors of the documents.
+        query_vectors (np.ndarray): The dense vectors of the queries.
+        k (int): The number of documents per query.
+
+    Returns:
+        list[set[str]]: For each query, the point ids of its top k documents.
+    """
+    docs = doc_vectors / np.linalg.norm(doc_vectors, axis=1, keepdims=True)
+    queries = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    top = np.argsort(-(queries @ docs.T), axis=1)[:, :k]
+    return [{chunk_id(i) for i in row} for row in top]
+
+
+def bench_dense_quantization(
+    chunks: list[str],
+    sizes: list[int],
+    settings: Optional[dict[str, tuple[Optional[str], dict]]] = None,
+    url: Optional[str] = None,
+    n_queries: int = 100,
+    k: int = 10,
+) -> dict[tuple[int, str], dict[str, float]]:
+    """
+    Compares the dense search over quantized vectors, with and without oversampling
+    and rescoring, to the full precision one, at several corpus sizes.
+
+    Args:
+        chunks (list[str]): The chunks of the corpus (at least max(sizes)).
+        sizes (list[int]): The corpus sizes, each one a prefix of the chunks.
+        settings (Optional[dict[str, tuple[Optional[str], dict]]]): For each setting,
+            the quantization ('scalar', 'binary' or None) and the SearchInVdb arguments
+            (oversampling, rescore). If None, QUANTIZATION_SETTINGS.
+        url (Optional[str]): The URL of a Qdrant server. If None, an in-memory
+            collection is used, which ignores the quantization (exact search).
+        n_queries (int): The number of queries.
+        k (int): The number of retrieved points per query.
+
+    Returns:
+        dict[tuple[int, str], dict[str, float]]: For each corpus size and setting, the
+            memory (MB) of the vectors the search runs on, the p50/p99 latency (ms)
+            of the dense search and its recall@k of the exact top k.
+    """
+    settings = QUANTIZATION_SETTINGS if settings is None else settings
+    client = QdrantClient(":memory:") if url is None else QdrantClient(url=url)
+    doc_vectors = compute_dense_vectors(chunks[: max(sizes)])
+    no_sparse = {"indices": np.zeros(0, np.int32), "values": np.zeros(0, np.float32)}
+
+    out = {}
+    for size in sizes:
+        queries = pseudo_queries(chunks[:size], n_queries)
+        query_vectors = compute_dense_vectors([query for query, _ in queries])
+        exact = exact_top_k(doc_vectors[:size], query_vectors, k)
+        for name, (quantization, searcher_kwargs) in settings.items():
+            loader, _ = build_sample_collection(
+                chunks[:size],
+                coll_name="benchmark_quantization",
+                dense_vectors=doc_vectors[:size],
+                sparse_vectors=[no_sparse] * size,
+                client=client,
+                dense_quantization=quantization,
+            )
+            searcher = SearchInVdb(
+                client, coll_name=loader.coll_name, **searcher_kwargs
+            )
+            timings, recalls = [], []
+            for vector, top_k in zip(query_vectors, exact):
+                start = time.perf_counter()
+                res = searcher.dense(vector, k=k)
+                timings.append(time.perf_counter() - start)
+                recalls.append(len({str(point.id) for point in res} & top_k) / k)
+            out[(size, name)] = {
+                "MB": size * doc_vectors.shape[1] * BYTES_PER_DIM[quantization] / 2**20,
+                "p50 ms": percentile_ms(timings, 50),
+                "p99 ms": percentile_ms(timings, 99),
+                f"recall@{k}": float(np.mean(recalls)),
+            }
+    client.delete_collection("benchmark_quantization")
+    return out
+
+
+if __name__ == "__main__":
+    # usage: python src/benchmark/dense_quantization.py [qdrant server url]
+    from utility.read_config import get_config_from_path
+
+    url: Optional[str] = sys.argv[1] if len(sys.argv) > 1 else None
+    if url is None:
+        print(
+            "No Qdrant server URL given: the in-memory collections ignore quantization"
+        )
+
+    dct_config = get_config_from_path("config.yaml")
+    sizes = [1000, 5000, 20000]
+    chunks = load_sample_chunks(dct_config["INPUT_DATA"]["PATH_TO_FOLDER"], max(sizes))
+    sizes = [size for size in sizes if size <= len(chunks)] or [len(chunks)]
+
+    for (size, name), stats in bench_dense_quantization(chunks, sizes, url=url).items():
+        print(
+            f"{size:>6} chunks, {name:>18}: "
+            + ", ".join(f"{k} {v:.3f}" for k, v in stats.items())
+        )
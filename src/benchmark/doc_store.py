@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmark.utils import chunk_id, load_sample_chunks, percentile_ms
+from utility.doc_store import DocStore
+
+
+def bench_doc_store(
+    chunks: list[str], n_queries: int = 200, k: int = 5
+) -> dict[str, dict[str, float]]:
+    """
+    Measures the document store of the chunks text: its size, with and without
+    compression, against the text the points payloads would otherwise hold, and the
+    latency of reading the texts of the top k points in one bulk read vs one read per point.
+
+    Args:
+        chunks (list[str]): The chunks of the corpus.
+        n_queries (int): The number of simulated retrievals.
+        k (int): The number of retrieved points per retrieval.
+
+    Returns:
+        dict[str, dict[str, float]]: For the text payloads and for each store setting,
+            the size (MB) of the stored text and the p50/p99 latency (ms) of the reads.
+    """
+    ids = [chunk_id(i) for i in range(len(chunks))]
+    rng = np.random.default_rng(0)
+    top_ks = [
+        [ids[i] for i in rng.choice(len(ids), min(k, len(ids)), replace=False)]
+        for _ in range(n_queries)
+    ]
+    payloads_mb = sum(len(json.dumps({"text": c}).encode()) for c in chunks) / 2**20
+    out = {"text payloads": {"MB": payloads_mb}}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for compression in [False, True]:
+            path = os.path.join(tmp_dir, f"docs_{compression}.sqlite")
+            doc_store = DocStore(path, compression=compression)
+            for start in range(0, len(chunks), 256):
+                doc_store.put(ids[start : start + 256], chunks[start : start + 256])
+
+            bulk, single = [], []
+            for top_k in top_ks:
+                start = time.perf_counter()
+                doc_store.get_texts(top_k)
+                bulk.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                for a_id in top_k:
+                    doc_store.get_texts([a_id])
+                single.append(time.perf_counter() - start)
+            doc_store.close()  # the write-ahead log is merged in the file
+
+            name = "store" + (" zlib" if compression else "")
+            out[name] = {
+                "MB": os.path.getsize(path) / 2**20,
+                "bulk p50 ms": percentile_ms(bulk, 50),
+                "bulk p99 ms": percentile_ms(bulk, 99),
+                "per point p50 ms": percentile_ms(single, 50),
+                "per point p99 ms": percentile_ms(single, 99),
+            }
+    return out
+
+
+if __name__ == "__main__":
+    from utility.read_config import get_config_from_path
+
+    dct_config = get_config_from_path("config.yaml")
+    chunks = load_sample_chunks(dct_config["INPUT_DATA"]["PATH_TO_FOLDER"], 20000)
+
+    print(f"Document store of {len(chunks)} chunks:")
+    for name, stats in bench_doc_store(chunks).items():
+        print(f"{name:>13}: " + ", ".join(f"{k} {v:.3f}" for k, v in stats.items()))
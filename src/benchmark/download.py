@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ingestion.download_html import download_html_pages
+
+
+class StubPageHandler(BaseHTTPRequestHandler):
+    """
+    Serves synthetic HTML pages, with an ETag, after a fixed latency; it answers
+    conditional requests with 304 and fails the first request of some pages with 503.
+    The responses are counted by page and status.
+    """
+
+    latency = 0.05
+    failed_once: set = set()
+    responses: Counter = Counter()
+    lock = threading.Lock()
+
+    @staticmethod
+    def etag(path: str) -> str:
+        """The ETag of the page served at a path."""
+        return '"' + hashlib.md5(StubPageHandler.body(path)).hexdigest() + '"'
+
+    @staticmethod
+    def body(path: str) -> bytes:
+        """The page served at a path."""
+        return f"<html><body><p>Page {path}</p></body></html>".encode("utf-8")
+
+    @classmethod
+    def reset(cls, failures: bool = True) -> None:
+        """Forgets the counted responses and, if failures, the pages failed once."""
+        with cls.lock:
+            if failures:
+                cls.failed_once.clear()
+            cls.responses.clear()
+
+    def do_GET(self) -> None:
+        time.sleep(self.latency)
+        body = self.body(self.path)
+        etag = self.etag(self.path)
+
+        with self.lock:
+            fail = self.path.endswith("7") and self.path not in self.failed_once
+            self.failed_once.add(self.path)
+            if fail:
+                status = 503
+            elif self.headers.get("If-None-Match") == etag:
+                status = 304
+            else:
+                status = 200
+            self.responses[(self.path, status)] += 1
+        if status != 200:
+            self.send_response(status)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _start_stub_server() -> tuple[ThreadingHTTPServer, str]:
+    """Starts a stub server on a free local port and returns it, with its URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _read_bytes(file_path: str) -> bytes:
+    with open(file_path, "rb") as file:
+        return file.read()
+
+
+def check_download(n_pages: int = 20, n_workers: int = 4) -> None:
+    """
+    Checks the downloader against the stub server: the first download fetches every
+    page (the pages failing once with 503 are retried, then fetched) and records
+    its ETag in its .meta.json file; the second download only sends conditional
+    requests, answered with 304, and leaves the files unchanged.
+
+    Args:
+        n_pages (int): The number of pages.
+        n_workers (int): The number of concurrent downloads.
+
+    Raises:
+        AssertionError: If a page, a response or a file is not the expected one.
+    """
+    server, base_url = _start_stub_server()
+    paths = [f"/{i}" for i in range(n_pages)]
+    urls_and_filenames = [(base_url + path, f"{path[1:]}.html") for path in paths]
+    try:
+        with tempfile.TemporaryDirectory() as save_dir:
+            StubPageHandler.reset()
+            ok = download_html_pages(urls_and_filenames, save_dir, n_workers=n_workers)
+            if not all(ok):
+                raise AssertionError("Some pages were not downloaded")
+            for path, (_, filename) in zip(paths, urls_and_filenames):
+                expected = {(path, 200): 1}
+                if path.endswith("7"):
+                    expected[(path, 503)] = 1
+                found = {
+                    key: n
+                    for key, n in StubPageHandler.responses.items()
+                    if key[0] == path
+                }
+                if found != expected:
+                    raise AssertionError(f"Responses for {path}: {found} != {expected}")
+                meta_path = os.path.join(
+                    save_dir, filename[: -len(".html")] + ".meta.json"
+                )
+                with open(meta_path, "r", encoding="utf-8") as file:
+                    meta = json.load(file)
+                if meta.get("etag") != StubPageHandler.etag(path):
+                    raise AssertionError(f"ETag of {filename} not recorded: {meta}")
+
+            files = {
+                name: (
+                    os.stat(os.path.join(save_dir, name)).st_mtime_ns,
+                    _read_bytes(os.path.join(save_dir, name)),
+                )
+                for name in os.listdir(save_dir)
+            }
+            StubPageHandler.reset(failures=False)
+            ok = download_html_pages(urls_and_filenames, save_dir, n_workers=n_workers)
+            if not all(ok):
+                raise AssertionError("Some pages are not available after re-download")
+            expected = Counter({(path, 304): 1 for path in paths})
+            if StubPageHandler.responses != expected:
+                other = StubPageHandler.responses - expected
+                raise AssertionError(f"Re-download not answered with 304 only: {other}")
+            for name, (mtime_ns, content) in files.items():
+                file_path = os.path.join(save_dir, name)
+                if os.stat(file_path).st_mtime_ns != mtime_ns:
+                    raise AssertionError(f"{name} rewritten by the re-download")
+                if _read_bytes(file_path) != content:
+                    raise AssertionError(f"{name} changed by the re-download")
+            if sorted(os.listdir(save_dir)) != sorted(files):
+                raise AssertionError("Files added or removed by the re-download")
+    finally:
+        server.shutdown()
+
+
+def bench_download(
+    n_pages: int = 100, workers: tuple[int, ...] = (1, 8)
+) -> dict[str, float]:
+    """
+    Downloads pages from a local stub server: sequentially, concurrently, and
+    again concurrently once they are on disk (conditional requests).
+
+    Args:
+        n_pages (int): The number of pages.
+        workers (tuple[int, ...]): The numbers of concurrent downloads to try.
+
+    Returns:
+        dict[str, float]: The throughput (pages/sec) of each run.
+    """
+    server, base_url = _start_stub_server()
+    urls_and_filenames = [(f"{base_url}/{i}", f"{i}.html") for i in range(n_pages)]
+
+    out = {}
+    try:
+        for n_workers in workers:
+            with tempfile.TemporaryDirectory() as save_dir:
+                StubPageHandler.reset()
+                start = time.perf_counter()
+                ok = download_html_pages(
+                    urls_and_filenames,
+                    save_dir,
+                    n_workers=n_workers,
+                    max_per_host=n_workers,
+                )
+                out[f"{n_workers} workers"] = n_pages / (time.perf_counter() - start)
+                if not all(ok) or len(os.listdir(save_dir)) != 2 * n_pages:
+                    raise AssertionError("Some pages were not downloaded")
+
+                start = time.perf_counter()
+                download_html_pages(
+                    urls_and_filenames,
+                    save_dir,
+                    n_workers=n_workers,
+                    max_per_host=n_workers,
+                )
+                out[f"{n_workers} workers, not modified"] = n_pages / (
+                    time.perf_counter() - start
+                )
+    finally:
+        server.shutdown()
+    return out
+
+
+if __name__ == "__main__":
+    try:
+        check_download()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
+    print(
+        "Downloader: 503 retried then fetched, ETags recorded, re-download answered "
+        "with 304 only and files unchanged"
+    )
+
+    print("Download from a local stub server (50 ms latency):")
+    for run, pages_per_sec in bench_download().items():
+        print(f"{run:>28}: {pages_per_sec:8.1f} pages/sec")
@@ -0,0 +1,48 @@
+import time
+
+from benchmark.utils import load_sample_chunks
+from embedding.pool import EncoderPool, default_n_workers
+
+
+def bench_encoder_pool(
+    chunks: list[str], workers: list[int], threads_per_worker: int = 4
+) -> dict[int, float]:
+    """
+    Measures the encoding throughput of an EncoderPool for several numbers of processes.
+
+    Args:
+        chunks (list[str]): The chunks to encode.
+        workers (list[int]): The numbers of processes to try.
+        threads_per_worker (int): The number of intra-op threads of each process.
+
+    Returns:
+        dict[int, float]: The throughput (chunks/sec) for each number of processes.
+    """
+    out = {}
+    for n_workers in workers:
+        with EncoderPool(n_workers, threads_per_worker) as pool:
+            pool.encode(chunks[: 32 * n_workers])  # wait for the models to be loaded
+            start = time.perf_counter()
+            pool.encode(chunks)
+            out[n_workers] = len(chunks) / (time.perf_counter() - start)
+    return out
+
+
+if __name__ == "__main__":
+    from utility.read_config import get_config_from_path
+
+    dct_config = get_config_from_path("config.yaml")
+    chunks = load_sample_chunks(dct_config["INPUT_DATA"]["PATH_TO_FOLDER"], 2000)
+    threads_per_worker = dct_config["INDEXING"]["THREADS_PER_WORKER"]
+
+    max_workers = default_n_workers(threads_per_worker)
+    workers = sorted({1, *[2**i for i in range(max_workers.bit_length())], max_workers})
+    print(
+        f"Encoding of {len(chunks)} chunks, {threads_per_worker} threads per process:"
+    )
+    results = bench_encoder_pool(chunks, workers, threads_per_worker)
+    for n_workers, chunks_per_sec in results.items():
+        speedup = chunks_per_sec / results[1]
+        print(
+            f"{n_workers:>3} processes: {chunks_per_sec:8.1f} chunks/sec (x{speedup:.2f})"
+        )
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+
+from benchmark.retrieval_engines import synthetic_points
+from benchmark.utils import chunk_id, percentile_ms
+from retrieval.faiss_engine import FaissEngine
+
+# name -> FaissEngine arguments
+INDEX_SETTINGS = {
+    "flat": {"index_type": "flat"},
+    "ivf nprobe 8": {"index_type": "ivf", "nlist": 256, "nprobe": 8},
+    "ivf nprobe 32": {"index_type": "ivf", "nlist": 256, "nprobe": 32},
+    "hnsw ef 64": {"index_type": "hnsw", "hnsw_m": 32, "hnsw_ef_search": 64},
+    "pq m48": {"index_type": "pq", "pq_m": 48},
+    "ivfpq m48 nprobe 32": {
+        "index_type": "ivfpq",
+        "nlist": 256,
+        "nprobe": 32,
+        "pq_m": 48,
+    },
+}
+
+
+def bench_faiss_index(
+    sizes: list[int],
+    settings: Optional[dict[str, dict]] = None,
+    n_queries: int = 100,
+    k: int = 10,
+) -> dict[tuple[int, str], dict[str, float]]:
+    """
+    Compares the FAISS index types of the FaissEngine dense search, on synthetic
+    collections (clustered vectors, as the embeddings of a corpus) of several sizes.
+
+    Args:
+        sizes (list[int]): The numbers of points of the collections.
+        settings (Optional[dict[str, dict]]): For each setting, the FaissEngine
+            arguments. If None, INDEX_SETTINGS.
+        n_queries (int): The number of queries.
+        k (int): The number of retrieved points per query.
+
+    Returns:
+        dict[tuple[int, str], dict[str, float]]: For each size and setting, the time (s)
+            to build the index, its size on disk (MB), the time (ms) to open it
+            (memory-mapped), the p50/p99 latency (ms) of the dense search and its
+            recall@k of the exact top k.
+    """
+    settings = INDEX_SETTINGS if settings is None else settings
+    rng = np.random.default_rng(0)
+    out = {}
+    for size in sizes:
+        dense, sparse = synthetic_points(size, n_terms=1)
+        centers = rng.standard_normal((max(size // 100, 1), dense.shape[1]))
+        dense += 2 * centers[rng.integers(len(centers), size=size)].astype(np.float32)
+        ids = [chunk_id(i) for i in range(size)]
+        queries = dense[rng.choice(size, n_queries, replace=False)] + 0.5
+
+        docs = dense / np.linalg.norm(dense, axis=1, keepdims=True)
+        exact = np.argsort(-(queries @ docs.T), axis=1)[:, :k]
+        exact = [{ids[i] for i in row} for row in exact]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name, engine_kwargs in settings.items():
+                path = os.path.join(tmp_dir, name.replace(" ", "_"))
+                engine = FaissEngine(path, "benchmark", **engine_kwargs)
+                engine.upload(dense, sparse, None, ids)
+                start = time.perf_counter()
+                engine.flush()
+                build_s = time.perf_counter() - start
+
+                start = time.perf_counter()
+                engine = FaissEngine(path, "benchmark", **engine_kwargs)
+                engine.dense(queries[0], k=1)
+                open_ms = (time.perf_counter() - start) * 1e3
+
+                timings, recalls = [], []
+                for vector, top_k in zip(queries, exact):
+                    start = time.perf_counter()
+                    res = engine.dense(vector, k=k)
+                    timings.append(time.perf_counter() - start)
+                    recalls.append(len({point.id for point in res} & top_k) / k)
+                out[(size, name)] = {
+                    "build s": build_s,
+                    "index MB": os.path.getsize(engine.index_path) / 2**20,
+                    "open ms": open_ms,
+                    "p50 ms": percentile_ms(timings, 50),
+                    "p99 ms": percentile_ms(timings, 99),
+                    f"recall@{k}": float(np.mean(recalls)),
+                }
+    return out
+
+
+if __name__ == "__main__":
+    print("FAISS index types of the dense search (synthetic vectors):")
+    for (size, name), stats in bench_faiss_index([10000, 50000]).items():
+        print(
+            f"{size:>6} points, {name:>19}: "
+            + ", ".join(f"{k} {v:.3f}" for k, v in stats.items())
+        )
@@ -0,0 +1,191 @@
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from benchmark.retrieval_engines import synthetic_points
+from benchmark.utils import chunk_id, percentile_ms
+from ingestion.vdb_wrapper import LoadInVdb
+from retrieval.filters import PAYLOAD_SCHEMA, Filters, to_qdrant_filter
+from retrieval.numpy_engine import NumpyEngine
+from retrieval.vdb_wrapper import SearchInVdb
+
+# name -> filters, from the most to the least selective
+FILTERS: dict[str, Optional[Filters]] = {
+    "none": None,
+    "source": {"source_id": "source-00007"},
+    "keyword + year": {
+        "keywords": "keyword-03",
+        "published": {"gte": "2023-01-01", "lt": "2024-01-01"},
+    },
+    "keyword": {"keywords": "keyword-03"},
+    "year": {"published": {"gte": "2023-01-01", "lt": "2024-01-01"}},
+    "first chunks": {"chunk_index": {"lt": 5}},
+}
+
+
+def synthetic_payloads(
+    n_points: int, chunks_per_source: int = 50, n_keywords: int = 20, seed: int = 0
+) -> list[dict]:
+    """
+    Generates the payloads of the chunks of synthetic documents (see
+    retrieval.filters.PAYLOAD_SCHEMA): consecutive chunks of the same source, with
+    one or two search keywords and a publication date of the last ten years.
+
+    Args:
+        n_points (int): The number of points.
+        chunks_per_source (int): The number of chunks of each source.
+        n_keywords (int): The number of distinct keywords.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        list[dict]: The payloads.
+    """
+    rng = np.random.default_rng(seed)
+    n_sources = -(-n_points // chunks_per_source)
+    first_day = date(2014, 1, 1)
+    sources = []
+    for i in range(n_sources):
+        keywords = rng.choice(n_keywords, rng.integers(1, 3), replace=False)
+        published = first_day + timedelta(days=int(rng.integers(0, 3652)))
+        sources.append(
+            {
+                "source_id": f"source-{i:05d}",
+                "title": f"Paper {i}",
+                "keywords": [f"keyword-{k:02d}" for k in sorted(keywords)],
+                "published": f"{published.isoformat()}T00:00:00+00:00",
+            }
+        )
+    return [
+        {
+            **sources[i // chunks_per_source],
+            "section": f"Section {i % chunks_per_source // 10}",
+            "chunk_index": i % chunks_per_source,
+            "text": f"chunk {i}",
+        }
+        for i in range(n_points)
+    ]
+
+
+def bench_filtered_search(
+    sizes: list[int],
+    n_queries: int = 20,
+    k: int = 5,
+    url: Optional[str] = None,
+    with_faiss: bool = True,
+) -> dict[tuple[int, str, str], dict[str, float]]:
+    """
+    Measures the latency of the dense, sparse and hybrid searches filtered on the
+    payload fields, against the unfiltered ones, for Qdrant (with payload indexes),
+    the NumPy engine and the FAISS engine (HNSW index), at several collection sizes.
+    The first search of each filter (which builds the in-memory payload index of the
+    NumPy and FAISS engines) is not timed.
+
+    Args:
+        sizes (list[int]): The numbers of points of the collections.
+        n_queries (int): The number of queries.
+        k (int): The number of retrieved points per query.
+        url (Optional[str]): The URL of a Qdrant server; if None, Qdrant runs in local
+            mode, which ignores the payload indexes and scans the points.
+        with_faiss (bool): If True (and faiss is installed), the FAISS engine is measured.
+
+    Returns:
+        dict[tuple[int, str, str], dict[str, float]]: For each size, engine and filter,
+            the share (%) of points matching the filter, the p50 latency (ms) of the
+            dense, sparse and hybrid searches, and the recall of the dense search
+            against the exact filtered top k (of the NumPy engine).
+    """
+    out = {}
+    for size in sizes:
+        dense, sparse = synthetic_points(size)
+        ids = [chunk_id(i) for i in range(size)]
+        payloads = synthetic_payloads(size)
+        queries = [(dense[i] + 0.5, sparse[i]) for i in range(n_queries)]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if url is None:
+                client = QdrantClient(path=f"{tmp_dir}/qdrant")
+            else:
+                client = QdrantClient(url=url)
+            loader = LoadInVdb(client, "benchmark", payload_indexes=PAYLOAD_SCHEMA)
+            loader.setup_collection(is_fresh_start=True)
+            loader.upload(dense, sparse, payloads, ids)
+            engines = {"numpy": NumpyEngine(f"{tmp_dir}/numpy", "benchmark")}
+            if with_faiss:
+                try:
+                    from retrieval.faiss_engine import FaissEngine
+
+                    engines["faiss hnsw"] = FaissEngine(
+                        f"{tmp_dir}/faiss", "benchmark", index_type="hnsw"
+                    )
+                except ImportError:
+                    print("faiss is not installed: the FAISS engine is skipped")
+            for engine in engines.values():
+                engine.setup_collection(is_fresh_start=True)
+                for batch in range(0, size, 256):
+                    rows = slice(batch, batch + 256)
+                    engine.upload(dense[rows], sparse[rows], payloads[rows], ids[rows])
+                engine.flush()
+            engines["qdrant"] = SearchInVdb(client, "benchmark")
+
+            matching = {
+                name: client.count(
+                    "benchmark", count_filter=to_qdrant_filter(filters), exact=True
+                ).count
+                for name, filters in FILTERS.items()
+            }
+            exact = {
+                name: [
+                    {str(p.id) for p in engines["numpy"].dense(q, k, filters=filters)}
+                    for q, _ in queries
+                ]
+                for name, filters in FILTERS.items()
+            }
+            for engine_name, engine in engines.items():
+                for name, filters in FILTERS.items():
+                    engine.hybrid_qd(*queries[0], k=k, filters=filters)  # warm-up
+                    latencies = {"dense": [], "sparse": [], "hybrid": []}
+                    recalls = []
+                    for (de_query, sp_query), target in zip(queries, exact[name]):
+                        start = time.perf_counter()
+                        res = engine.dense(de_query, k=k, filters=filters)
+                        latencies["dense"].append(time.perf_counter() - start)
+                        start = time.perf_counter()
+                        engine.sparse(sp_query, k=k, filters=filters)
+                        latencies["sparse"].append(time.perf_counter() - start)
+                        start = time.perf_counter()
+                        engine.hybrid_qd(de_query, sp_query, k=k, filters=filters)
+                        latencies["hybrid"].append(time.perf_counter() - start)
+                        if len(target) > 0:
+                            found = {str(p.id) for p in res}
+                            recalls.append(len(found & target) / len(target))
+                    out[(size, engine_name, name)] = {
+                        "match %": 100 * matching[name] / size,
+                        **{
+                            f"{kind} p50 ms": percentile_ms(timings, 50)
+                            for kind, timings in latencies.items()
+                        },
+                        "dense recall": float(np.mean(recalls)) if recalls else 0.0,
+                    }
+            client.close()
+    return out
+
+
+if __name__ == "__main__":
+    # usage: python src/benchmark/filtered_search.py [qdrant server url]
+    url: Optional[str] = sys.argv[1] if len(sys.argv) > 1 else None
+    if url is None:
+        print("No Qdrant server URL given: the local mode ignores the payload indexes")
+
+    print("Filtered vs unfiltered searches (synthetic points and payloads):")
+    for (size, engine, name), stats in bench_filtered_search(
+        [10000, 50000], url=url
+    ).items():
+        print(
+            f"{size:>6} points, {engine:>10}, {name:>14}: "
+            + ", ".join(f"{k} {v:.3f}" for k, v in stats.items())
+        )
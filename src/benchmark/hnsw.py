@@ -0,0 +1,156 @@
+import sys
+import time
+from typing import Optional
+
+import numpy as np
+from qdrant_client import QdrantClient, models
+
+from benchmark.dense_quantization import exact_top_k
+from benchmark.utils import (
+    build_sample_collection,
+    load_sample_chunks,
+    percentile_ms,
+    pseudo_queries,
+)
+from embedding.dense import compute_dense_vectors
+from retrieval.vdb_wrapper import SearchInVdb
+
+# name -> LoadInVdb arguments of the collection
+COLLECTION_SETTINGS = {
+    "m8 ef_c64": {"hnsw_m": 8, "hnsw_ef_construct": 64},
+    "m16 ef_c100": {"hnsw_m": 16, "hnsw_ef_construct": 100},
+    "m32 ef_c200": {"hnsw_m": 32, "hnsw_ef_construct": 200},
+    "m16 ef_c100 on disk": {
+        "hnsw_m": 16,
+        "hnsw_ef_construct": 100,
+        "hnsw_on_disk": True,
+        "dense_on_disk": True,
+        "sparse_on_disk": True,
+        "payload_on_disk": True,
+    },
+}
+
+# the query-time HNSW candidates list sizes searched on each collection
+EF_VALUES = [16, 64, 128]
+
+
+def wait_for_indexing(client: QdrantClient, coll_name: str) -> None:
+    """
+    Waits until the server has built the indexes of a collection.
+
+    Args:
+        client (QdrantClient): The client of the vector database.
+        coll_name (str): The name of the collection.
+    """
+    while client.get_collection(coll_name).status != models.CollectionStatus.GREEN:
+        time.sleep(0.1)
+
+
+def ram_estimate_mb(n_points: int, dim: int, loader_kwargs: dict) -> float:
+    """
+    Estimates the RAM held by the dense vectors and their HNSW graph (2 * m links
+    of 4 bytes per point at the base layer), the parts stored on disk excluded.
+
+    Args:
+        n_points (int): The number of points.
+        dim (int): The dimension of the dense vectors.
+        loader_kwargs (dict): The LoadInVdb arguments of the collection.
+
+    Returns:
+        float: The estimated RAM, in MB.
+    """
+    m = loader_kwargs.get("hnsw_m") or 16
+    vectors = 0 if loader_kwargs.get("dense_on_disk") else n_points * dim * 4
+    graph = 0 if loader_kwargs.get("hnsw_on_disk") else n_points * 2 * m * 4
+    return (vectors + graph) / 2**20
+
+
+def bench_hnsw(
+    chunks: list[str],
+    settings: Optional[dict[str, dict]] = None,
+    ef_values: Optional[list[int]] = None,
+    url: Optional[str] = None,
+    n_queries: int = 100,
+    k: int = 10,
+) -> dict[tuple[str, int], dict[str, float]]:
+    """
+    Sweeps the HNSW and storage parameters of the collection and the query-time ef.
+
+    Args:
+        chunks (list[str]): The chunks of the corpus.
+        settings (Optional[dict[str, dict]]): For each setting, the LoadInVdb arguments
+            of the collection. If None, COLLECTION_SETTINGS.
+        ef_values (Optional[list[int]]): The query-time ef values. If None, EF_VALUES.
+        url (Optional[str]): The URL of a Qdrant server. If None, an in-memory
+            collection is used, which has no HNSW index (exact search).
+        n_queries (int): The number of queries.
+        k (int): The number of retrieved points per query.
+
+    Returns:
+        dict[tuple[str, int], dict[str, float]]: For each setting and ef, the build time
+            (s) of the collection, its estimated RAM (MB), the p50/p99 latency (ms) of
+            the dense search and its recall@k of the exact top k.
+    """
+    settings = COLLECTION_SETTINGS if settings is None else settings
+    ef_values = EF_VALUES if ef_values is None else ef_values
+    client = QdrantClient(":memory:") if url is None else QdrantClient(url=url)
+    doc_vectors = compute_dense_vectors(chunks)
+    queries = pseudo_queries(chunks, n_queries)
+    query_vectors = compute_dense_vectors([query for query, _ in queries])
+    exact = exact_top_k(doc_vectors, query_vectors, k)
+    no_sparse = {"indices": np.zeros(0, np.int32), "values": np.zeros(0, np.float32)}
+
+    out = {}
+    for name, loader_kwargs in settings.items():
+        start = time.perf_counter()
+        loader, _ = build_sample_collection(
+            chunks,
+            coll_name="benchmark_hnsw",
+            dense_vectors=doc_vectors,
+            sparse_vectors=[no_sparse] * len(chunks),
+            client=client,
+            **loader_kwargs,
+        )
+        wait_for_indexing(client, loader.coll_name)
+        build_s = time.perf_counter() - start
+
+        searcher = SearchInVdb(client, coll_name=loader.coll_name)
+        for ef in ef_values:
+            timings, recalls = [], []
+            for vector, top_k in zip(query_vectors, exact):
+                start = time.perf_counter()
+                res = searcher.dense(vector, k=k, hnsw_ef=ef)
+                timings.append(time.perf_counter() - start)
+                recalls.append(len({str(point.id) for point in res} & top_k) / k)
+            out[(name, ef)] = {
+                "build s": build_s,
+                "RAM MB": ram_estimate_mb(
+                    len(chunks), doc_vectors.shape[1], loader_kwargs
+                ),
+                "p50 ms": percentile_ms(timings, 50),
+                "p99 ms": percentile_ms(timings, 99),
+                f"recall@{k}": float(np.mean(recalls)),
+            }
+    client.delete_collection("benchmark_hnsw")
+    return out
+
+
+if __name__ == "__main__":
+    # usage: python src/benchmark/hnsw.py [qdrant server url]
+    from utility.read_config import get_config_from_path
+
+    url: Optional[str] = sys.argv[1] if len(sys.argv) > 1 else None
+    if url is None:
+        print(
+            "No Qdrant server URL given: the in-memory collections have no HNSW index"
+        )
+
+    dct_config = get_config_from_path("config.yaml")
+    chunks = load_sample_chunks(dct_config["INPUT_DATA"]["PATH_TO_FOLDER"], 20000)
+
+    print(f"HNSW and storage parameters on {len(chunks)} chunks:")
+    for (name, ef), stats in bench_hnsw(chunks, url=url).items():
+        print(
+            f"{name:>20}, ef {ef:>4}: "
+            + ", ".join(f"{k} {v:.3f}" for k, v in stats.items())
+        )
@@ -0,0 +1,146 @@
+import os
+import random
+import re
+import tempfile
+import time
+from collections import Counter
+
+from ingestion.utils import convert_html_to_markdown, convert_html_to_text, is_html_file
+from utility.read_config import get_config_from_path
+
+
+def synthetic_ar5iv_page(n_sections: int = 20, seed: int = 0) -> str:
+    """
+    Generates an HTML page shaped like an ar5iv article: navigation, header and
+    footer, scripts and styles, sections of paragraphs with MathML formulas, lists
+    and tables.
+
+    Args:
+        n_sections (int): The number of sections of the article.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        str: The HTML page.
+    """
+    rnd = random.Random(seed)
+    words = (
+        "particle energy detector gamma ray burst model data photon flux spectrum "
+        "scintillator emission source time galaxy signal light curve mass neutron"
+    ).split()
+
+    def sentence() -> str:
+        return " ".join(rnd.choice(words) for _ in range(rnd.randint(8, 25))) + "."
+
+    def formula() -> str:
+        return (
+            '<math alttext="E=mc^{2}" display="inline"><semantics><mrow><mi>E</mi>'
+            "<mo>=</mo><mi>m</mi><msup><mi>c</mi><mn>2</mn></msup></mrow>"
+            '<annotation encoding="application/x-tex">E=mc^{2}</annotation>'
+            "</semantics></math>"
+        )
+
+    parts = [
+        "<html><head><title>Article</title><style>.ltx_p{margin:0}</style>",
+        "<script>window.MathJax={tex:{}};</script></head><body>",
+        '<nav class="ltx_page_navbar"><a href="/">ar5iv</a></nav>',
+        '<header class="ltx_page_header"><a href="/abs">View original</a></header>',
+        '<article class="ltx_document"><h1 class="ltx_title">A study of gamma rays</h1>',
+    ]
+    for i in range(n_sections):
+        parts.append(f'<section class="ltx_section"><h2>{i + 1} {sentence()}</h2>')
+        for _ in range(rnd.randint(3, 8)):
+            parts.append(
+                f'<div class="ltx_para"><p class="ltx_p">{sentence()} {formula()} '
+                f'<a href="#bib.{i}">[{i}]</a> {sentence()} <em>{sentence()}</em></p></div>'
+            )
+        parts.append("<ul>" + "".join(f"<li>{sentence()}</li>" for _ in range(3)))
+        parts.append("</ul><table><tr><td>1.0</td><td>2.0</td></tr></table></section>")
+    parts.append(
+        '</article><footer class="ltx_page_footer">Generated by LaTeXML</footer>'
+    )
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def _words(text: str) -> Counter:
+    return Counter(re.findall(r"\w+", text.lower()))
+
+
+def word_overlap(text: str, reference: str) -> tuple[float, float]:
+    """
+    Compares the words of a text with the ones of a reference text, ignoring the
+    markup (Markdown syntax, punctuation) and the order.
+
+    Args:
+        text (str): The text to check.
+        reference (str): The reference text.
+
+    Returns:
+        tuple[float, float]: The fraction of the text words found in the reference
+            (precision) and of the reference words found in the text (recall).
+    """
+    words, ref_words = _words(text), _words(reference)
+    common = sum((words & ref_words).values())
+    return common / max(sum(words.values()), 1), common / max(
+        sum(ref_words.values()), 1
+    )
+
+
+def bench_html_conversion(html_files: list[str], n_repeats: int = 3) -> None:
+    """
+    Prints the throughput of the markdownify converter and of the single-pass text
+    extractor, and the word overlap of their outputs.
+
+    Args:
+        html_files (list[str]): The paths of the HTML files to convert.
+        n_repeats (int): The number of conversions of each file (the best time is kept).
+    """
+    size_mb = sum(os.path.getsize(f) for f in html_files) / 2**20
+    outputs = {}
+    for name, converter in [
+        ("markdown", convert_html_to_markdown),
+        ("text", convert_html_to_text),
+    ]:
+        best = float("inf")
+        for _ in range(n_repeats):
+            start = time.perf_counter()
+            outputs[name] = [converter(f) for f in html_files]
+            best = min(best, time.perf_counter() - start)
+        print(
+            f"{name:>8}: {len(html_files) / best:8.1f} pages/sec, "
+            f"{size_mb / best:6.2f} MB/sec"
+        )
+
+    precisions, recalls = zip(
+        *[word_overlap(t, m) for t, m in zip(outputs["text"], outputs["markdown"])]
+    )
+    print(
+        f"Words of the text output found in the markdown one: {min(precisions):.1%} (min), "
+        f"markdown words found in the text output: {min(recalls):.1%} (min; "
+        "the difference is the dropped navigation, footer and MathML markup)"
+    )
+    assert (
+        min(precisions) > 0.95
+    ), "The text extractor emits words missing from the markdown"
+
+
+if __name__ == "__main__":
+    dct_config = get_config_from_path("config.yaml")
+    html_folder_path = dct_config["INPUT_DATA"]["PATH_TO_FOLDER"]
+
+    html_files = []
+    if os.path.isdir(html_folder_path):
+        html_files = [
+            os.path.join(html_folder_path, f)
+            for f in sorted(os.listdir(html_folder_path))
+            if is_html_file(f)
+        ][:50]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if len(html_files) == 0:
+            print("No HTML documents found: using synthetic ar5iv-like pages")
+            for i in range(10):
+                html_files.append(os.path.join(tmp_dir, f"{i}.html"))
+                with open(html_files[-1], "w", encoding="utf-8") as file:
+                    file.write(synthetic_ar5iv_page(seed=i))
+        bench_html_conversion(html_files)
@@ -0,0 +1,90 @@
+import json
+import os
+import subprocess
+import sys
+from typing import Optional
+
+# entry point modules whose import time is tracked across releases
+ENTRY_POINTS = [
+    "utility.read_config",
+    "embedding.dense",
+    "embedding.sparse",
+    "ingestion.ingesting",
+    "retrieval.search_qd",
+    "llm.api_call",
+    "ui.initializer",
+]
+
+
+def measure_import_time(module: str) -> dict[str, int]:
+    """
+    Imports a module in a fresh interpreter with `python -X importtime` and
+    collects the cumulative import time of every imported package.
+
+    Args:
+        module (str): The name of the module to import.
+
+    Returns:
+        dict[str, int]: The cumulative import time (microseconds) of each imported package.
+    """
+    env = {**os.environ, "PYTHONPATH": os.environ.get("PYTHONPATH", "./src")}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    out = {}
+    for line in proc.stderr.splitlines():
+        # e.g. "import time:       310 |        512 |   encodings.utf_8"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, package = line[len("import time:") :].split("|")
+        out[package.strip()] = int(cumulative)
+    return out
+
+
+def import_time_report(
+    modules: list[str] = ENTRY_POINTS, n_top: int = 5
+) -> dict[str, dict]:
+    """
+    Measures the import time of several modules.
+
+    Args:
+        modules (list[str]): The names of the modules to import.
+        n_top (int): The number of slowest third-party packages to report for each module.
+
+    Returns:
+        dict[str, dict]: For each module, its total import time (ms) and the
+            slowest top-level packages it pulls in (ms).
+    """
+    report = {}
+    for module in modules:
+        timings = measure_import_time(module)
+        top_level = {
+            package: us
+            for package, us in timings.items()
+            if "." not in package and package != module.split(".")[0]
+        }
+        slowest = sorted(top_level.items(), key=lambda item: -item[1])[:n_top]
+        report[module] = {
+            "total_ms": timings[module] / 1000,
+            "slowest_ms": {package: us / 1000 for package, us in slowest},
+        }
+    return report
+
+
+if __name__ == "__main__":
+    # usage: python src/benchmark/import_time.py [path/to/report.json]
+    output_path: Optional[str] = sys.argv[1] if len(sys.argv) > 1 else None
+
+    report = import_time_report()
+    for module, stats in report.items():
+        slowest = ", ".join(f"{p} {ms:.0f}" for p, ms in stats["slowest_ms"].items())
+        print(f"{module:>22}: {stats['total_ms']:8.1f} ms  (slowest: {slowest})")
+
+    if output_path is not None:
+        with open(output_path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Report saved in: {output_path}")
@@ -0,0 +1,115 @@
+import sys
+import time
+from typing import Any, Iterator
+
+from ingestion.pipeline import Pipeline
+
+
+def _sleeping_stage(delay_s: float):
+    """Returns a stage passing its inputs through after a delay per item."""
+
+    def stage(items: Iterator[Any]) -> Iterator[Any]:
+        for item in items:
+            time.sleep(delay_s)
+            yield item
+
+    return stage
+
+
+def bench_pipeline(
+    n_items: int = 200, delays_s: tuple[float, ...] = (0.002, 0.005, 0.003)
+) -> dict[str, float]:
+    """
+    Compares the throughput of stages run one after the other with the one of the
+    same stages run by a Pipeline, where they overlap (the stages sleep, as the I/O
+    and the encoding release the GIL).
+
+    Args:
+        n_items (int): The number of items.
+        delays_s (tuple[float, ...]): The time (in s) each stage spends on an item.
+
+    Returns:
+        dict[str, float]: The throughput (items/sec) of each mode.
+    """
+    stages = [_sleeping_stage(delay_s) for delay_s in delays_s]
+
+    start = time.perf_counter()
+    items = iter(range(n_items))
+    for stage in stages:
+        items = iter(list(stage(items)))
+    t_sequential = time.perf_counter() - start
+
+    pipeline = Pipeline(
+        [(f"stage {i}", stage) for i, stage in enumerate(stages)], queue_size=4
+    )
+    start = time.perf_counter()
+    pipeline.run(range(n_items))
+    t_pipeline = time.perf_counter() - start
+    return {
+        "sequential": n_items / t_sequential,
+        "pipeline": n_items / t_pipeline,
+    }
+
+
+def check_stop_on_error(n_items: int = 1000, fail_at: int = 10) -> int:
+    """
+    Checks that when a stage fails, the first stage stops reading its inputs (instead
+    of processing all of them) and the error is raised by Pipeline.run.
+
+    Args:
+        n_items (int): The number of inputs.
+        fail_at (int): The input on which the last stage fails.
+
+    Raises:
+        AssertionError: If the error is not raised, or if the first stage processes
+            most of the inputs.
+
+    Returns:
+        int: The number of inputs processed by the first stage.
+    """
+    processed = []
+
+    def first(items: Iterator[int]) -> Iterator[int]:
+        for item in items:
+            processed.append(item)
+            yield item
+
+    def last(items: Iterator[int]) -> Iterator[int]:
+        for item in items:
+            if item == fail_at:
+                raise RuntimeError("stage failure")
+            yield item
+
+    queue_size = 2
+    pipeline = Pipeline(
+        [("first", first), ("middle", _sleeping_stage(0.001)), ("last", last)],
+        queue_size=queue_size,
+    )
+    try:
+        pipeline.run(range(n_items))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("The error of the last stage was not raised")
+    # after the failure, at most the items in flight: one per stage (and the one the
+    # first stage reads before seeing the stop) and those waiting in the two queues
+    max_processed = fail_at + 1 + 3 + 1 + 2 * queue_size
+    if len(processed) > max_processed:
+        raise AssertionError(
+            f"The first stage processed {len(processed)} of {n_items} inputs "
+            f"after a failure on input {fail_at} (expected at most {max_processed})"
+        )
+    return len(processed)
+
+
+if __name__ == "__main__":
+    try:
+        n_processed = check_stop_on_error()
+    except AssertionError as e:
+        print(f"FAILED: {e}")
+        sys.exit(1)
+    print(f"Failing stage: the first stage stopped after {n_processed} inputs")
+
+    print("Throughput of 3 stages:")
+    for mode, items_per_sec in bench_pipeline().items():
+        print(f"{mode:>10}: {items_per_sec:8.1f} items/sec")
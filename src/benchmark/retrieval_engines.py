@@ -0,0 +1,232 @@
+import tempfile
+import time
+from typing import Callable
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from benchmark.utils import chunk_id, percentile_ms
+from ingestion.vdb_wrapper import LoadInVdb
+from retrieval.numpy_engine import NumpyEngine
+from retrieval.vdb_wrapper import SearchInVdb
+
+
+def synthetic_points(
+    n_points: int,
+    dim: int = 384,
+    vocab_size: int = 30522,
+    n_terms: int = 100,
+    seed: int = 0,
+) -> tuple[np.ndarray, list[dict]]:
+    """
+    Generates random dense vectors and SPLADE-like sparse vectors (n_terms terms each,
+    drawn from a Zipf-like distribution of the vocabulary).
+
+    Args:
+        n_points (int): The number of points.
+        dim (int): The dimension of the dense vectors.
+        vocab_size (int): The size of the vocabulary.
+        n_terms (int): The number of terms of each sparse vector.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        tuple[np.ndarray, list[dict]]: The dense vectors and the sparse vectors.
+    """
+    rng = np.random.default_rng(seed)
+    dense = rng.standard_normal((n_points, dim), dtype=np.float32)
+    probs = 1 / np.arange(1, vocab_size + 1)
+    probs /= probs.sum()
+    sparse = []
+    for _ in range(n_points):
+        terms = np.unique(rng.choice(vocab_size, n_terms, p=probs)).astype(np.int32)
+        sparse.append({"indices": terms, "values": rng.random(len(terms), np.float32)})
+    return dense, sparse
+
+
+def check_engine_updates(
+    engine_factory: Callable[[str], NumpyEngine],
+    n_points: int = 1000,
+    n_queries: int = 10,
+    k: int = 5,
+) -> None:
+    """
+    Checks that an engine returns the same dense and sparse results as Qdrant in
+    local mode through a sequence of updates: uploads, a flush, deletions only, a
+    flush, upserts with deletions, a flush, upserts followed by a reopening without
+    flush (as after a crash), a flush, and a reopening of the stored collection.
+
+    Args:
+        engine_factory (Callable[[str], NumpyEngine]): Creates the engine stored in a folder.
+        n_points (int): The number of points.
+        n_queries (int): The number of queries checked after each step.
+        k (int): The number of retrieved points per query.
+
+    Raises:
+        AssertionError: If the results of the engine differ from the ones of Qdrant.
+    """
+    dense, sparse = synthetic_points(2 * n_points, vocab_size=1000)
+    # the points replaced by the upserts get the vectors of new points
+    new_dense, new_sparse = dense[n_points:], sparse[n_points:]
+    dense, sparse = dense[:n_points], sparse[:n_points]
+    ids = [chunk_id(i) for i in range(n_points)]
+    payloads = [{"text": f"chunk {i}"} for i in range(n_points)]
+    queries = [(dense[i] + 0.5, sparse[i]) for i in range(n_queries)]
+    replaced = slice(n_points // 2, n_points // 2 + 100)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        client = QdrantClient(":memory:")
+        loader = LoadInVdb(client, "check")
+        loader.setup_collection(is_fresh_start=True)
+        searcher = SearchInVdb(client, "check")
+        engine = engine_factory(f"{tmp_dir}/engine")
+        engine.setup_collection(is_fresh_start=True)
+
+        def check(step: str) -> None:
+            for de_query, sp_query in queries:
+                if [p.id for p in searcher.dense(de_query, k)] != [
+                    p.id for p in engine.dense(de_query, k)
+                ]:
+                    raise AssertionError(f"dense results differ after: {step}")
+                if [p.id for p in searcher.sparse(sp_query, k)] != [
+                    p.id for p in engine.sparse(sp_query, k)
+                ]:
+                    raise AssertionError(f"sparse results differ after: {step}")
+
+        for db in (loader, engine):
+            for start in range(0, n_points, 256):
+                rows = slice(start, start + 256)
+                db.upload(dense[rows], sparse[rows], payloads[rows], ids[rows])
+        check("uploads")
+        engine.flush()
+        check("flush")
+
+        for db in (loader, engine):
+            db.delete_points(ids[: n_points // 10])
+        engine.flush()
+        check("deletions only and flush")
+
+        for db in (loader, engine):
+            db.upload(
+                new_dense[replaced],
+                new_sparse[replaced],
+                payloads[replaced],
+                ids[replaced],
+            )
+            db.delete_points(ids[-50:])
+        check("upserts and deletions")
+        engine.flush()
+        check("flush")
+
+        # upserts not flushed, as when an ingestion crashes
+        for db in (loader, engine):
+            db.upload(
+                dense[replaced], sparse[replaced], payloads[replaced], ids[replaced]
+            )
+        engine = engine_factory(f"{tmp_dir}/engine")
+        check("upserts and reopening without flush")
+        engine.flush()
+        check("flush")
+
+        engine = engine_factory(f"{tmp_dir}/engine")
+        check("reopening")
+        client.close()
+
+
+def bench_retrieval_engines(
+    sizes: list[int], n_queries: int = 50, k: int = 5
+) -> dict[tuple[int, str], dict[str, float]]:
+    """
+    Compares the hybrid search of Qdrant in local mode to the one of the NumPy engine
+    (float32 and float16 dense vectors), at several collection sizes.
+
+    Args:
+        sizes (list[int]): The numbers of points of the collections.
+        n_queries (int): The number of queries.
+        k (int): The number of retrieved points per query.
+
+    Returns:
+        dict[tuple[int, str], dict[str, float]]: For each size and engine, the time (s)
+            to build and to open the collection, the p50/p99 latency (ms) of hybrid_qd
+            and the overlap of its results with the ones of Qdrant.
+    """
+    out = {}
+    for size in sizes:
+        dense, sparse = synthetic_points(size)
+        ids = [chunk_id(i) for i in range(size)]
+        payloads = [{"text": f"chunk {i}"} for i in range(size)]
+        queries = [(dense[i] + 0.5, sparse[i]) for i in range(n_queries)]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            engines = {}
+            start = time.perf_counter()
+            client = QdrantClient(path=f"{tmp_dir}/qdrant")
+            loader = LoadInVdb(client, "benchmark")
+            loader.setup_collection(is_fresh_start=True)
+            loader.upload(dense, sparse, payloads, ids)
+            client.close()
+            build_s = time.perf_counter() - start
+            start = time.perf_counter()
+            client = QdrantClient(path=f"{tmp_dir}/qdrant")
+            engines["qdrant"] = SearchInVdb(client, "benchmark")
+            engines["qdrant"].dense(dense[0], k=1)  # the points are loaded lazily
+            timings = {"qdrant": (build_s, time.perf_counter() - start)}
+
+            for dtype in ["float32", "float16"]:
+                start = time.perf_counter()
+                engine = NumpyEngine(f"{tmp_dir}/{dtype}", "benchmark", dtype)
+                engine.setup_collection(is_fresh_start=True)
+                for batch in range(0, size, 256):
+                    rows = slice(batch, batch + 256)
+                    engine.upload(dense[rows], sparse[rows], payloads[rows], ids[rows])
+                engine.flush()
+                build_s = time.perf_counter() - start
+                start = time.perf_counter()
+                engines[f"numpy {dtype}"] = NumpyEngine(
+                    f"{tmp_dir}/{dtype}", "benchmark"
+                )
+                engines[f"numpy {dtype}"].dense(dense[0], k=1)
+                timings[f"numpy {dtype}"] = (build_s, time.perf_counter() - start)
+
+            reference = None
+            for name, engine in engines.items():
+                latencies, results = [], []
+                for de_query, sp_query in queries:
+                    start = time.perf_counter()
+                    res = engine.hybrid_qd(de_query, sp_query, k=k)
+                    latencies.append(time.perf_counter() - start)
+                    results.append({str(point.id) for point in res})
+                reference = results if reference is None else reference
+                out[(size, name)] = {
+                    "build s": timings[name][0],
+                    "open s": timings[name][1],
+                    "p50 ms": percentile_ms(latencies, 50),
+                    "p99 ms": percentile_ms(latencies, 99),
+                    "overlap": float(
+                        np.mean(
+                            [len(r & ref) / k for r, ref in zip(results, reference)]
+                        )
+                    ),
+                }
+            client.close()
+    return out
+
+
+if __name__ == "__main__":
+    check_engine_updates(lambda path: NumpyEngine(path, "check"))
+    print("NumPy engine: same results as Qdrant through uploads, deletions and flushes")
+    try:
+        from retrieval.faiss_engine import FaissEngine
+
+        check_engine_updates(lambda path: FaissEngine(path, "check"))
+        print(
+            "FAISS engine: same results as Qdrant through uploads, deletions and flushes"
+        )
+    except ImportError:
+        print("faiss is not installed: the FAISS engine is not checked")
+
+    print("Hybrid search, Qdrant local mode vs NumPy engine (synthetic vectors):")
+    for (size, name), stats in bench_retrieval_engines([1000, 10000, 50000]).items():
+        print(
+            f"{size:>6} points, {name:>13}: "
+            + ", ".join(f"{k} {v:.3f}" for k, v in stats.items())
+        )
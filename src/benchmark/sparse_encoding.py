@@ -0,0 +1,180 @@
+import multiprocessing
+import resource
+from typing import Optional
+
+import numpy as np
+
+from benchmark.utils import load_sample_chunks, time_it
+from embedding.sparse import (
+    BACKEND,
+    MAX_LENGTH,
+    compute_sparse_vector,
+    compute_sparse_vectors,
+    get_sparse_model,
+    get_sparse_tokenizer,
+)
+
+
+def bench_sparse_encoding(chunks: list[str], batch_size: int = 16) -> dict[str, float]:
+    """
+    Compares the throughput of the per-chunk and of the batched sparse encoding.
+
+    Args:
+        chunks (list[str]): The chunks to encode.
+        batch_size (int): The batch size of the batched encoding.
+
+    Returns:
+        dict[str, float]: The throughput (chunks/sec) of each encoding mode.
+    """
+    t_loop = time_it(lambda: [compute_sparse_vector(chunk) for chunk in chunks], 1)
+    t_batch = time_it(lambda: compute_sparse_vectors(chunks, batch_size=batch_size), 1)
+    return {
+        "per-chunk loop": len(chunks) / t_loop,
+        f"batched (batch_size={batch_size})": len(chunks) / t_batch,
+    }
+
+
+def max_abs_diff(chunks: list[str]) -> float:
+    """
+    Computes the largest difference between the weights of the per-chunk and
+    of the batched sparse vectors (padding only changes them up to float rounding).
+
+    Args:
+        chunks (list[str]): The chunks to encode.
+
+    Returns:
+        float: The maximum absolute difference over all the weights.
+    """
+    out = 0.0
+    for chunk, batched in zip(chunks, compute_sparse_vectors(chunks)):
+        single = compute_sparse_vector(chunk)
+        a = dict(zip(single["indices"], single["values"]))
+        b = dict(zip(batched["indices"], batched["values"]))
+        for idx in a.keys() | b.keys():
+            out = max(out, abs(a.get(idx, 0.0) - b.get(idx, 0.0)))
+    return out
+
+
+def _baseline_pooling(texts: list[str]) -> np.ndarray:
+    """
+    Encodes a batch of texts with the pooling of the full logits tensor as it was
+    before the memory-bounded pooling (a copy of its reduction).
+
+    Args:
+        texts (list[str]): The texts, encoded in one forward pass.
+
+    Returns:
+        np.ndarray: The pooled vectors, of shape (len(texts), vocab_size).
+    """
+    import torch
+
+    model = get_sparse_model()
+    tokens = get_sparse_tokenizer()(
+        texts, padding=True, truncation=True, max_length=MAX_LENGTH, return_tensors="pt"
+    ).to(model.device)
+    with torch.inference_mode():
+        logits = model(**tokens).logits
+        relu_log = torch.log(1 + torch.relu(logits))
+        weighted_log = relu_log * tokens["attention_mask"].unsqueeze(-1)
+        max_val, _ = torch.max(weighted_log, dim=1)
+    return max_val.cpu().numpy()
+
+
+def check_pooling_parity(
+    chunks: list[str], memory_mb: float, batch_size: int = 16, atol: float = 1e-4
+) -> float:
+    """
+    Checks that the memory-bounded pooling returns the sparse vectors of the
+    baseline pooling over the full logits tensor. The weights are compared with a
+    tolerance: the decoder applied to slices of the vocabulary runs smaller matrix
+    products, which may round differently from the full one (by ~1e-6 on weights
+    of order 1).
+
+    Args:
+        chunks (list[str]): The chunks to encode.
+        memory_mb (float): The peak memory (in MB) of the memory-bounded pooling.
+        batch_size (int): The number of chunks encoded in a forward pass.
+        atol (float): The largest absolute difference allowed between two weights.
+
+    Raises:
+        ValueError: If the sparse model is not a PyTorch model with a BERT-like MLM
+            head (the pooling of the ONNX backends is not memory-bounded).
+        AssertionError: If a weight differs by more than atol.
+
+    Returns:
+        float: The largest absolute difference between two weights.
+    """
+    if not hasattr(get_sparse_model(), "cls"):
+        raise ValueError(
+            f"The memory-bounded pooling does not apply to the '{BACKEND}' backend"
+        )
+    out = 0.0
+    for start in range(0, len(chunks), batch_size):
+        batch = chunks[start : start + batch_size]
+        expected = _baseline_pooling(batch)
+        bounded = compute_sparse_vectors(
+            batch, batch_size=batch_size, memory_mb=memory_mb
+        )
+        for i, (row, vector) in enumerate(zip(expected, bounded)):
+            found = np.zeros_like(row)
+            found[vector["indices"]] = vector["values"]
+            diff = float(np.abs(found - row).max())
+            if diff > atol:
+                raise AssertionError(
+                    f"weights of chunk {start + i} differ from the baseline pooling "
+                    f"by {diff:.2e} (> {atol})"
+                )
+            out = max(out, diff)
+    return out
+
+
+def _peak_rss_mb(chunks: list[str], memory_mb: Optional[float]) -> float:
+    """
+    Encodes the chunks and returns the peak resident memory of the process, in MB.
+    Meant to be run in a fresh process.
+    """
+    compute_sparse_vectors(chunks, memory_mb=memory_mb)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_pooling_memory(
+    chunks: list[str], memory_mbs: list[Optional[float]]
+) -> dict[Optional[float], float]:
+    """
+    Measures the peak resident memory of the sparse encoding for several pooling
+    memory budgets, each one in a dedicated process.
+
+    Args:
+        chunks (list[str]): The chunks to encode.
+        memory_mbs (list[Optional[float]]): The pooling memory budgets (None: full logits).
+
+    Returns:
+        dict[Optional[float], float]: The peak resident memory (MB) for each budget.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    out = {}
+    for memory_mb in memory_mbs:
+        with ctx.Pool(1) as pool:
+            out[memory_mb] = pool.apply(_peak_rss_mb, (chunks, memory_mb))
+    return out
+
+
+if __name__ == "__main__":
+    from utility.read_config import get_config_from_path
+
+    dct_config = get_config_from_path("config.yaml")
+    chunks = load_sample_chunks(dct_config["INPUT_DATA"]["PATH_TO_FOLDER"], 200)
+
+    print(f"Sparse encoding of {len(chunks)} chunks:")
+    for mode, chunks_per_sec in bench_sparse_encoding(chunks).items():
+        print(f"{mode:>30}: {chunks_per_sec:8.1f} chunks/sec")
+    print(f"Max abs weight difference: {max_abs_diff(chunks[:50]):.2e}")
+
+    if hasattr(get_sparse_model(), "cls"):
+        max_diff = check_pooling_parity(chunks[:50], memory_mb=16)
+        print(
+            "Memory-bounded pooling: same output as the baseline full logits pooling "
+            f"(max abs weight difference {max_diff:.2e})"
+        )
+    for memory_mb, peak_mb in bench_pooling_memory(chunks, [None, 256, 64, 16]).items():
+        print(f"pooling budget {str(memory_mb):>5} MB: peak RSS {peak_mb:8.1f} MB")
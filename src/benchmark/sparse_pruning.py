@@ -0,0 +1,108 @@
+import time
+from typing import Optional
+
+import numpy as np
+
+from benchmark.utils import (
+    build_sample_collection,
+    load_sample_chunks,
+    percentile_ms,
+    pseudo_queries,
+    recall_at_k,
+)
+from embedding.dense import compute_dense_vectors
+from embedding.sparse import (
+    compute_sparse_vector,
+    compute_sparse_vectors,
+    prune_sparse_vector,
+)
+
+# name -> (documents pruning, queries pruning), as prune_sparse_vector arguments
+PRUNING_SETTINGS = {
+    "none": ({}, {}),
+    "min 0.1": ({"min_weight": 0.1}, {}),
+    "top 128": ({"top_k": 128}, {}),
+    "top 64": ({"top_k": 64}, {"top_k": 32}),
+    "top 64 8bit": ({"top_k": 64, "quantization_bits": 8}, {"top_k": 32}),
+    "top 32": ({"top_k": 32}, {"top_k": 16}),
+}
+
+
+def bench_sparse_pruning(
+    chunks: list[str],
+    settings: Optional[dict[str, tuple[dict, dict]]] = None,
+    n_queries: int = 100,
+    k: int = 10,
+) -> dict[str, dict[str, float]]:
+    """
+    Compares the sparse search with pruned documents and queries vectors to the one
+    with the full vectors: size of the sparse index, search latency and quality.
+
+    Args:
+        chunks (list[str]): The chunks of the corpus.
+        settings (Optional[dict[str, tuple[dict, dict]]]): For each setting, the
+            documents and the queries pruning (prune_sparse_vector arguments).
+            If None, PRUNING_SETTINGS.
+        n_queries (int): The number of queries.
+        k (int): The number of retrieved points per query.
+
+    Returns:
+        dict[str, dict[str, float]]: For each setting, the mean number of terms per
+            document and per query, the size (MB) of the index postings (int32 index
+            plus float32 weight, or uint8 weight when quantized to 8 bits), the p50/p99
+            latency (ms) of the sparse search, its recall@k and the overlap of its
+            top k with the one of the unpruned vectors.
+    """
+    settings = PRUNING_SETTINGS if settings is None else settings
+    dense_vectors = compute_dense_vectors(chunks)
+    doc_vectors = compute_sparse_vectors(chunks)
+    queries = pseudo_queries(chunks, n_queries)
+    query_vectors = [compute_sparse_vector(query) for query, _ in queries]
+    targets = [target for _, target in queries]
+
+    reference = None
+    out = {}
+    for name, (doc_pruning, query_pruning) in settings.items():
+        docs = [prune_sparse_vector(vector, **doc_pruning) for vector in doc_vectors]
+        _, searcher = build_sample_collection(
+            chunks, dense_vectors=dense_vectors, sparse_vectors=docs
+        )
+        pruned_queries = [
+            prune_sparse_vector(vector, **query_pruning) for vector in query_vectors
+        ]
+        timings, results = [], []
+        for vector in pruned_queries:
+            start = time.perf_counter()
+            results.append(searcher.sparse(vector, k=k))
+            timings.append(time.perf_counter() - start)
+
+        ranked = [[str(point.id) for point in res] for res in results]
+        reference = ranked if reference is None else reference
+        n_postings = sum(len(doc["indices"]) for doc in docs)
+        weight_bytes = 1 if doc_pruning.get("quantization_bits") == 8 else 4
+        out[name] = {
+            "terms/doc": n_postings / len(docs),
+            "terms/query": np.mean([len(q["indices"]) for q in pruned_queries]),
+            "index MB": n_postings * (4 + weight_bytes) / 2**20,
+            "p50 ms": percentile_ms(timings, 50),
+            "p99 ms": percentile_ms(timings, 99),
+            f"recall@{k}": recall_at_k(results, targets),
+            f"overlap@{k}": np.mean(
+                [
+                    len(set(res) & set(ref)) / max(1, len(ref))
+                    for res, ref in zip(ranked, reference)
+                ]
+            ),
+        }
+    return out
+
+
+if __name__ == "__main__":
+    from utility.read_config import get_config_from_path
+
+    dct_config = get_config_from_path("config.yaml")
+    chunks = load_sample_chunks(dct_config["INPUT_DATA"]["PATH_TO_FOLDER"], 1000)
+
+    print(f"Sparse vectors pruning on {len(chunks)} chunks (first setting: reference):")
+    for name, stats in bench_sparse_pruning(chunks).items():
+        print(f"{name:>12}: " + ", ".join(f"{k} {v:.3f}" for k, v in stats.items()))
@@ -0,0 +1,69 @@
+import time
+
+from benchmark.utils import (
+    build_sample_collection,
+    load_sample_chunks,
+    percentile_ms,
+    pseudo_queries,
+    recall_at_k,
+)
+from embedding.idf import TokenIdf
+from embedding.sparse import (
+    compute_sparse_vector,
+    compute_sparse_vector_idf,
+    compute_token_ids,
+    sparse_vocab_size,
+)
+
+
+def bench_sparse_query_modes(
+    chunks: list[str], n_queries: int = 100, k: int = 10
+) -> dict[str, dict[str, float]]:
+    """
+    Compares the 'model' and the inference-free 'idf' sparse query modes, on a
+    collection whose documents are SPLADE-expanded in both cases.
+
+    Args:
+        chunks (list[str]): The chunks of the corpus.
+        n_queries (int): The number of queries.
+        k (int): The number of retrieved points per query.
+
+    Returns:
+        dict[str, dict[str, float]]: For each mode, the p50/p99 latency (ms) of the
+            query encoding plus search and the recall@k of the sparse search.
+    """
+    _, searcher = build_sample_collection(chunks)
+    queries = pseudo_queries(chunks, n_queries)
+
+    token_idf = TokenIdf(vocab_size=sparse_vocab_size())
+    token_idf.update(compute_token_ids(chunks))
+    weights = token_idf.weights()
+
+    encoders = {
+        "model": compute_sparse_vector,
+        "idf": lambda text: compute_sparse_vector_idf(text, weights),
+    }
+    out = {}
+    for mode, encode in encoders.items():
+        timings, results = [], []
+        for query, _ in queries:
+            start = time.perf_counter()
+            results.append(searcher.sparse(encode(query), k=k))
+            timings.append(time.perf_counter() - start)
+        out[mode] = {
+            "p50 ms": percentile_ms(timings, 50),
+            "p99 ms": percentile_ms(timings, 99),
+            f"recall@{k}": recall_at_k(results, [target for _, target in queries]),
+        }
+    return out
+
+
+if __name__ == "__main__":
+    from utility.read_config import get_config_from_path
+
+    dct_config = get_config_from_path("config.yaml")
+    chunks = load_sample_chunks(dct_config["INPUT_DATA"]["PATH_TO_FOLDER"], 1000)
+
+    print(f"Sparse query modes on {len(chunks)} chunks:")
+    for mode, stats in bench_sparse_query_modes(chunks).items():
+        print(f"{mode:>6}: " + ", ".join(f"{k} {v:.3f}" for k, v in stats.items()))
@@ -0,0 +1,202 @@
+import os
+import random
+import time
+from typing import Callable, Iterable, Optional
+from uuid import UUID
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from embedding.dense import compute_dense_vectors
+from embedding.sparse import compute_sparse_vectors
+from ingestion.utils import chunk_text, convert_html_to_markdown, is_html_file
+from ingestion.vdb_wrapper import LoadInVdb
+from retrieval.vdb_wrapper import SearchInVdb
+
+
+def load_sample_chunks(html_folder_path: str, n_max_chunks: int = 1000) -> list[str]:
+    """
+    Loads text chunks from the HTML documents of a folder, to be used as benchmark corpus.
+    If the folder holds no HTML documents, synthetic chunks are generated instead.
+
+    Args:
+        html_folder_path (str): The path to the folder containing HTML files.
+        n_max_chunks (int): The maximum number of chunks to return.
+
+    Returns:
+        list[str]: A list of text chunks.
+    """
+    chunks = []
+    if os.path.isdir(html_folder_path):
+        for f in sorted(os.listdir(html_folder_path)):
+            if not is_html_file(f):
+                continue
+            markdown_text = convert_html_to_markdown(os.path.join(html_folder_path, f))
+            chunks.extend(chunk_text(markdown_text))
+            if len(chunks) >= n_max_chunks:
+                break
+
+    if len(chunks) == 0:
+        chunks = synthetic_chunks(n_max_chunks)
+    return chunks[:n_max_chunks]
+
+
+def synthetic_chunks(n_chunks: int, seed: int = 0) -> list[str]:
+    """
+    Generates random chunks made of sentences of common english words.
+
+    Args:
+        n_chunks (int): The number of chunks to generate.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        list[str]: A list of text chunks of varying length.
+    """
+    words = (
+        "the of and to in is that for it as with was on be by this are from at or "
+        "which an particle energy detector gamma ray burst model data photon flux "
+        "spectrum scintillator emission source time galaxy signal light curve mass "
+        "observation neutron star event rate analysis high low field sample results"
+    ).split()
+    rnd = random.Random(seed)
+    chunks = []
+    for _ in range(n_chunks):
+        sentences = []
+        for _ in range(rnd.randint(1, 4)):
+            sentence = " ".join(rnd.choice(words) for _ in range(rnd.randint(5, 25)))
+            sentences.append(sentence.capitalize() + ".")
+        chunks.append(" ".join(sentences))
+    return chunks
+
+
+def time_it(func: Callable[[], object], n_repeat: int = 3) -> float:
+    """
+    Runs a function several times and returns the best wall-clock time.
+
+    Args:
+        func (Callable[[], object]): The function to time.
+        n_repeat (int): The number of runs.
+
+    Returns:
+        float: The best elapsed time, in seconds.
+    """
+    best = float("inf")
+    for _ in range(n_repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def pseudo_queries(
+    chunks: list[str], n_queries: int = 100, seed: int = 0
+) -> list[tuple[str, int]]:
+    """
+    Builds queries with a known answer: each query is a span of words taken
+    from a random chunk, which is the relevant one for that query.
+
+    Args:
+        chunks (list[str]): The chunks of the corpus.
+        n_queries (int): The number of queries to build.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        list[tuple[str, int]]: The queries, each with the index of its relevant chunk.
+    """
+    rnd = random.Random(seed)
+    out = []
+    for i in rnd.sample(range(len(chunks)), min(n_queries, len(chunks))):
+        words = chunks[i].split()
+        span = min(len(words), rnd.randint(6, 12))
+        start = rnd.randint(0, len(words) - span)
+        out.append((" ".join(words[start : start + span]), i))
+    return out
+
+
+def chunk_id(i: int) -> str:
+    """
+    Returns the point id of the i-th chunk of a benchmark collection.
+
+    Args:
+        i (int): The index of the chunk.
+
+    Returns:
+        str: The point id.
+    """
+    return str(UUID(int=i))
+
+
+def build_sample_collection(
+    chunks: list[str],
+    coll_name: str = "benchmark",
+    dense_vectors: Optional[np.ndarray] = None,
+    sparse_vectors: Optional[list[dict]] = None,
+    client: Optional[QdrantClient] = None,
+    **loader_kwargs,
+) -> tuple[LoadInVdb, SearchInVdb]:
+    """
+    Indexes the chunks into a Qdrant collection (in memory by default); the point id
+    of each chunk is chunk_id(index of the chunk).
+
+    Args:
+        chunks (list[str]): The chunks to index.
+        coll_name (str): The name of the collection.
+        dense_vectors (Optional[np.ndarray]): The dense vectors of the chunks, if
+            already computed; otherwise they are computed.
+        sparse_vectors (Optional[list[dict]]): The sparse vectors of the chunks, if
+            already computed (e.g. pruned); otherwise they are computed.
+        client (Optional[QdrantClient]): The client of the vector database (e.g. a
+            server, whose index features the in-memory one lacks); if None, in memory.
+        **loader_kwargs: Keyword arguments passed to LoadInVdb.
+
+    Returns:
+        tuple[LoadInVdb, SearchInVdb]: The loader and the searcher of the collection.
+    """
+    client = QdrantClient(":memory:") if client is None else client
+    loader = LoadInVdb(client=client, coll_name=coll_name, **loader_kwargs)
+    loader.setup_collection(is_fresh_start=True)
+    loader.upload(
+        dense_vectors=(
+            compute_dense_vectors(chunks) if dense_vectors is None else dense_vectors
+        ),
+        sparse_vectors=(
+            compute_sparse_vectors(chunks) if sparse_vectors is None else sparse_vectors
+        ),
+        payloads=[{"text": chunk} for chunk in chunks],
+        ids=[chunk_id(i) for i in range(len(chunks))],
+    )
+    return loader, SearchInVdb(client=client, coll_name=coll_name)
+
+
+def recall_at_k(results: Iterable[list], targets: Iterable[int]) -> float:
+    """
+    Computes the fraction of queries whose relevant chunk is among the results.
+
+    Args:
+        results (Iterable[list]): For each query, the retrieved points (with an id attribute).
+        targets (Iterable[int]): For each query, the index of the relevant chunk.
+
+    Returns:
+        float: The recall.
+    """
+    hits = [
+        chunk_id(target) in {str(point.id) for point in res}
+        for res, target in zip(results, targets)
+    ]
+    return sum(hits) / max(1, len(hits))
+
+
+def percentile_ms(timings: list[float], q: float) -> float:
+    """
+    Computes a percentile of a list of timings.
+
+    Args:
+        timings (list[float]): The timings, in seconds.
+        q (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The percentile, in milliseconds.
+    """
+    timings = sorted(timings)
+    idx = min(len(timings) - 1, int(round(q / 100 * (len(timings) - 1))))
+    return 1000 * timings[idx]
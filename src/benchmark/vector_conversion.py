@@ -0,0 +1,208 @@
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+from uuid import UUID
+
+import numpy as np
+from qdrant_client import models
+
+from utility.vectors import as_dense_list, as_dense_lists, as_sparse_vector
+
+
+def synthetic_encoder_outputs(
+    n_chunks: int, dim: int = 384, vocab_size: int = 30522, n_terms: int = 200
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Generates outputs shaped like the ones of the encoders: a float32 matrix of dense
+    vectors and a float32 matrix of pooled vocabulary activations with n_terms
+    non-zero entries per row.
+
+    Args:
+        n_chunks (int): The number of chunks.
+        dim (int): The dimension of the dense vectors.
+        vocab_size (int): The size of the vocabulary.
+        n_terms (int): The number of non-zero activations per chunk.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The dense and the vocabulary matrices.
+    """
+    rng = np.random.default_rng(0)
+    dense = rng.standard_normal((n_chunks, dim), dtype=np.float32)
+    vocab = np.zeros((n_chunks, vocab_size), dtype=np.float32)
+    for row in vocab:
+        row[rng.choice(vocab_size, n_terms, replace=False)] = rng.random(n_terms)
+    return dense, vocab
+
+
+def list_path(dense_row: np.ndarray, vocab_row: np.ndarray, i: int) -> Any:
+    """The former path: lists out of the encoders, then SparseVector and PointStruct."""
+    dense_vector = dense_row.tolist()
+    indices = np.flatnonzero(vocab_row).tolist()
+    sparse_vector = {"indices": indices, "values": vocab_row[indices].tolist()}
+    return models.PointStruct(
+        id=str(UUID(int=i)),
+        vector={
+            "text-dense": dense_vector,
+            "text-sparse": models.SparseVector(**sparse_vector),
+        },
+        payload={"text": ""},
+    )
+
+
+def array_path(dense_row: np.ndarray, vocab_row: np.ndarray, i: int) -> Any:
+    """The current path: arrays out of the encoders, converted once for the client."""
+    indices = np.flatnonzero(vocab_row).astype(np.int32)
+    sparse_vector = {"indices": indices, "values": vocab_row[indices]}
+    return {
+        "text-dense": as_dense_list(dense_row),
+        "text-sparse": as_sparse_vector(sparse_vector),
+    }
+
+
+def _held_bytes(vector: Any) -> int:
+    """The memory held by a vector (list of floats or array) between two stages."""
+    if isinstance(vector, np.ndarray):
+        # getsizeof counts the data buffer only when the array owns it
+        header = sys.getsizeof(vector) - (vector.nbytes if vector.flags.owndata else 0)
+        return header + vector.nbytes
+    return sys.getsizeof(vector) + sum(sys.getsizeof(x) for x in vector)
+
+
+def bench_conversion(
+    path: Callable[[np.ndarray, np.ndarray, int], Any],
+    dense: np.ndarray,
+    vocab: np.ndarray,
+) -> dict[str, float]:
+    """
+    Measures the time and the memory allocations per chunk of a conversion path.
+
+    Args:
+        path (Callable): The conversion of the encoder outputs of a chunk.
+        dense (np.ndarray): The dense vectors.
+        vocab (np.ndarray): The vocabulary activations.
+
+    Returns:
+        dict[str, float]: The microseconds and the allocated KB per chunk.
+    """
+    start = time.perf_counter()
+    for i, (dense_row, vocab_row) in enumerate(zip(dense, vocab)):
+        path(dense_row, vocab_row, i)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    out = [
+        path(dense_row, vocab_row, i)
+        for i, (dense_row, vocab_row) in enumerate(zip(dense, vocab))
+    ]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del out
+    return {
+        "us/chunk": 1e6 * elapsed / len(dense),
+        "KB allocated/chunk": allocated / len(dense) / 1024,
+    }
+
+
+def bench_upload_requests(
+    dense: np.ndarray, vocab: np.ndarray, batch_size: int = 256
+) -> dict[str, dict[str, float]]:
+    """
+    Measures the client-side cost per point of the upload requests, built and
+    serialized as sent to a Qdrant server (JSON): one PointStruct per point (as
+    upload_collection) vs the columns of a models.Batch (as LoadInVdb.upload).
+
+    Args:
+        dense (np.ndarray): The dense vectors.
+        vocab (np.ndarray): The vocabulary activations.
+        batch_size (int): The number of points per request.
+
+    Returns:
+        dict[str, dict[str, float]]: For each request layout, the microseconds and
+            the peak KB allocated per point.
+    """
+    sparse = []
+    for row in vocab:
+        indices = np.flatnonzero(row).astype(np.int32)
+        sparse.append({"indices": indices, "values": row[indices]})
+    ids = [str(UUID(int=i)) for i in range(len(dense))]
+    payloads = [{"text": ""} for _ in ids]
+
+    def points() -> list[str]:
+        return [
+            models.PointsList(
+                points=[
+                    models.PointStruct(
+                        id=ids[i],
+                        vector={
+                            "text-dense": as_dense_list(dense[i]),
+                            "text-sparse": as_sparse_vector(sparse[i]),
+                        },
+                        payload=payloads[i],
+                    )
+                    for i in range(start, min(start + batch_size, len(dense)))
+                ]
+            ).model_dump_json()
+            for start in range(0, len(dense), batch_size)
+        ]
+
+    def columns() -> list[str]:
+        return [
+            models.PointsBatch(
+                batch=models.Batch(
+                    ids=ids[start : start + batch_size],
+                    vectors={
+                        "text-dense": as_dense_lists(dense[start : start + batch_size]),
+                        "text-sparse": [
+                            as_sparse_vector(vector)
+                            for vector in sparse[start : start + batch_size]
+                        ],
+                    },
+                    payloads=payloads[start : start + batch_size],
+                )
+            ).model_dump_json()
+            for start in range(0, len(dense), batch_size)
+        ]
+
+    out = {}
+    for name, build in [("PointStruct per point", points), ("Batch", columns)]:
+        start = time.perf_counter()
+        build()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        build()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        out[name] = {
+            "us/point": 1e6 * elapsed / len(dense),
+            "peak KB/point": peak / len(dense) / 1024,
+        }
+    return out
+
+
+if __name__ == "__main__":
+    dense, vocab = synthetic_encoder_outputs(n_chunks=2000)
+    for name, path in [("lists", list_path), ("arrays", array_path)]:
+        stats = bench_conversion(path, dense, vocab)
+        print(f"{name:>6}: " + ", ".join(f"{v:8.1f} {k}" for k, v in stats.items()))
+
+    # memory held per chunk between the pipeline stages (queues, embedding cache)
+    indices = np.flatnonzero(vocab[0]).astype(np.int32)
+    as_lists = (
+        _held_bytes(dense[0].tolist())
+        + _held_bytes(indices.tolist())
+        + _held_bytes(vocab[0][indices].tolist())
+    )
+    as_arrays = (
+        _held_bytes(dense[0]) + _held_bytes(indices) + _held_bytes(vocab[0][indices])
+    )
+    print(
+        f"Vectors of a chunk held between stages: {as_lists / 1024:.1f} KB as lists, "
+        f"{as_arrays / 1024:.1f} KB as arrays"
+    )
+
+    print("Upload requests (built and serialized to JSON):")
+    for name, stats in bench_upload_requests(dense, vocab).items():
+        print(f"{name:>21}: " + ", ".join(f"{v:8.1f} {k}" for k, v in stats.items()))
@@ -0,0 +1,257 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Optional
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes a text before hashing it: unicode NFC form, collapsed whitespace.
+
+    Args:
+        text (str): The text to normalize.
+
+    Returns:
+        str: The normalized text.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, max_size_mb: float = 1024):
+        """
+        Initializes the EmbeddingCache instance: an on-disk (SQLite) cache of dense
+        and sparse vectors, keyed by model id and normalized text hash, bounded in
+        size with least-recently-used eviction.
+
+        Args:
+            path (str): The path of the SQLite file.
+            max_size_mb (float): The maximum size (in MB) of the stored vectors.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_size = int(max_size_mb * 2**20)
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            "key BLOB PRIMARY KEY, indices BLOB, vals BLOB NOT NULL, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS vectors_access ON vectors (last_access)"
+        )
+        self._size = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM vectors"
+        ).fetchone()[0]
+
+    @staticmethod
+    def _key(model_id: str, text: str) -> bytes:
+        """
+        Computes the key of a text encoded by a model.
+
+        Args:
+            model_id (str): The id of the model (name, revision, backend).
+            text (str): The encoded text.
+
+        Returns:
+            bytes: The key (sha256 digest).
+        """
+        return hashlib.sha256(
+            f"{model_id}\0{normalize_text(text)}".encode("utf-8")
+        ).digest()
+
+    def _get(
+        self, model_id: str, texts: list[str]
+    ) -> list[Optional[tuple[Optional[bytes], bytes]]]:
+        """
+        Reads the stored vectors of some texts and marks them as recently used.
+
+        Args:
+            model_id (str): The id of the model.
+            texts (list[str]): The texts.
+
+        Returns:
+            list[Optional[tuple[Optional[bytes], bytes]]]: For each text, its raw
+                (indices, values) buffers, or None on a cache miss.
+        """
+        keys = [self._key(model_id, text) for text in texts]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                rows = self._conn.execute(
+                    "SELECT key, indices, vals FROM vectors WHERE key IN "
+                    f"({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                found.update({key: (indices, vals) for key, indices, vals in rows})
+            self._conn.executemany(
+                "UPDATE vectors SET last_access = ? WHERE key = ?",
+                [(time.time(), key) for key in found],
+            )
+            self._conn.commit()
+
+        out = [found.get(key) for key in keys]
+        n_hits = sum(entry is not None for entry in out)
+        self.hits[model_id] = self.hits.get(model_id, 0) + n_hits
+        self.misses[model_id] = self.misses.get(model_id, 0) + len(out) - n_hits
+        return out
+
+    def _put(
+        self,
+        model_id: str,
+        texts: list[str],
+        entries: list[tuple[Optional[bytes], bytes]],
+    ) -> None:
+        """
+        Stores the vectors of some texts, then evicts the least recently used
+        vectors if the cache exceeds its maximum size.
+
+        Args:
+            model_id (str): The id of the model.
+            texts (list[str]): The texts.
+            entries (list[tuple[Optional[bytes], bytes]]): For each text, its raw
+                (indices, values) buffers.
+        """
+        now = time.time()
+        # one row per key (the last one, as INSERT OR REPLACE), so that the size of
+        # a text repeated in the batch is counted once
+        by_key = {}
+        for text, (indices, vals) in zip(texts, entries):
+            key = self._key(model_id, text)
+            by_key[key] = (key, indices, vals, len(indices or b"") + len(vals), now)
+        rows = list(by_key.values())
+        with self._lock:
+            for key, *_ in rows:
+                old = self._conn.execute(
+                    "SELECT size FROM vectors WHERE key = ?", (key,)
+                ).fetchone()
+                self._size -= old[0] if old else 0
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._size += sum(row[3] for row in rows)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """
+        Deletes the least recently used vectors until the cache takes at most 90%
+        of its maximum size. To be called holding the lock.
+        """
+        if self._size <= self.max_size:
+            return
+        target = int(0.9 * self.max_size)
+        freed, stale = 0, []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM vectors ORDER BY last_access"
+        ):
+            if self._size - freed <= target:
+                break
+            stale.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM vectors WHERE key = ?", stale)
+        self._size -= freed
+
+    def get_dense(self, model_id: str, texts: list[str]) -> list[Optional[np.ndarray]]:
+        """
+        Reads the stored dense vectors of some texts.
+
+        Args:
+            model_id (str): The id of the dense model.
+            texts (list[str]): The texts.
+
+        Returns:
+            list[Optional[np.ndarray]]: For each text, its float32 vector, or None on a cache miss.
+        """
+        return [
+            None if entry is None else np.frombuffer(entry[1], dtype=np.float32)
+            for entry in self._get(model_id, texts)
+        ]
+
+    def put_dense(self, model_id: str, texts: list[str], vectors: np.ndarray) -> None:
+        """
+        Stores the dense vectors of some texts.
+
+        Args:
+            model_id (str): The id of the dense model.
+            texts (list[str]): The texts.
+            vectors (np.ndarray): The matrix of the vectors, one row per text.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self._put(model_id, texts, [(None, row.tobytes()) for row in vectors])
+
+    def get_sparse(self, model_id: str, texts: list[str]) -> list[Optional[dict]]:
+        """
+        Reads the stored sparse vectors of some texts.
+
+        Args:
+            model_id (str): The id of the sparse model.
+            texts (list[str]): The texts.
+
+        Returns:
+            list[Optional[dict]]: For each text, the sparse vector indices (int32
+                array) and values (float32 array), or None on a cache miss.
+        """
+        return [
+            (
+                None
+                if entry is None
+                else {
+                    "indices": np.frombuffer(entry[0], dtype=np.int32),
+                    "values": np.frombuffer(entry[1], dtype=np.float32),
+                }
+            )
+            for entry in self._get(model_id, texts)
+        ]
+
+    def put_sparse(self, model_id: str, texts: list[str], vectors: list[dict]) -> None:
+        """
+        Stores the sparse vectors of some texts.
+
+        Args:
+            model_id (str): The id of the sparse model.
+            texts (list[str]): The texts.
+            vectors (list[dict]): For each text, a dictionary containing the sparse
+                vector indices and values.
+        """
+        entries = [
+            (
+                np.asarray(vector["indices"], dtype=np.int32).tobytes(),
+                np.asarray(vector["values"], dtype=np.float32).tobytes(),
+            )
+            for vector in vectors
+        ]
+        self._put(model_id, texts, entries)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """
+        Returns the hit/miss statistics of the cache, per model, since its creation.
+
+        Returns:
+            dict[str, dict[str, float]]: For each model id, the number of hits and
+                misses and the hit rate.
+        """
+        return {
+            model_id: {
+                "hits": self.hits[model_id],
+                "misses": self.misses[model_id],
+                "hit_rate": self.hits[model_id]
+                / max(1, self.hits[model_id] + self.misses[model_id]),
+            }
+            for model_id in self.hits
+        }
+
+    def close(self) -> None:
+        """
+        Closes the SQLite connection.
+        """
+        self._conn.close()
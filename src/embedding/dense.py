@@ -1,14 +1,73 @@
-from sentence_transformers import SentenceTransformer
+from typing import TYPE_CHECKING
 
+import numpy as np
+
+from embedding.registry import (
+    DEFAULT_ONNX_DIR,
+    get_dense_dim,
+    get_model_revision,
+    get_sentence_transformer,
+    get_tokenizer,
+)
 from utility.read_config import get_config_from_path
 
+if TYPE_CHECKING:
+    # imported by the registry on first use, to keep this module fast to import
+    from sentence_transformers import SentenceTransformer
+    from transformers import PreTrainedTokenizerBase
+
 dct_config = get_config_from_path("config.yaml")
 
-encoder = SentenceTransformer(dct_config["PRE_TRAINED_EMB"]["DENSE_MODEL_NAME"])
-EMB_DIM = encoder.get_sentence_embedding_dimension()
+MODEL_NAME = dct_config["PRE_TRAINED_EMB"]["DENSE_MODEL_NAME"]
+DEVICE = dct_config["PRE_TRAINED_EMB"].get("DEVICE")
+BACKEND = dct_config["PRE_TRAINED_EMB"].get("BACKEND", "torch")
+ONNX_DIR = dct_config["PRE_TRAINED_EMB"].get("ONNX_DIR", DEFAULT_ONNX_DIR)
+
+
+def get_encoder() -> "SentenceTransformer":
+    """
+    Returns the dense encoder, loaded on first use through the model registry,
+    with the configured inference backend.
+
+    Returns:
+        SentenceTransformer: The dense encoder.
+    """
+    return get_sentence_transformer(MODEL_NAME, DEVICE, BACKEND, ONNX_DIR)
+
+
+def get_dense_tokenizer() -> "PreTrainedTokenizerBase":
+    """
+    Returns the tokenizer of the dense encoder, loaded on first use through the model
+    registry, without loading the encoder weights.
+
+    Returns:
+        PreTrainedTokenizerBase: The tokenizer.
+    """
+    return get_tokenizer(MODEL_NAME)
+
+
+def get_emb_dim() -> int:
+    """
+    Returns the dimension of the dense vectors, without loading the encoder weights.
+
+    Returns:
+        int: The dimension of the dense vectors.
+    """
+    return get_dense_dim(MODEL_NAME)
 
 
-def compute_dense_vector(query_text: str) -> list[float]:
+def get_model_id() -> str:
+    """
+    Returns an id of the dense encoder (name, revision and backend), identifying the
+    vectors it computes (e.g. in the embedding cache).
+
+    Returns:
+        str: The id of the dense encoder.
+    """
+    return f"dense:{MODEL_NAME}@{get_model_revision(MODEL_NAME)}:{BACKEND}"
+
+
+def compute_dense_vector(query_text: str) -> np.ndarray:
     """
     Computes a dense vector representation of the given query text.
 
@@ -16,6 +75,39 @@ def compute_dense_vector(query_text: str) -> list[float]:
         query_text (str): The input text to convert into a dense vector.
 
     Returns:
-        list[float]: A list representing the dense vector of the input text.
+        np.ndarray: The float32 dense vector of the input text.
+    """
+    vector = get_encoder().encode(
+        query_text, show_progress_bar=False, convert_to_numpy=True
+    )
+    return vector.astype(np.float32, copy=False)
+
+
+def compute_dense_vectors(texts: list[str], batch_size: int = 64) -> np.ndarray:
+    """
+    Computes dense vector representations of a list of texts, in batches.
+
+    Texts are encoded from the longest to the shortest, so that each batch holds
+    texts of similar length and padding stays low. The rows of the output follow
+    the order of the input list.
+
+    Args:
+        texts (list[str]): The input texts to convert into dense vectors.
+        batch_size (int): The number of texts encoded in a single forward pass.
+
+    Returns:
+        np.ndarray: A float32 matrix of shape (len(texts), get_emb_dim()).
     """
-    return encoder.encode(query_text, show_progress_bar=False).tolist()
+    if len(texts) == 0:
+        return np.empty((0, get_emb_dim()), dtype=np.float32)
+
+    order = np.argsort([-len(text) for text in texts], kind="stable")
+    vectors = get_encoder().encode(
+        [texts[i] for i in order],
+        batch_size=batch_size,
+        show_progress_bar=False,
+        convert_to_numpy=True,
+    )
+    out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+    out[order] = vectors
+    return out
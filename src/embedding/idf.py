@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+
+
+class TokenIdf:
+    def __init__(self, vocab_size: int):
+        """
+        Initializes the TokenIdf instance, holding the document frequency of
+        every token of a tokenizer vocabulary.
+
+        Args:
+            vocab_size (int): The size of the tokenizer vocabulary.
+        """
+        self.doc_freq = np.zeros(vocab_size, dtype=np.int64)
+        self.n_docs = 0
+
+    def update(self, token_ids: list[list[int]]) -> None:
+        """
+        Adds the token ids of some documents to the statistics.
+
+        Args:
+            token_ids (list[list[int]]): The token ids of each document.
+        """
+        for ids in token_ids:
+            self.doc_freq[np.unique(np.asarray(ids, dtype=np.int64))] += 1
+        self.n_docs += len(token_ids)
+
+    def weights(self) -> np.ndarray:
+        """
+        Computes the (BM25-like) inverse document frequency of every token.
+
+        Returns:
+            np.ndarray: A float32 array of size vocab_size with the weight of each token.
+        """
+        idf = np.log1p((self.n_docs - self.doc_freq + 0.5) / (self.doc_freq + 0.5))
+        return idf.astype(np.float32)
+
+    def save(self, path: str) -> None:
+        """
+        Saves the statistics to a .npz file (replaced atomically, as it is saved
+        during the indexing).
+
+        Args:
+            path (str): The path of the file.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "wb") as file:
+            np.savez(file, doc_freq=self.doc_freq, n_docs=self.n_docs)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> "TokenIdf":
+        """
+        Loads the statistics from a .npz file.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            TokenIdf: The loaded statistics.
+        """
+        with np.load(path) as data:
+            out = cls(vocab_size=len(data["doc_freq"]))
+            out.doc_freq[:] = data["doc_freq"]
+            out.n_docs = int(data["n_docs"])
+        return out
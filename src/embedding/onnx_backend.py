@@ -0,0 +1,319 @@
+import json
+import os
+from typing import Union
+
+import numpy as np
+
+INPUT_NAMES = ("input_ids", "attention_mask", "token_type_ids")
+OPSET_VERSION = 14
+
+
+def _model_folder(onnx_dir: str, name: str) -> str:
+    """
+    Returns the folder holding the ONNX export of a model.
+
+    Args:
+        onnx_dir (str): The root folder of the ONNX exports.
+        name (str): The name of the model.
+
+    Returns:
+        str: The folder of the model export.
+    """
+    return os.path.join(onnx_dir, name.replace("/", "__"))
+
+
+def _export(
+    module, tokenizer, input_names: list[str], output_axes: dict, model_path: str
+) -> None:
+    """
+    Exports a torch module taking the tokenizer outputs as positional inputs to ONNX,
+    with dynamic batch and sequence axes.
+
+    Args:
+        module (torch.nn.Module): The module to export.
+        tokenizer (PreTrainedTokenizerBase): The tokenizer producing the module inputs.
+        input_names (list[str]): The names of the module inputs.
+        output_axes (dict): The dynamic axes of the module output.
+        model_path (str): The path of the ONNX file.
+    """
+    import torch
+
+    dummy = tokenizer(
+        ["a dummy text", "a longer dummy text"], padding=True, return_tensors="pt"
+    )
+    dynamic_axes = {input_name: {0: "batch", 1: "seq"} for input_name in input_names}
+    dynamic_axes["output"] = output_axes
+    with torch.inference_mode():
+        torch.onnx.export(
+            module.eval(),
+            tuple(dummy[input_name] for input_name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["output"],
+            dynamic_axes=dynamic_axes,
+            opset_version=OPSET_VERSION,
+        )
+
+
+def _quantize(model_path: str) -> str:
+    """
+    Applies onnxruntime dynamic int8 quantization to an ONNX model, once.
+
+    Args:
+        model_path (str): The path of the fp32 ONNX file.
+
+    Returns:
+        str: The path of the quantized ONNX file.
+    """
+    quantized_path = model_path.replace(".onnx", ".int8.onnx")
+    if not os.path.exists(quantized_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+def _session(model_path: str):
+    """
+    Creates an onnxruntime CPU inference session.
+
+    Args:
+        model_path (str): The path of the ONNX file.
+
+    Returns:
+        onnxruntime.InferenceSession: The session.
+    """
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    # set by the encoding processes of EncoderPool (0: onnxruntime default)
+    options.intra_op_num_threads = int(os.environ.get("OMP_NUM_THREADS", 0))
+    return ort.InferenceSession(
+        model_path, sess_options=options, providers=["CPUExecutionProvider"]
+    )
+
+
+class OnnxSentenceEncoder:
+    def __init__(self, folder: str, quantized: bool = False):
+        """
+        Initializes the OnnxSentenceEncoder instance, a drop-in replacement of the
+        SentenceTransformer.encode method running an exported model with onnxruntime.
+
+        Args:
+            folder (str): The folder of the export (see from_sentence_transformer).
+            quantized (bool): If True, the int8 quantized graph is used.
+        """
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(folder, "meta.json"), "r", encoding="utf-8") as file:
+            meta = json.load(file)
+        self.pooling = meta["pooling"]
+        self.normalize = meta["normalize"]
+        self.max_seq_length = meta["max_seq_length"]
+        self.input_names = meta["input_names"]
+        self.tokenizer = AutoTokenizer.from_pretrained(folder)
+
+        model_path = os.path.join(folder, "model.onnx")
+        self.session = _session(_quantize(model_path) if quantized else model_path)
+
+    @classmethod
+    def from_sentence_transformer(
+        cls, name: str, onnx_dir: str, quantized: bool = False
+    ) -> "OnnxSentenceEncoder":
+        """
+        Exports a SentenceTransformer model to ONNX (only the first time) and loads it.
+        Only models made of a transformer, a mean or CLS pooling and an optional
+        normalization are managed.
+
+        Args:
+            name (str): The name of the SentenceTransformer model.
+            onnx_dir (str): The root folder of the ONNX exports.
+            quantized (bool): If True, the int8 quantized graph is used.
+
+        Returns:
+            OnnxSentenceEncoder: The encoder.
+
+        Raises:
+            ValueError: If the model architecture is not managed.
+        """
+        folder = _model_folder(onnx_dir, name)
+        if not os.path.exists(os.path.join(folder, "meta.json")):
+            import torch
+            from sentence_transformers import SentenceTransformer
+            from sentence_transformers.models import Normalize, Pooling, Transformer
+
+            st = SentenceTransformer(name, device="cpu")
+            modules = list(st)
+            pooling = next((m for m in modules if isinstance(m, Pooling)), None)
+            if (
+                not isinstance(modules[0], Transformer)
+                or pooling is None
+                or pooling.get_pooling_mode_str() not in ("mean", "cls")
+                or any(
+                    not isinstance(m, (Transformer, Pooling, Normalize))
+                    for m in modules
+                )
+            ):
+                raise ValueError(f"ONNX export not managed for model: {name}")
+
+            input_names = [
+                n for n in INPUT_NAMES if n in st.tokenizer.model_input_names
+            ]
+
+            class LastHiddenState(torch.nn.Module):
+                def __init__(self, model):
+                    super().__init__()
+                    self.model = model
+
+                def forward(self, *inputs):
+                    return self.model(
+                        **dict(zip(input_names, inputs))
+                    ).last_hidden_state
+
+            os.makedirs(folder, exist_ok=True)
+            _export(
+                LastHiddenState(modules[0].auto_model),
+                st.tokenizer,
+                input_names,
+                {0: "batch", 1: "seq"},
+                os.path.join(folder, "model.onnx"),
+            )
+            st.tokenizer.save_pretrained(folder)
+            meta = {
+                "pooling": pooling.get_pooling_mode_str(),
+                "normalize": any(isinstance(m, Normalize) for m in modules),
+                "max_seq_length": st.max_seq_length,
+                "input_names": input_names,
+            }
+            with open(os.path.join(folder, "meta.json"), "w", encoding="utf-8") as file:
+                json.dump(meta, file)
+
+        return cls(folder, quantized=quantized)
+
+    def encode(
+        self,
+        sentences: Union[str, list[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        convert_to_numpy: bool = True,
+    ) -> np.ndarray:
+        """
+        Computes the embeddings of one or more sentences, as SentenceTransformer.encode does.
+
+        Args:
+            sentences (Union[str, list[str]]): The sentence(s) to embed.
+            batch_size (int): The number of sentences run in a single inference.
+            show_progress_bar (bool): Unused, kept for compatibility.
+            convert_to_numpy (bool): Unused, the output is always a NumPy array.
+
+        Returns:
+            np.ndarray: The embedding (1-D) of a single sentence, or the matrix of the embeddings.
+        """
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else sentences
+
+        out = []
+        for start in range(0, len(sentences), batch_size):
+            tokens = self.tokenizer(
+                sentences[start : start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            inputs = {n: tokens[n].astype(np.int64) for n in self.input_names}
+            hidden = self.session.run(None, inputs)[0]
+            if self.pooling == "cls":
+                pooled = hidden[:, 0]
+            else:
+                mask = inputs["attention_mask"][..., None].astype(hidden.dtype)
+                pooled = (hidden * mask).sum(axis=1) / np.clip(
+                    mask.sum(axis=1), 1e-9, None
+                )
+            if self.normalize:
+                norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+                pooled = pooled / np.clip(norms, 1e-12, None)
+            out.append(pooled.astype(np.float32))
+
+        embeddings = np.concatenate(out) if out else np.empty((0, 0), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+
+class OnnxSpladeEncoder:
+    def __init__(self, folder: str, quantized: bool = False):
+        """
+        Initializes the OnnxSpladeEncoder instance, running with onnxruntime an exported
+        masked language model whose graph includes the SPLADE max pooling.
+
+        Args:
+            folder (str): The folder of the export (see from_pretrained).
+            quantized (bool): If True, the int8 quantized graph is used.
+        """
+        with open(os.path.join(folder, "meta.json"), "r", encoding="utf-8") as file:
+            self.input_names = json.load(file)["input_names"]
+
+        model_path = os.path.join(folder, "model.onnx")
+        self.session = _session(_quantize(model_path) if quantized else model_path)
+
+    @classmethod
+    def from_pretrained(
+        cls, name: str, onnx_dir: str, quantized: bool = False
+    ) -> "OnnxSpladeEncoder":
+        """
+        Exports a masked language model, followed by the SPLADE pooling, to ONNX
+        (only the first time) and loads it.
+
+        Args:
+            name (str): The name of the masked language model.
+            onnx_dir (str): The root folder of the ONNX exports.
+            quantized (bool): If True, the int8 quantized graph is used.
+
+        Returns:
+            OnnxSpladeEncoder: The encoder.
+        """
+        folder = _model_folder(onnx_dir, name)
+        if not os.path.exists(os.path.join(folder, "meta.json")):
+            import torch
+            from transformers import AutoModelForMaskedLM, AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained(name)
+            model = AutoModelForMaskedLM.from_pretrained(name)
+            input_names = [n for n in INPUT_NAMES if n in tokenizer.model_input_names]
+
+            class SpladePooling(torch.nn.Module):
+                def __init__(self, model):
+                    super().__init__()
+                    self.model = model
+
+                def forward(self, *inputs):
+                    kwargs = dict(zip(input_names, inputs))
+                    logits = self.model(**kwargs).logits
+                    relu_log = torch.log(1 + torch.relu(logits))
+                    weighted_log = relu_log * kwargs["attention_mask"].unsqueeze(-1)
+                    return torch.max(weighted_log, dim=1).values
+
+            os.makedirs(folder, exist_ok=True)
+            _export(
+                SpladePooling(model),
+                tokenizer,
+                input_names,
+                {0: "batch"},
+                os.path.join(folder, "model.onnx"),
+            )
+            with open(os.path.join(folder, "meta.json"), "w", encoding="utf-8") as file:
+                json.dump({"input_names": input_names}, file)
+
+        return cls(folder, quantized=quantized)
+
+    def pool(self, tokens: dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Computes the SPLADE vectors of a batch of tokenized texts.
+
+        Args:
+            tokens (dict[str, np.ndarray]): The tokenizer output, of shape (batch, seq_len).
+
+        Returns:
+            np.ndarray: The pooled vectors, of shape (batch, vocab_size).
+        """
+        inputs = {n: tokens[n].astype(np.int64) for n in self.input_names}
+        return self.session.run(None, inputs)[0]
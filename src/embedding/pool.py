@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+
+def default_n_workers(threads_per_worker: int) -> int:
+    """
+    Returns the number of encoding processes fitting the host: one every
+    threads_per_worker cores.
+
+    Args:
+        threads_per_worker (int): The number of intra-op threads of each process.
+
+    Returns:
+        int: The number of processes.
+    """
+    return max(1, (os.cpu_count() or 1) // threads_per_worker)
+
+
+def _init_worker(threads_per_worker: int) -> None:
+    """
+    Initializes an encoding process: sets its number of intra-op threads and loads the encoders.
+
+    Args:
+        threads_per_worker (int): The number of intra-op threads of the process.
+    """
+    # read by onnxruntime sessions and by torch at import
+    os.environ["OMP_NUM_THREADS"] = str(threads_per_worker)
+    import torch
+
+    torch.set_num_threads(threads_per_worker)
+
+    from embedding.dense import get_encoder
+    from embedding.sparse import get_sparse_model, get_sparse_tokenizer
+
+    get_encoder(), get_sparse_tokenizer(), get_sparse_model()
+
+
+def _encode_shard(texts: list[str]) -> tuple[np.ndarray, list[dict]]:
+    """
+    Computes the dense and sparse vectors of a shard of texts, in a worker process.
+
+    Args:
+        texts (list[str]): The texts of the shard.
+
+    Returns:
+        tuple[np.ndarray, list[dict]]: The dense vectors matrix and the sparse vectors.
+    """
+    from embedding.dense import compute_dense_vectors
+    from embedding.sparse import compute_sparse_vectors
+
+    return compute_dense_vectors(texts), compute_sparse_vectors(texts)
+
+
+class EncoderPool:
+    def __init__(
+        self,
+        n_workers: Optional[int] = None,
+        threads_per_worker: int = 4,
+        min_shard_size: int = 32,
+    ):
+        """
+        Initializes the EncoderPool instance: a pool of processes, each one with its
+        own copy of the encoders, sharing the encoding of lists of chunks.
+
+        Args:
+            n_workers (Optional[int]): The number of processes; if None, one every
+                threads_per_worker cores of the host.
+            threads_per_worker (int): The number of intra-op threads of each process.
+            min_shard_size (int): The minimum number of texts sent to a process at once.
+        """
+        self.n_workers = n_workers or default_n_workers(threads_per_worker)
+        self.min_shard_size = min_shard_size
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads_per_worker,),
+        )
+
+    def encode(self, texts: list[str]) -> tuple[np.ndarray, list[dict]]:
+        """
+        Computes the dense and sparse vectors of a list of texts: the texts are split
+        into contiguous shards encoded by the processes, and the results are merged
+        back in the input order.
+
+        Args:
+            texts (list[str]): The texts to encode.
+
+        Returns:
+            tuple[np.ndarray, list[dict]]: The dense vectors matrix and the sparse vectors,
+                as returned by compute_dense_vectors and compute_sparse_vectors.
+        """
+        n_shards = max(1, min(self.n_workers, len(texts) // self.min_shard_size))
+        bounds = np.linspace(0, len(texts), n_shards + 1).astype(int)
+        shards = [texts[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+        results = list(self.executor.map(_encode_shard, shards))
+        dense_vectors = np.concatenate([dense for dense, _ in results])
+        sparse_vectors = [vector for _, sparse in results for vector in sparse]
+        return dense_vectors, sparse_vectors
+
+    def close(self) -> None:
+        """
+        Shuts the processes down.
+        """
+        self.executor.shutdown()
+
+    def __enter__(self) -> "EncoderPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
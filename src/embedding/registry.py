@@ -0,0 +1,298 @@
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+# (kind, name, device) -> loaded model, shared by the whole process
+_models: dict[tuple[str, str, Optional[str]], Any] = {}
+_lock = threading.RLock()
+
+# 'torch': fp32 eager PyTorch; 'int8': PyTorch with dynamic int8 quantization (cpu);
+# 'onnx' / 'onnx-int8': exported graph (fp32 / dynamic int8) run by onnxruntime (cpu)
+BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+DEFAULT_ONNX_DIR = "./embeddings/onnx"
+
+
+def _resolve_device(device: Optional[str]) -> str:
+    """
+    Resolves the device on which a model is loaded.
+
+    Args:
+        device (Optional[str]): The requested device; if None, cuda is used when available.
+
+    Returns:
+        str: The device name.
+    """
+    if device is not None:
+        return device
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _get_or_load(
+    kind: str, name: str, device: Optional[str], load: Callable[[], Any]
+) -> Any:
+    """
+    Returns the model registered under (kind, name, device), loading it on first use.
+
+    Args:
+        kind (str): The kind of model (e.g. 'sentence-transformer', 'mlm', 'tokenizer').
+        name (str): The name (or local path) of the model.
+        device (Optional[str]): The device of the model, None for device-independent objects.
+        load (Callable[[], Any]): The function loading the model.
+
+    Returns:
+        Any: The loaded model.
+    """
+    key = (kind, name, device)
+    if key not in _models:
+        with _lock:
+            if key not in _models:
+                _models[key] = load()
+    return _models[key]
+
+
+def _check_backend(backend: str, device: Optional[str]) -> str:
+    """
+    Checks the inference backend and returns the device of the model.
+
+    Args:
+        backend (str): The inference backend, one of BACKENDS.
+        device (Optional[str]): The requested device.
+
+    Returns:
+        str: The device of the model ('cpu' for every backend but 'torch').
+
+    Raises:
+        ValueError: If the backend is not managed.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Inference backend not managed: {backend}")
+    return _resolve_device(device) if backend == "torch" else "cpu"
+
+
+def get_sentence_transformer(
+    name: str,
+    device: Optional[str] = None,
+    backend: str = "torch",
+    onnx_dir: str = DEFAULT_ONNX_DIR,
+) -> Any:
+    """
+    Returns the SentenceTransformer model with the given name, loading it on first use.
+
+    Args:
+        name (str): The name (or local path) of the model.
+        device (Optional[str]): The device of the model; if None, cuda is used when available.
+        backend (str): The inference backend, one of BACKENDS.
+        onnx_dir (str): The folder where the models are exported, for the ONNX backends.
+
+    Returns:
+        SentenceTransformer: The model (an OnnxSentenceEncoder, with the same encode
+            method, for the ONNX backends).
+    """
+    device = _check_backend(backend, device)
+
+    def load():
+        if backend.startswith("onnx"):
+            from embedding.onnx_backend import OnnxSentenceEncoder
+
+            return OnnxSentenceEncoder.from_sentence_transformer(
+                name, onnx_dir, quantized=backend == "onnx-int8"
+            )
+
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(name, device=device)
+        if backend == "int8":
+            import torch
+
+            model = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        return model
+
+    return _get_or_load(f"sentence-transformer:{backend}", name, device, load)
+
+
+def get_mlm(
+    name: str,
+    device: Optional[str] = None,
+    backend: str = "torch",
+    onnx_dir: str = DEFAULT_ONNX_DIR,
+) -> Any:
+    """
+    Returns the masked language model with the given name, in eval mode, loading it on first use.
+
+    Args:
+        name (str): The name (or local path) of the model.
+        device (Optional[str]): The device of the model; if None, cuda is used when available.
+        backend (str): The inference backend, one of BACKENDS.
+        onnx_dir (str): The folder where the models are exported, for the ONNX backends.
+
+    Returns:
+        AutoModelForMaskedLM: The model (an OnnxSpladeEncoder, computing the SPLADE
+            vectors directly, for the ONNX backends).
+    """
+    device = _check_backend(backend, device)
+
+    def load():
+        if backend.startswith("onnx"):
+            from embedding.onnx_backend import OnnxSpladeEncoder
+
+            return OnnxSpladeEncoder.from_pretrained(
+                name, onnx_dir, quantized=backend == "onnx-int8"
+            )
+
+        from transformers import AutoModelForMaskedLM
+
+        model = AutoModelForMaskedLM.from_pretrained(name).to(device).eval()
+        if backend == "int8":
+            import torch
+
+            # the MLM decoder is kept in fp32: the SPLADE pooling slices its weights
+            torch.quantization.quantize_dynamic(
+                model.base_model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+            )
+        return model
+
+    return _get_or_load(f"mlm:{backend}", name, device, load)
+
+
+def get_tokenizer(name: str) -> Any:
+    """
+    Returns the tokenizer of the model with the given name, loading it on first use.
+
+    Args:
+        name (str): The name (or local path) of the model; short names are the
+            sentence-transformers ones (see _hub_id).
+
+    Returns:
+        AutoTokenizer: The tokenizer.
+    """
+
+    def load():
+        from transformers import AutoTokenizer
+
+        return AutoTokenizer.from_pretrained(
+            _hub_id(name), clean_up_tokenization_spaces=True
+        )
+
+    return _get_or_load("tokenizer", name, None, load)
+
+
+def warm_up(*loaders: Callable[[], Any]) -> threading.Thread:
+    """
+    Loads models in a background (daemon) thread, so that they are ready
+    by the time they are first needed. A model requested while it is still
+    loading is waited for, not loaded twice.
+
+    Args:
+        *loaders (Callable[[], Any]): The functions returning the models to load.
+
+    Returns:
+        threading.Thread: The started thread.
+    """
+
+    def run():
+        for load in loaders:
+            try:
+                load()
+            except Exception:
+                logging.exception("Model warm up failed")
+
+    thread = threading.Thread(target=run, name="model-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def _hub_id(name: str) -> str:
+    """
+    Returns the Hugging Face hub id of a sentence-transformers model name
+    (short names belong to the sentence-transformers organization).
+
+    Args:
+        name (str): The name of the model.
+
+    Returns:
+        str: The hub id of the model.
+    """
+    return name if "/" in name else f"sentence-transformers/{name}"
+
+
+def _read_model_json(name: str, file_name: str) -> Optional[dict]:
+    """
+    Reads a JSON file of a model, from its local folder or from the hub (cached),
+    without loading the model weights.
+
+    Args:
+        name (str): The name (or local path) of the model.
+        file_name (str): The path of the file, relative to the model root.
+
+    Returns:
+        Optional[dict]: The content of the file, None if the model has no such file.
+    """
+    if os.path.isdir(name):
+        path = os.path.join(name, file_name)
+        if not os.path.exists(path):
+            return None
+    else:
+        from huggingface_hub import hf_hub_download
+        from huggingface_hub.utils import EntryNotFoundError
+
+        try:
+            path = hf_hub_download(repo_id=_hub_id(name), filename=file_name)
+        except EntryNotFoundError:
+            return None
+
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def get_dense_dim(name: str) -> int:
+    """
+    Returns the embedding dimension of a SentenceTransformer model, reading its
+    configuration files only (the weights are not loaded).
+
+    Args:
+        name (str): The name (or local path) of the model.
+
+    Returns:
+        int: The embedding dimension.
+    """
+    for module in reversed(_read_model_json(name, "modules.json") or []):
+        if module["type"].endswith("Dense"):
+            config = _read_model_json(name, f"{module['path']}/config.json")
+            return config["out_features"]
+        if module["type"].endswith("Pooling"):
+            config = _read_model_json(name, f"{module['path']}/config.json")
+            n_modes = sum(
+                value is True
+                for key, value in config.items()
+                if key.startswith("pooling_mode_")
+            )
+            return config["word_embedding_dimension"] * max(1, n_modes)
+
+    from transformers import AutoConfig
+
+    return AutoConfig.from_pretrained(_hub_id(name)).hidden_size
+
+
+@lru_cache(maxsize=None)
+def get_model_revision(name: str) -> str:
+    """
+    Returns the revision (hub commit hash) of a model, reading its configuration only.
+
+    Args:
+        name (str): The name (or local path) of the model.
+
+    Returns:
+        str: The revision of the model, 'local' for models loaded from a local folder.
+    """
+    if os.path.isdir(name):
+        return "local"
+    from transformers import AutoConfig
+
+    return AutoConfig.from_pretrained(_hub_id(name))._commit_hash or "unknown"
@@ -1,21 +1,154 @@
-import torch
-from transformers import AutoModelForMaskedLM, AutoTokenizer
+import os
+from typing import TYPE_CHECKING, Optional, Union
 
+import numpy as np
+
+from embedding.idf import TokenIdf
+from embedding.onnx_backend import OnnxSpladeEncoder
+from embedding.registry import (
+    DEFAULT_ONNX_DIR,
+    get_mlm,
+    get_model_revision,
+    get_tokenizer,
+)
 from utility.read_config import get_config_from_path
 
+if TYPE_CHECKING:
+    # imported where needed, to keep this module fast to import
+    import torch
+    from transformers import PreTrainedModel, PreTrainedTokenizerBase
+
 dct_config = get_config_from_path("config.yaml")
 
-tokenizer = AutoTokenizer.from_pretrained(
-    dct_config["PRE_TRAINED_EMB"]["SPARSE_MODEL_NAME"],
-    clean_up_tokenization_spaces=True,
-)
-model = AutoModelForMaskedLM.from_pretrained(
-    dct_config["PRE_TRAINED_EMB"]["SPARSE_MODEL_NAME"],
-)
+MODEL_NAME = dct_config["PRE_TRAINED_EMB"]["SPARSE_MODEL_NAME"]
+DEVICE = dct_config["PRE_TRAINED_EMB"].get("DEVICE")
+BACKEND = dct_config["PRE_TRAINED_EMB"].get("BACKEND", "torch")
+ONNX_DIR = dct_config["PRE_TRAINED_EMB"].get("ONNX_DIR", DEFAULT_ONNX_DIR)
+MAX_LENGTH = 512
+POOLING_MEMORY_MB = dct_config["PRE_TRAINED_EMB"].get("SPARSE_POOLING_MEMORY_MB")
+QUERY_MODE = dct_config["PRE_TRAINED_EMB"].get("SPARSE_QUERY_MODE", "model")
+IDF_PATH = dct_config["PRE_TRAINED_EMB"].get("SPARSE_IDF_PATH")
+DOC_PRUNING = dct_config["PRE_TRAINED_EMB"].get("SPARSE_DOC_PRUNING") or {}
+QUERY_PRUNING = dct_config["PRE_TRAINED_EMB"].get("SPARSE_QUERY_PRUNING") or {}
+
+# path -> (modification time, weights) of the token idf files already read
+_idf_weights: dict[str, tuple[float, np.ndarray]] = {}
+
+
+def get_sparse_tokenizer() -> "PreTrainedTokenizerBase":
+    """
+    Returns the tokenizer of the sparse model, loaded on first use through the model registry.
+
+    Returns:
+        PreTrainedTokenizerBase: The tokenizer.
+    """
+    return get_tokenizer(MODEL_NAME)
+
+
+def get_sparse_model() -> Union["PreTrainedModel", OnnxSpladeEncoder]:
+    """
+    Returns the sparse (masked language) model, loaded on first use through the model
+    registry, with the configured inference backend.
+
+    Returns:
+        Union[PreTrainedModel, OnnxSpladeEncoder]: The model, in eval mode (or its ONNX export).
+    """
+    return get_mlm(MODEL_NAME, DEVICE, BACKEND, ONNX_DIR)
+
+
+def get_model_id() -> str:
+    """
+    Returns an id of the sparse encoder (name, revision, backend and max length),
+    identifying the vectors it computes (e.g. in the embedding cache).
+
+    Returns:
+        str: The id of the sparse encoder.
+    """
+    revision = get_model_revision(MODEL_NAME)
+    return f"sparse:{MODEL_NAME}@{revision}:{BACKEND}:{MAX_LENGTH}"
+
+
+def __pool_logits(
+    tokens: dict, memory_mb: Optional[float] = POOLING_MEMORY_MB
+) -> "torch.Tensor":
+    """
+    Runs the model (in inference mode) on a batch of tokenized texts and pools
+    the MLM logits into one vocabulary-sized vector per text (SPLADE max pooling).
+
+    Args:
+        tokens (dict): The tokenizer output, as tensors of shape (batch, seq_len).
+        memory_mb (Optional[float]): The peak memory (in MB) allowed for the logits.
+            If None, or if the model has no BERT-like MLM head, the full
+            (batch, seq_len, vocab_size) logits tensor is materialized (as it is
+            always the case with the ONNX backends).
+
+    Returns:
+        torch.Tensor: The pooled vectors (on cpu), of shape (batch, vocab_size).
+    """
+    import torch
+
+    model = get_sparse_model()
+    if isinstance(model, OnnxSpladeEncoder):
+        return torch.from_numpy(
+            model.pool({key: value.numpy() for key, value in tokens.items()})
+        )
+
+    tokens = {key: value.to(model.device) for key, value in tokens.items()}
+    with torch.inference_mode():
+        if memory_mb is not None and hasattr(model, "cls"):
+            return __pool_logits_blockwise(model, tokens, memory_mb).cpu()
+
+        output = model(**tokens)
+        logits, attention_mask = output.logits, tokens["attention_mask"]
+        relu_log = torch.log(1 + torch.relu(logits))
+        weighted_log = relu_log * attention_mask.unsqueeze(-1)
+        max_val, _ = torch.max(weighted_log, dim=1)
+        return max_val.cpu()
+
+
+def __pool_logits_blockwise(
+    model: "PreTrainedModel", tokens: dict, memory_mb: float
+) -> "torch.Tensor":
+    """
+    Same as __pool_logits, but the MLM decoder is applied to slices of the
+    vocabulary, each one pooled before computing the next one: the logits never
+    take more than memory_mb, whatever the batch size and the sequence length.
+    The pooled values are the same as the ones of the full computation.
+
+    Args:
+        model (PreTrainedModel): The masked language model, with a BERT-like MLM head.
+        tokens (dict): The tokenizer output, as tensors of shape (batch, seq_len).
+        memory_mb (float): The peak memory (in MB) allowed for a logits block.
+
+    Returns:
+        torch.Tensor: The pooled vectors, of shape (batch, vocab_size).
+    """
+    import torch
+
+    attention_mask = tokens["attention_mask"]
+    hidden = model.base_model(**tokens).last_hidden_state
+    hidden = model.cls.predictions.transform(hidden)
+    decoder = model.get_output_embeddings()
+
+    batch_size, seq_len = attention_mask.shape
+    vocab_size = decoder.weight.shape[0]
+    column_bytes = batch_size * seq_len * hidden.element_size()
+    block_size = max(1, int(memory_mb * 2**20) // column_bytes)
+
+    mask = attention_mask.unsqueeze(-1)
+    out = hidden.new_empty((batch_size, vocab_size))
+    for start in range(0, vocab_size, block_size):
+        end = min(start + block_size, vocab_size)
+        bias = None if decoder.bias is None else decoder.bias[start:end]
+        logits = torch.nn.functional.linear(hidden, decoder.weight[start:end], bias)
+        # log(1 + relu(x)) * mask, in place to keep a single block in memory
+        weighted_log = logits.relu_().add_(1).log_().mul_(mask)
+        out[:, start:end] = torch.amax(weighted_log, dim=1)
+    return out
 
 
 # TODO: this implementation is just a placeholder, to be modified! watch out for the max len param!
-def __compute_vector(text) -> tuple[torch.Tensor, dict]:
+def __compute_vector(text) -> tuple["torch.Tensor", dict]:
     """
     Computes a vector from the given text using the model and tokenizer.
     Taken from Qdrant documentation: https://qdrant.tech/articles/sparse-vectors/
@@ -28,18 +161,107 @@ def __compute_vector(text) -> tuple[torch.Tensor, dict]:
             - torch.Tensor: The computed vector.
             - dict: The tokens used for the computation.
     """
-    tokens = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-    output = model(**tokens)
-    logits, attention_mask = output.logits, tokens.attention_mask
-    relu_log = torch.log(1 + torch.relu(logits))
-    weighted_log = relu_log * attention_mask.unsqueeze(-1)
-    max_val, _ = torch.max(weighted_log, dim=1)
-    vec = max_val.squeeze()
+    tokens = get_sparse_tokenizer()(
+        text, return_tensors="pt", truncation=True, max_length=MAX_LENGTH
+    )
+    vec = __pool_logits(tokens).squeeze()
 
     return vec, tokens
 
 
-def compute_sparse_vector(query_text: str) -> dict[str, list[float]]:
+def __to_sparse(vec: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Extracts the non-zero entries of a dense vocabulary vector.
+
+    Args:
+        vec (np.ndarray): The vocabulary vector.
+
+    Returns:
+        dict[str, np.ndarray]: The indices (int32) and the values (float32) of the
+            non-zero entries.
+    """
+    indices = np.flatnonzero(vec).astype(np.int32)
+    return {"indices": indices, "values": vec[indices].astype(np.float32, copy=False)}
+
+
+def prune_sparse_vector(
+    vector: dict[str, np.ndarray],
+    top_k: Optional[int] = None,
+    min_weight: Optional[float] = None,
+    quantization_bits: Optional[int] = None,
+) -> dict[str, np.ndarray]:
+    """
+    Prunes a sparse vector: the terms below a weight threshold are dropped, then
+    only the heaviest ones are kept, and their weights are optionally quantized.
+
+    Args:
+        vector (dict[str, np.ndarray]): The sparse vector indices and values.
+        top_k (Optional[int]): The maximum number of terms kept. If None, no limit.
+        min_weight (Optional[float]): The minimum weight of the terms kept. If None,
+            no threshold.
+        quantization_bits (Optional[int]): If set, the weights are rounded to
+            2 ** quantization_bits - 1 uniform levels of the largest one (the
+            precision of a uint8 sparse index with 8 bits); the terms rounded to
+            zero are dropped.
+
+    Returns:
+        dict[str, np.ndarray]: The pruned vector indices (int32, sorted) and values (float32).
+    """
+    indices = np.asarray(vector["indices"], dtype=np.int32)
+    values = np.asarray(vector["values"], dtype=np.float32)
+    if min_weight is not None:
+        keep = values >= min_weight
+        indices, values = indices[keep], values[keep]
+    if top_k is not None and len(values) > top_k:
+        keep = np.sort(np.argpartition(values, -top_k)[-top_k:])
+        indices, values = indices[keep], values[keep]
+    if quantization_bits is not None and len(values) > 0:
+        step = values.max() / (2**quantization_bits - 1)
+        values = (np.round(values / step) * step).astype(np.float32)
+        keep = values > 0
+        indices, values = indices[keep], values[keep]
+    return {"indices": indices, "values": values}
+
+
+def __pruning_kwargs(params: dict) -> dict:
+    """
+    Converts a pruning section of the configuration into prune_sparse_vector arguments.
+
+    Args:
+        params (dict): The TOP_K, MIN_WEIGHT and QUANTIZATION_BITS settings (null to disable).
+
+    Returns:
+        dict: The keyword arguments of prune_sparse_vector.
+    """
+    return {
+        "top_k": params.get("TOP_K"),
+        "min_weight": params.get("MIN_WEIGHT"),
+        "quantization_bits": params.get("QUANTIZATION_BITS"),
+    }
+
+
+def prune_document_vectors(
+    vectors: list[dict[str, np.ndarray]], params: dict = DOC_PRUNING
+) -> list[dict[str, np.ndarray]]:
+    """
+    Prunes the sparse vectors of documents with the configured document pruning
+    (PRE_TRAINED_EMB.SPARSE_DOC_PRUNING). The vectors are returned as they are if
+    no pruning is set.
+
+    Args:
+        vectors (list[dict[str, np.ndarray]]): The sparse vectors of the documents.
+        params (dict): The pruning settings.
+
+    Returns:
+        list[dict[str, np.ndarray]]: The pruned sparse vectors.
+    """
+    kwargs = __pruning_kwargs(params)
+    if all(value is None for value in kwargs.values()):
+        return vectors
+    return [prune_sparse_vector(vector, **kwargs) for vector in vectors]
+
+
+def compute_sparse_vector(query_text: str) -> dict[str, np.ndarray]:
     """
     Computes a sparse vector representation of the query text.
 
@@ -47,9 +269,140 @@ def compute_sparse_vector(query_text: str) -> dict[str, list[float]]:
         query_text (str): The text to be converted into a sparse vector.
 
     Returns:
-        dict: A dictionary containing the sparse vector indices and values.
+        dict[str, np.ndarray]: The sparse vector indices (int32) and values (float32).
     """
     q_vec, q_tokens = __compute_vector(query_text)
-    out = {"indices": q_vec.nonzero().numpy().flatten().tolist()}
-    out["values"] = q_vec.detach().numpy()[out["indices"]].tolist()
+    return __to_sparse(q_vec.numpy())
+
+
+def compute_sparse_vectors(
+    texts: list[str],
+    batch_size: int = 16,
+    memory_mb: Optional[float] = POOLING_MEMORY_MB,
+) -> list[dict[str, np.ndarray]]:
+    """
+    Computes sparse vector representations of a list of texts, in batches.
+
+    The texts are tokenized once, then grouped by token length so that each
+    batch is padded only up to its own longest text. The output follows the
+    order of the input list.
+
+    Args:
+        texts (list[str]): The texts to be converted into sparse vectors.
+        batch_size (int): The number of texts encoded in a single forward pass.
+        memory_mb (Optional[float]): The peak memory (in MB) allowed for the logits
+            of a forward pass. If None, the full logits tensor is materialized.
+
+    Returns:
+        list[dict[str, np.ndarray]]: For each text, the sparse vector indices (int32)
+            and values (float32).
+    """
+    if len(texts) == 0:
+        return []
+
+    tokenizer = get_sparse_tokenizer()
+    encodings = tokenizer(texts, truncation=True, max_length=MAX_LENGTH)
+    lengths = [len(input_ids) for input_ids in encodings["input_ids"]]
+    order = np.argsort(lengths, kind="stable")[::-1]
+
+    out = [None] * len(texts)
+    for start in range(0, len(texts), batch_size):
+        batch_idx = order[start : start + batch_size]
+        tokens = tokenizer.pad(
+            [{key: encodings[key][i] for key in encodings} for i in batch_idx],
+            padding=True,
+            return_tensors="pt",
+        )
+        vecs = __pool_logits(tokens, memory_mb=memory_mb).numpy()
+        for i, vec in zip(batch_idx, vecs):
+            out[i] = __to_sparse(vec)
+
     return out
+
+
+def sparse_vocab_size() -> int:
+    """
+    Returns the size of the vocabulary of the sparse model tokenizer.
+
+    Returns:
+        int: The vocabulary size.
+    """
+    return len(get_sparse_tokenizer())
+
+
+def compute_token_ids(texts: list[str]) -> list[list[int]]:
+    """
+    Tokenizes a list of texts with the sparse model tokenizer, without special tokens.
+
+    Args:
+        texts (list[str]): The texts to tokenize.
+
+    Returns:
+        list[list[int]]: The token ids of each text.
+    """
+    return get_sparse_tokenizer()(
+        texts, add_special_tokens=False, truncation=True, max_length=MAX_LENGTH
+    )["input_ids"]
+
+
+def load_idf_weights(path: str) -> np.ndarray:
+    """
+    Loads the token weights from a TokenIdf file. The weights are cached, and
+    read again only if the file has been modified (e.g. by a new indexing).
+
+    Args:
+        path (str): The path to the TokenIdf .npz file.
+
+    Returns:
+        np.ndarray: The weight of each token of the vocabulary.
+    """
+    mtime = os.path.getmtime(path)
+    if path not in _idf_weights or _idf_weights[path][0] != mtime:
+        _idf_weights[path] = (mtime, TokenIdf.load(path).weights())
+    return _idf_weights[path][1]
+
+
+def compute_sparse_vector_idf(
+    query_text: str, weights: np.ndarray
+) -> dict[str, np.ndarray]:
+    """
+    Computes an inference-free sparse vector of the query text: each token of
+    the query gets its precomputed weight, no model forward pass is run.
+
+    Args:
+        query_text (str): The text to be converted into a sparse vector.
+        weights (np.ndarray): The weight of each token of the vocabulary.
+
+    Returns:
+        dict[str, np.ndarray]: The sparse vector indices (int32) and values (float32).
+    """
+    token_ids = compute_token_ids([query_text])[0]
+    indices = np.unique(np.asarray(token_ids, dtype=np.int32))
+    return {"indices": indices, "values": weights[indices].astype(np.float32)}
+
+
+def compute_sparse_query_vector(
+    query_text: str, mode: str = QUERY_MODE
+) -> dict[str, np.ndarray]:
+    """
+    Computes the sparse vector of a query, in the configured query mode, pruned
+    with the configured query pruning (PRE_TRAINED_EMB.SPARSE_QUERY_PRUNING).
+
+    Args:
+        query_text (str): The text to be converted into a sparse vector.
+        mode (str): 'model' to run the SPLADE model on the query, 'idf' to weight
+            the query tokens by the idf statistics gathered at indexing time.
+
+    Returns:
+        dict[str, np.ndarray]: The sparse vector indices (int32) and values (float32).
+
+    Raises:
+        ValueError: If the mode is not managed.
+    """
+    if mode == "model":
+        vector = compute_sparse_vector(query_text)
+    elif mode == "idf":
+        vector = compute_sparse_vector_idf(query_text, load_idf_weights(IDF_PATH))
+    else:
+        raise ValueError(f"Sparse query mode not managed: {mode}")
+    return prune_sparse_vector(vector, **__pruning_kwargs(QUERY_PRUNING))
@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+from logging import getLogger
+from typing import Optional
+
+logger = getLogger("ingestion")
+
+
+class IngestionJournal:
+    def __init__(self, path: str):
+        """
+        Initializes the IngestionJournal instance: an append-only (JSON lines) record
+        of the progress of an ingestion run, i.e. the planned and the completed
+        downloads, the upserted batches of chunks and the indexed documents. Each
+        record is flushed to disk when written, so that an interrupted run can be
+        resumed from its last record. The journal of the last run is read, if any.
+
+        Args:
+            path (str): The path of the journal file.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        self._apply(json.loads(line))
+                    except json.JSONDecodeError:
+                        # the last record of a crashed run may be truncated
+                        break
+
+    def _reset(self) -> None:
+        self.keyword: Optional[str] = None
+        self.urls_and_filenames: Optional[list[tuple[str, str]]] = None
+        self.downloaded: set[str] = set()
+        self.upserted: set[str] = set()
+        self.indexed: set[str] = set()
+        self.finished = False
+
+    def _apply(self, record: dict) -> None:
+        event = record["event"]
+        if event == "start":
+            self._reset()
+            self.keyword = record["keyword"]
+        elif event == "planned":
+            self.urls_and_filenames = [tuple(pair) for pair in record["downloads"]]
+        elif event == "downloaded":
+            self.downloaded.add(record["filename"])
+        elif event == "upserted":
+            self.upserted.update(record["ids"])
+        elif event == "indexed":
+            self.indexed.add(record["doc_id"])
+        elif event == "finished":
+            self.finished = True
+
+    def _append(self, record: dict) -> None:
+        with self._lock:
+            self._apply(record)
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(record) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+
+    def can_resume(self, keyword: str) -> bool:
+        """
+        Checks whether the last run, of the same keyword, was interrupted.
+
+        Args:
+            keyword (str): The keyword of the new run.
+
+        Returns:
+            bool: True if the last run can be resumed.
+        """
+        return self.keyword == keyword and not self.finished
+
+    def start(self, keyword: str) -> None:
+        """
+        Starts the journal of a new run, discarding the one of the last run.
+
+        Args:
+            keyword (str): The keyword of the run.
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            open(self.path, "w").close()
+        self._append({"event": "start", "keyword": keyword})
+
+    def record_planned(self, urls_and_filenames: list[tuple[str, str]]) -> None:
+        """
+        Records the pages to download (so that a resumed run does not query arXiv again).
+
+        Args:
+            urls_and_filenames (list[tuple[str, str]]): The URLs of the pages, each
+                with the name of the file to save it as.
+        """
+        self._append({"event": "planned", "downloads": urls_and_filenames})
+
+    def record_download(self, filename: str) -> None:
+        """
+        Records a completed download.
+
+        Args:
+            filename (str): The name of the downloaded file.
+        """
+        self._append({"event": "downloaded", "filename": filename})
+
+    def record_batch(self, ids: list[str]) -> None:
+        """
+        Records a batch of chunks upserted in the vector database.
+
+        Args:
+            ids (list[str]): The point ids of the chunks.
+        """
+        self._append({"event": "upserted", "ids": ids})
+
+    def record_document(self, doc_id: str) -> None:
+        """
+        Records a document whose chunks are all upserted.
+
+        Args:
+            doc_id (str): The id of the document.
+        """
+        self._append({"event": "indexed", "doc_id": doc_id})
+
+    def finish(self) -> None:
+        """
+        Records the end of the run: it is no longer resumable.
+        """
+        self._append({"event": "finished"})
@@ -0,0 +1,138 @@
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD_RE = re.compile(r"\w+")
+
+
+def _lsh_bands(num_perm: int, threshold: float) -> tuple[int, int]:
+    """
+    Chooses the number of bands and of rows per band of the LSH index, so that the
+    similarity at which two texts become candidates, (1 / bands) ** (1 / rows), is
+    just below the threshold.
+
+    Args:
+        num_perm (int): The number of hash functions of the signatures.
+        threshold (float): The Jaccard similarity threshold.
+
+    Returns:
+        tuple[int, int]: The number of bands and of rows per band.
+    """
+    options = [
+        (num_perm // rows, rows)
+        for rows in range(1, num_perm + 1)
+        if num_perm % rows == 0
+    ]
+    below = [
+        (bands, rows)
+        for bands, rows in options
+        if (1 / bands) ** (1 / rows) <= threshold
+    ]
+    return max(below or options[:1], key=lambda br: (1 / br[0]) ** (1 / br[1]))
+
+
+class NearDuplicateFilter:
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        num_perm: int = 128,
+        shingle_size: int = 5,
+        seed: int = 0,
+    ):
+        """
+        Initializes the NearDuplicateFilter instance: it detects the texts whose word
+        shingles have a Jaccard similarity with a text already seen above a threshold,
+        estimated with MinHash signatures indexed by locality sensitive hashing.
+
+        Args:
+            threshold (float): The Jaccard similarity above which a text is a near-duplicate.
+            num_perm (int): The number of hash functions of the MinHash signatures.
+            shingle_size (int): The number of words of the shingles.
+            seed (int): The seed of the hash functions.
+        """
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rnd = np.random.default_rng(seed)
+        self._a = rnd.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rnd.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.n_bands, self.n_rows = _lsh_bands(num_perm, threshold)
+        self._buckets = [defaultdict(list) for _ in range(self.n_bands)]
+        self._signatures: list[np.ndarray] = []
+        self.n_seen = 0
+        self.n_duplicates = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Computes the MinHash signature of the word shingles of a text.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            np.ndarray: The signature (num_perm uint64 values).
+        """
+        words = _WORD_RE.findall(text.lower())
+        n_shingles = max(len(words) - self.shingle_size + 1, 1)
+        hashes = np.fromiter(
+            (
+                zlib.crc32(" ".join(words[i : i + self.shingle_size]).encode("utf-8"))
+                for i in range(n_shingles)
+            ),
+            dtype=np.uint64,
+            count=n_shingles,
+        )
+        # universal hashing (a * x + b) mod p, the multiplication wrapping around as in datasketch
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        return [
+            signature[band * self.n_rows : (band + 1) * self.n_rows].tobytes()
+            for band in range(self.n_bands)
+        ]
+
+    def _insert(self, signature: np.ndarray, keys: list[bytes]) -> None:
+        for bucket, key in zip(self._buckets, keys):
+            bucket[key].append(len(self._signatures))
+        self._signatures.append(signature)
+
+    def add(self, text: str) -> None:
+        """
+        Adds a text to the filter (e.g. an already indexed one), without checking it.
+
+        Args:
+            text (str): The text.
+        """
+        signature = self.signature(text)
+        self._insert(signature, self._band_keys(signature))
+
+    def is_duplicate(self, text: str) -> bool:
+        """
+        Checks whether a text is a near-duplicate of a text already added to the
+        filter; if not, the text is added, so that its near-duplicates are detected.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            bool: True if the text is a near-duplicate.
+        """
+        self.n_seen += 1
+        signature = self.signature(text)
+        keys = self._band_keys(signature)
+        candidates = {
+            i for bucket, key in zip(self._buckets, keys) for i in bucket.get(key, ())
+        }
+        for i in candidates:
+            if np.mean(self._signatures[i] == signature) >= self.threshold:
+                self.n_duplicates += 1
+                return True
+
+        self._insert(signature, keys)
+        return False
@@ -1,8 +1,17 @@
+import gzip
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
+from typing import Optional
+from urllib.parse import urlparse
 
-import arxiv
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ingestion.checkpoint import IngestionJournal
 
 logger = getLogger("ingestion")
 
@@ -19,6 +28,23 @@ def list_arxiv_links(keyword: str, max_results: int = 10) -> list[str]:
     Returns:
         List[str]: A list of paper links from arXiv.
     """
+    return [paper["entry_id"] for paper in list_arxiv_papers(keyword, max_results)]
+
+
+def list_arxiv_papers(keyword: str, max_results: int = 10) -> list[dict]:
+    """
+    Lists papers from arXiv based on a keyword.
+
+    Args:
+        keyword (str): The keyword to search for in arXiv.
+        max_results (int): The maximum number of results to return.
+
+    Returns:
+        list[dict]: For each paper, its link ('entry_id'), its 'title' and its
+            'published' date (ISO 8601).
+    """
+    import arxiv
+
     # Create a client for searching arXiv
     client = arxiv.Client()
 
@@ -26,50 +52,268 @@ def list_arxiv_links(keyword: str, max_results: int = 10) -> list[str]:
     search = arxiv.Search(
         query=keyword, max_results=max_results, sort_by=arxiv.SortCriterion.Relevance
     )
-    # List the paper links
-    paper_links = []
+    # List the papers
+    papers = []
     logger.info("Query results:")
     for i, result in enumerate(client.results(search)):
-        paper_links.append(result.entry_id)
+        papers.append(
+            {
+                "entry_id": result.entry_id,
+                "title": result.title,
+                "published": result.published.isoformat(),
+            }
+        )
         logger.info(f"{i}. Title: {result.title[:20]}, Link: {result.entry_id}")
 
-    return paper_links
+    return papers
+
+
+def create_session(pool_size: int = 8, max_retries: int = 3) -> requests.Session:
+    """
+    Creates an HTTP session with a connection pool and retries with exponential
+    backoff on connection errors and on 429/5xx responses.
+
+    Args:
+        pool_size (int): The maximum number of connections kept open per host.
+        max_retries (int): The maximum number of retries of a request.
+
+    Returns:
+        requests.Session: The session.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _meta_path(file_path: str) -> str:
+    """
+    Returns the path of the metadata file of a downloaded page.
+
+    Args:
+        file_path (str): The path of the page (without the optional .gz extension).
+
+    Returns:
+        str: The path of the metadata file.
+    """
+    return os.path.splitext(file_path)[0] + ".meta.json"
+
+
+def _read_meta(file_path: str) -> dict:
+    """
+    Reads the metadata of a downloaded page (source url and HTTP validators, and
+    the arXiv metadata of the paper).
+
+    Args:
+        file_path (str): The path of the page (without the optional .gz extension).
+
+    Returns:
+        dict: The metadata, empty if the page has none.
+    """
+    meta_path = _meta_path(file_path)
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _write_meta(file_path: str, meta: dict) -> None:
+    """
+    Writes the metadata of a downloaded page.
+
+    Args:
+        file_path (str): The path of the page (without the optional .gz extension).
+        meta (dict): The metadata.
+    """
+    with open(_meta_path(file_path), "w", encoding="utf-8") as file:
+        json.dump(meta, file)
+
+
+def read_page_meta(html_file_path: str) -> dict:
+    """
+    Reads the metadata of a downloaded page: its source 'url', the 'title' and
+    'published' date of the paper, and the search 'keywords' it was downloaded for.
+
+    Args:
+        html_file_path (str): The path of the page (with the optional .gz extension).
+
+    Returns:
+        dict: The metadata, empty if the page has none.
+    """
+    if html_file_path.endswith(".gz"):
+        html_file_path = html_file_path[: -len(".gz")]
+    return _read_meta(html_file_path)
+
+
+def _record_paper_meta(file_path: str, paper: dict, keyword: str) -> None:
+    """
+    Adds the arXiv metadata of a paper to the metadata of its page (written before
+    the download, so that a resumed download has it).
+
+    Args:
+        file_path (str): The path of the page (without the optional .gz extension).
+        paper (dict): The paper (see list_arxiv_papers).
+        keyword (str): The search keyword the paper was found for.
+    """
+    meta = _read_meta(file_path)
+    meta.update({"title": paper["title"], "published": paper["published"]})
+    meta.setdefault("keywords", [])
+    if keyword not in meta["keywords"]:
+        meta["keywords"].append(keyword)
+    _write_meta(file_path, meta)
 
 
 # Function to download HTML from a website and save it to a folder
 def download_html_from_url(
-    url: str, save_dir: str, filename: str = "downloaded_page.html"
-) -> None:
+    url: str,
+    save_dir: str,
+    filename: str = "downloaded_page.html",
+    session: Optional[requests.Session] = None,
+    timeout: float = 30,
+    compress: bool = False,
+) -> bool:
     """
     Downloads HTML from a given URL and saves it to a specified directory.
+    If the page was already downloaded, the request is conditional (ETag /
+    Last-Modified): an unchanged page is not transferred again.
 
     Args:
         url (str): The URL of the webpage to download.
         save_dir (str): The directory where the HTML file will be saved.
         filename (str): The name of the file to save the HTML content as.
+        session (Optional[requests.Session]): The HTTP session; if None, a new one is created.
+        timeout (float): The timeout (in seconds) of the request.
+        compress (bool): If True, the page is saved gzip-compressed (with a .gz extension).
+
+    Returns:
+        bool: True if the page is available on disk after the call.
     """
+    session = session or create_session()
+    file_path = os.path.join(save_dir, filename)
+    stored_paths = [file_path, file_path + ".gz"]
+    is_stored = any(os.path.exists(path) for path in stored_paths)
+
+    headers = {}
+    meta = _read_meta(file_path) if is_stored else {}
+    if meta.get("url") == url:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
     # Fetch the webpage
-    response = requests.get(url)
+    try:
+        response = session.get(url, headers=headers, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to download the webpage {url}: {e}")
+        return is_stored
+
+    if response.status_code == 304:
+        logger.info(f"File {filename} not modified.")
+        return True
 
     # Check if the request was successful
     if response.status_code == 200:
         logger.info(f"Saving documents in directory: {save_dir}")
 
-        # Save the HTML content to the specified folder
-        file_path = os.path.join(save_dir, filename)
+        for path in stored_paths:
+            if os.path.exists(path):
+                os.remove(path)
 
-        if os.path.exists(file_path):
-            logger.info(f"File {filename} already exists.")
+        # Save the HTML content to the specified folder
+        if compress:
+            with gzip.open(file_path + ".gz", "wt", encoding="utf-8") as file:
+                file.write(response.text)
         else:
             with open(file_path, "w", encoding="utf-8") as file:
                 file.write(response.text)
-
-            logger.info(f"Downloaded and saved: {filename}")
-    else:
-        logger.error(
-            f"Failed to download the webpage. Status code: {response.status_code}"
+        _write_meta(
+            file_path,
+            {
+                **_read_meta(file_path),
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            },
         )
 
+        logger.info(f"Downloaded and saved: {filename}")
+        return True
+
+    logger.error(
+        f"Failed to download the webpage {url}. Status code: {response.status_code}"
+    )
+    return is_stored
+
+
+def download_html_pages(
+    urls_and_filenames: list[tuple[str, str]],
+    save_dir: str,
+    n_workers: int = 8,
+    max_per_host: int = 4,
+    max_retries: int = 3,
+    timeout: float = 30,
+    compress: bool = False,
+    journal: Optional[IngestionJournal] = None,
+) -> list[bool]:
+    """
+    Downloads several HTML pages concurrently, sharing a connection pool, with at
+    most max_per_host requests in flight to the same host.
+
+    Args:
+        urls_and_filenames (list[tuple[str, str]]): The URLs of the pages, each with
+            the name of the file to save it as.
+        save_dir (str): The directory where the HTML files will be saved.
+        n_workers (int): The maximum number of concurrent downloads.
+        max_per_host (int): The maximum number of concurrent downloads from one host.
+        max_retries (int): The maximum number of retries of a request.
+        timeout (float): The timeout (in seconds) of a request.
+        compress (bool): If True, the pages are saved gzip-compressed.
+        journal (Optional[IngestionJournal]): If set, the journal of the ingestion run:
+            the pages it records as downloaded are skipped, the others recorded once
+            downloaded.
+
+    Returns:
+        list[bool]: For each page, True if it is available on disk.
+    """
+    session = create_session(pool_size=max(n_workers, 1), max_retries=max_retries)
+    host_slots: dict[str, threading.Semaphore] = {}
+    lock = threading.Lock()
+
+    def download(url_and_filename: tuple[str, str]) -> bool:
+        url, filename = url_and_filename
+        if journal is not None and filename in journal.downloaded:
+            logger.info(f"Download skipped (already done): {filename}")
+            return True
+        host = urlparse(url).netloc
+        with lock:
+            slot = host_slots.setdefault(host, threading.Semaphore(max_per_host))
+        with slot:
+            is_stored = download_html_from_url(
+                url,
+                save_dir,
+                filename=filename,
+                session=session,
+                timeout=timeout,
+                compress=compress,
+            )
+        if is_stored and journal is not None:
+            journal.record_download(filename)
+        return is_stored
+
+    with session, ThreadPoolExecutor(max_workers=max(n_workers, 1)) as executor:
+        return list(executor.map(download, urls_and_filenames))
+
 
 def remove_files_by_extension(directory: str, extension: str) -> None:
     """
@@ -86,8 +330,32 @@ def remove_files_by_extension(directory: str, extension: str) -> None:
             logger.info(f"Removed file: {file_path}")
 
 
+def get_download_params(dct_config: dict) -> dict:
+    """
+    Reads from the configuration the optional parameters of main_html_download.
+
+    Args:
+        dct_config (dict): The parsed configuration.
+
+    Returns:
+        dict: The keyword arguments to pass to main_html_download.
+    """
+    return {
+        "n_workers": dct_config["INPUT_DATA"]["DOWNLOAD_WORKERS"],
+        "max_per_host": dct_config["INPUT_DATA"]["DOWNLOAD_MAX_PER_HOST"],
+        "max_retries": dct_config["INPUT_DATA"]["DOWNLOAD_MAX_RETRIES"],
+        "timeout": dct_config["INPUT_DATA"]["DOWNLOAD_TIMEOUT"],
+        "compress": dct_config["INPUT_DATA"]["DOWNLOAD_COMPRESS"],
+    }
+
+
 def main_html_download(
-    keyword: str, output_dir: str, is_fresh_start: bool, n_max_docs: int
+    keyword: str,
+    output_dir: str,
+    is_fresh_start: bool,
+    n_max_docs: int,
+    journal: Optional[IngestionJournal] = None,
+    **download_kwargs,
 ) -> None:
     """
     Downloads HTML pages from arXiv based on a search keyword.
@@ -97,23 +365,38 @@ def main_html_download(
         output_dir (str): The directory where HTML files will be saved.
         is_fresh_start (bool): Indicates whether to remove pre-existing HTML files.
         n_max_docs (int): The maximum number of documents to download.
+        journal (Optional[IngestionJournal]): If set, the journal of the ingestion run:
+            when resuming, the pages it plans are downloaded (without querying arXiv
+            again) but the ones already downloaded.
+        **download_kwargs: Optional parameters of download_html_pages (see get_download_params).
     """
-    # Call the function and list paper links
-    arxiv_links = list_arxiv_links(keyword, max_results=n_max_docs)
-
     # Create the save directory if it doesn't exist
     logger.info(f"Output directory for html files: {output_dir}")
     os.makedirs(output_dir, exist_ok=True)
     if is_fresh_start:
-        remove_files_by_extension(output_dir, extension=".html")
-
-    # URL of the website to download
-    for url in arxiv_links:
-        url_html = url.replace("//arxiv.org", "//ar5iv.org")
-        # Call the function to download the HTML
-        download_html_from_url(
-            url_html, output_dir, filename=url.split("/")[-1] + ".html"
-        )
+        for extension in (".html", ".html.gz", ".meta.json"):
+            remove_files_by_extension(output_dir, extension=extension)
+
+    if journal is not None and journal.urls_and_filenames is not None:
+        urls_and_filenames = journal.urls_and_filenames
+    else:
+        # Call the function and list papers
+        papers = list_arxiv_papers(keyword, max_results=n_max_docs)
+
+        # URLs of the website to download
+        urls_and_filenames = []
+        for paper in papers:
+            url = paper["entry_id"]
+            filename = url.split("/")[-1] + ".html"
+            urls_and_filenames.append(
+                (url.replace("//arxiv.org", "//ar5iv.org"), filename)
+            )
+            _record_paper_meta(os.path.join(output_dir, filename), paper, keyword)
+        if journal is not None:
+            journal.record_planned(urls_and_filenames)
+    download_html_pages(
+        urls_and_filenames, output_dir, journal=journal, **download_kwargs
+    )
 
 
 if __name__ == "__main__":
@@ -133,4 +416,5 @@ if __name__ == "__main__":
         output_dir=project_save_dir,
         is_fresh_start=fresh_start_dwnld,
         n_max_docs=n_max_docs,
+        **get_download_params(dct_config),
     )
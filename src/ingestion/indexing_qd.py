@@ -1,79 +1,706 @@
 import os
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from functools import partial
 from logging import getLogger
+from typing import Callable, Iterator, Optional
 
-from qdrant_client import models
+import numpy as np
 
-from embedding.dense import compute_dense_vector
-from embedding.sparse import compute_sparse_vector
-from ingestion.utils import chunk_text, convert_html_to_markdown
+from embedding.cache import EmbeddingCache
+from embedding.dense import compute_dense_vectors, get_dense_tokenizer
+from embedding.dense import get_model_id as get_dense_model_id
+from embedding.idf import TokenIdf
+from embedding.pool import EncoderPool, default_n_workers
+from embedding.sparse import compute_sparse_vectors, compute_token_ids
+from embedding.sparse import get_model_id as get_sparse_model_id
+from embedding.sparse import prune_document_vectors, sparse_vocab_size
+from ingestion.checkpoint import IngestionJournal
+from ingestion.dedup import NearDuplicateFilter
+from ingestion.download_html import read_page_meta
+from ingestion.manifest import IndexManifest, chunk_hash, chunk_point_id, file_hash
+from ingestion.pipeline import Pipeline
+from ingestion.utils import (
+    HTML_CONVERTERS,
+    TextChunk,
+    chunk_text,
+    chunk_text_by_tokens,
+    get_doc_id,
+    is_html_file,
+)
 from ingestion.vdb_wrapper import LoadInVdb
+from utility.doc_store import DocStore, get_doc_store_params, open_doc_store
 
 logger = getLogger("ingestion")
 
+# the ATX headings of the converted texts (see HTML_CONVERTERS)
+_HEADING = re.compile(r"^#{1,6} +(.+?)\s*$", re.MULTILINE)
+
+
+def get_indexing_params(dct_config: dict) -> dict:
+    """
+    Reads from the configuration the optional parameters of main_indexing.
+
+    Args:
+        dct_config (dict): The parsed configuration.
+
+    Returns:
+        dict: The keyword arguments to pass to main_indexing.
+    """
+    return {
+        "idf_path": dct_config["PRE_TRAINED_EMB"]["SPARSE_IDF_PATH"],
+        "n_workers": dct_config["INDEXING"]["N_WORKERS"],
+        "threads_per_worker": dct_config["INDEXING"]["THREADS_PER_WORKER"],
+        "cache_path": dct_config["INDEXING"]["CACHE_PATH"],
+        "cache_max_size_mb": dct_config["INDEXING"]["CACHE_MAX_SIZE_MB"],
+        "batch_size": dct_config["INDEXING"]["BATCH_SIZE"],
+        "queue_size": dct_config["INDEXING"]["QUEUE_SIZE"],
+        "html_converter": dct_config["INDEXING"]["HTML_CONVERTER"],
+        "chunker": dct_config["INDEXING"]["CHUNKER"],
+        "chunk_max_tokens": dct_config["INDEXING"]["CHUNK_MAX_TOKENS"],
+        "chunk_overlap_tokens": dct_config["INDEXING"]["CHUNK_OVERLAP_TOKENS"],
+        "dedup_threshold": dct_config["INDEXING"]["DEDUP_THRESHOLD"],
+        "manifest_path": (
+            dct_config["VECTOR_DB"]["MANIFEST_PATH"]
+            if dct_config["VECTOR_DB"]["INCREMENTAL"]
+            else None
+        ),
+        **get_doc_store_params(dct_config),
+    }
+
+
+def split_in_chunks(
+    text: str,
+    chunker: str = "tokens",
+    chunk_max_tokens: int = 254,
+    chunk_overlap_tokens: int = 32,
+) -> list[TextChunk]:
+    """
+    Splits a text in chunks, with their position in the text.
+
+    Args:
+        text (str): The text to be chunked.
+        chunker (str): 'tokens' (chunks sized in tokens of the dense encoder tokenizer,
+            see chunk_text_by_tokens) or 'sentences' (NLTK sentences, up to 300 chars).
+        chunk_max_tokens (int): The maximum number of tokens per chunk ('tokens' only).
+        chunk_overlap_tokens (int): The tokens shared by consecutive chunks ('tokens' only).
+
+    Raises:
+        ValueError: If the chunker is unknown.
+
+    Returns:
+        list[TextChunk]: The chunks.
+    """
+    if chunker == "tokens":
+        return chunk_text_by_tokens(
+            text, get_dense_tokenizer(), chunk_max_tokens, chunk_overlap_tokens
+        )
+    if chunker == "sentences":
+        return _locate_chunks(text, chunk_text(text))
+    raise ValueError(f"Unknown chunker: {chunker} (expected 'tokens' or 'sentences')")
+
+
+def _locate_chunks(text: str, chunks: list[str]) -> list[TextChunk]:
+    """
+    Finds the position of the sentence chunks in the text. They follow each other
+    in the text but their sentences are re-joined with single spaces, so only their
+    beginning is searched, after the previous chunk (the end is approximate).
+
+    Args:
+        text (str): The text.
+        chunks (list[str]): The chunks of the text, in order.
+
+    Returns:
+        list[TextChunk]: The chunks, with their (estimated) position.
+    """
+    out, position = [], 0
+    for i, chunk in enumerate(chunks):
+        start = text.find(chunk[:20], position + (i > 0))
+        position = position if start < 0 else start
+        out.append(TextChunk(chunk, position, position + len(chunk)))
+    return out
+
+
+def chunk_payloads(
+    doc_id: str, text: str, chunks: list[TextChunk], meta: Optional[dict] = None
+) -> list[dict]:
+    """
+    Builds the payloads of the chunks of a document (see retrieval.filters): the
+    document metadata ('source_id', 'title', 'published' date and search 'keywords')
+    and the position of each chunk ('chunk_index') with the heading of the section
+    it starts in ('section').
+
+    Args:
+        doc_id (str): The id of the document.
+        text (str): The text of the document.
+        chunks (list[TextChunk]): The chunks of the text, with their position.
+        meta (Optional[dict]): The metadata of the downloaded page (see read_page_meta).
+
+    Returns:
+        list[dict]: The payloads, without the fields whose value is unknown.
+    """
+    meta = meta or {}
+    doc_payload = {
+        "source_id": doc_id,
+        "title": meta.get("title"),
+        "published": meta.get("published"),
+        "keywords": meta.get("keywords"),
+    }
+    headings = list(_HEADING.finditer(text))
+    heading_starts = [heading.start() for heading in headings]
+
+    payloads = []
+    for i, chunk in enumerate(chunks):
+        n_headings = bisect_right(heading_starts, chunk.start)
+        section = headings[n_headings - 1].group(1) if n_headings > 0 else None
+        payload = {**doc_payload, "section": section, "chunk_index": i}
+        payloads.append({k: v for k, v in payload.items() if v is not None})
+    return payloads
+
+
+def encode_chunks(
+    chunks: list[str],
+    encoder_pool: Optional[EncoderPool] = None,
+    cache: Optional[EmbeddingCache] = None,
+) -> tuple[np.ndarray, list[dict]]:
+    """
+    Computes the dense and sparse vectors of a list of chunks.
+
+    Args:
+        chunks (list[str]): The chunks to encode.
+        encoder_pool (Optional[EncoderPool]): If set, the pool of processes sharing
+            the encoding; otherwise the chunks are encoded in the current process.
+        cache (Optional[EmbeddingCache]): If set, the cache of the vectors: only the
+            chunks missing from it are encoded, and their vectors are added to it.
+
+    Returns:
+        tuple[np.ndarray, list[dict]]: The dense vectors matrix and the sparse vectors.
+    """
+    if cache is None:
+        if encoder_pool is not None:
+            return encoder_pool.encode(chunks)
+        return compute_dense_vectors(chunks), compute_sparse_vectors(chunks)
+
+    dense_id, sparse_id = get_dense_model_id(), get_sparse_model_id()
+    dense_vectors = cache.get_dense(dense_id, chunks)
+    sparse_vectors = cache.get_sparse(sparse_id, chunks)
+    missing = [
+        i
+        for i, (de, sp) in enumerate(zip(dense_vectors, sparse_vectors))
+        if de is None or sp is None
+    ]
+    if len(missing) > 0:
+        missing_chunks = [chunks[i] for i in missing]
+        new_dense, new_sparse = encode_chunks(missing_chunks, encoder_pool)
+        cache.put_dense(dense_id, missing_chunks, new_dense)
+        cache.put_sparse(sparse_id, missing_chunks, new_sparse)
+        for i, de, sp in zip(missing, new_dense, new_sparse):
+            dense_vectors[i], sparse_vectors[i] = de, sp
+
+    return np.stack(dense_vectors).astype(np.float32, copy=False), sparse_vectors
+
 
 def main_indexing(
-    loader: LoadInVdb, is_fresh_start: bool, html_folder_path: str
+    loader: LoadInVdb,
+    is_fresh_start: bool,
+    html_folder_path: str,
+    idf_path: Optional[str] = None,
+    n_workers: Optional[int] = 1,
+    threads_per_worker: int = 4,
+    cache_path: Optional[str] = None,
+    cache_max_size_mb: float = 1024,
+    manifest_path: Optional[str] = None,
+    batch_size: int = 256,
+    queue_size: int = 4,
+    html_converter: str = "text",
+    chunker: str = "tokens",
+    chunk_max_tokens: int = 254,
+    chunk_overlap_tokens: int = 32,
+    dedup_threshold: Optional[float] = None,
+    journal: Optional[IngestionJournal] = None,
+    doc_store_path: Optional[str] = None,
+    doc_store_compression: bool = False,
 ) -> None:
     """
     Indexes HTML files by converting them to markdown and adding the resulting chunks to the vector database.
+    The files are processed by a streaming pipeline (read -> parse and chunk -> batch
+    -> encode -> upsert), whose stages run concurrently with a bounded memory.
 
     Args:
         loader (LoadInVdb): The LoadInVdb instance used to load data into the vector database.
         is_fresh_start (bool): Indicates whether to start fresh with a new collection.
         html_folder_path (str): The path to the folder containing HTML files to be indexed.
+        idf_path (Optional[str]): If set, the path where the token idf statistics of the
+            indexed chunks are saved (used by the inference-free sparse query mode).
+        n_workers (Optional[int]): The number of processes encoding the chunks; if 1,
+            the chunks are encoded in the current process; if None, one process every
+            threads_per_worker cores is used.
+        threads_per_worker (int): The number of intra-op threads of each encoding process.
+        cache_path (Optional[str]): If set, the path of the embedding cache: the vectors
+            of chunks already encoded (in this or in previous runs) are not recomputed.
+        cache_max_size_mb (float): The maximum size (in MB) of the embedding cache.
+        manifest_path (Optional[str]): If set, the path of the manifest of the indexed
+            docs: the indexing is incremental, i.e. unchanged files are skipped, only new
+            or changed chunks are encoded and added, and the chunks no longer present
+            (in changed or removed files) are deleted. The token idf statistics are
+            not decremented for the deleted chunks, so they are approximate.
+        batch_size (int): The number of chunks encoded and upserted together.
+        queue_size (int): The maximum number of items (files or batches) waiting
+            between two stages of the pipeline.
+        html_converter (str): The conversion of the HTML files before chunking:
+            'text' (single-pass text extraction) or 'markdown' (markdownify).
+        chunker (str): The chunking of the texts: 'tokens' or 'sentences' (see split_in_chunks).
+        chunk_max_tokens (int): The maximum number of tokens per chunk ('tokens' only).
+        chunk_overlap_tokens (int): The tokens shared by consecutive chunks ('tokens' only).
+        dedup_threshold (Optional[float]): If set, the chunks whose (MinHash estimated)
+            Jaccard similarity with a chunk already seen in this run is above this
+            threshold are dropped before encoding. Ignored by the incremental indexing
+            (manifest_path): a dropped chunk is not recorded in the manifest, so its
+            document, then skipped as unchanged, would lose its content once the
+            original chunk is edited or deleted.
+        journal (Optional[IngestionJournal]): If set, the journal of the ingestion run:
+            the documents and chunks it records as indexed are skipped, and the
+            upserted batches and indexed documents are recorded (the token idf
+            statistics are then saved with each upserted batch).
+        doc_store_path (Optional[str]): If set, the path of the document store where
+            the chunks text is saved, keyed by point id, instead of in the points
+            payloads.
+        doc_store_compression (bool): If True, the texts are stored compressed.
     """
+    if html_converter not in HTML_CONVERTERS:
+        raise ValueError(
+            f"Unknown HTML converter: {html_converter} (expected one of {list(HTML_CONVERTERS)})"
+        )
+
     loader.setup_collection(is_fresh_start=is_fresh_start)
 
-    for f in os.listdir(html_folder_path):
-        html_file_path = os.path.join(html_folder_path, f)
-        if not html_file_path.endswith(".html"):
-            logger.info(f"Indexing in vect skipped for file: {html_file_path}")
+    manifest = None
+    if manifest_path is not None:
+        manifest = IndexManifest(manifest_path)
+        if is_fresh_start:
+            manifest.clear()
+        if dedup_threshold is not None:
+            logger.warning(
+                "The near-duplicate filter is disabled by the incremental indexing"
+            )
+            dedup_threshold = None
+
+    doc_store = open_doc_store(doc_store_path, doc_store_compression)
+    if doc_store is not None and is_fresh_start:
+        doc_store.clear()
+
+    cache = None
+    if cache_path is not None:
+        cache = EmbeddingCache(cache_path, max_size_mb=cache_max_size_mb)
+
+    n_workers = n_workers or default_n_workers(threads_per_worker)
+    encoder_pool = None
+    if n_workers > 1:
+        logger.info(f"Encoding with {n_workers} processes")
+        encoder_pool = EncoderPool(n_workers, threads_per_worker)
+
+    token_idf = None
+    if idf_path is not None:
+        if os.path.exists(idf_path) and not is_fresh_start:
+            token_idf = TokenIdf.load(idf_path)
+        else:
+            token_idf = TokenIdf(vocab_size=sparse_vocab_size())
+
+    try:
+        _index_files(
+            loader,
+            html_folder_path,
+            token_idf,
+            encoder_pool,
+            cache,
+            manifest,
+            batch_size,
+            queue_size,
+            html_converter,
+            lambda text: split_in_chunks(
+                text, chunker, chunk_max_tokens, chunk_overlap_tokens
+            ),
+            None if dedup_threshold is None else NearDuplicateFilter(dedup_threshold),
+            journal,
+            doc_store,
+            idf_path,
+        )
+    finally:
+        if encoder_pool is not None:
+            encoder_pool.close()
+        if cache is not None:
+            for model_id, stats in cache.stats().items():
+                logger.info(
+                    f"Embedding cache for {model_id}: {stats['hits']} hits, "
+                    f"{stats['misses']} misses (hit rate {stats['hit_rate']:.1%})"
+                )
+            cache.close()
+        if doc_store is not None:
+            doc_store.close()
+
+    if token_idf is not None:
+        token_idf.save(idf_path)
+        logger.info(f"Token idf statistics saved in: {idf_path}")
+
+
+@dataclass
+class _Document:
+    """A parsed HTML file, with its chunks (and their payloads) and the point ids to
+    add and to delete."""
+
+    doc_id: str
+    path: str
+    file_hash: str
+    chunks: list[str]
+    chunk_hashes: list[str]
+    ids: list[str]
+    payloads: list[dict]
+    new: list[int]
+    stale_ids: list[str]
+
+
+@dataclass
+class _Batch:
+    """The chunks encoded and upserted together, and the documents they complete."""
+
+    chunks: list[str] = field(default_factory=list)
+    ids: list[str] = field(default_factory=list)
+    payloads: list[dict] = field(default_factory=list)
+    done: list[_Document] = field(default_factory=list)
+    dense_vectors: Optional[np.ndarray] = None
+    sparse_vectors: Optional[list[dict]] = None
+    token_ids: Optional[list[list[int]]] = None
+
+
+def _parse_files(
+    paths: Iterator[str],
+    manifest: Optional[IndexManifest],
+    html_converter: str = "text",
+    split: Callable[[str], list[TextChunk]] = partial(
+        split_in_chunks, chunker="sentences"
+    ),
+    dedup: Optional[NearDuplicateFilter] = None,
+    journal: Optional[IngestionJournal] = None,
+) -> Iterator[_Document]:
+    """
+    Pipeline stage: converts the HTML files to text and chunks them.
+
+    Args:
+        paths (Iterator[str]): The paths of the HTML files.
+        manifest (Optional[IndexManifest]): If set, the manifest of the indexed docs:
+            unchanged files are skipped and only new chunks are marked to be added.
+        html_converter (str): The name of the HTML converter (see HTML_CONVERTERS).
+        split (Callable[[str], list[TextChunk]]): The function chunking the texts
+            (see split_in_chunks).
+        dedup (Optional[NearDuplicateFilter]): If set, the filter dropping the new
+            chunks near-duplicate of a chunk already seen.
+        journal (Optional[IngestionJournal]): If set, the journal of the ingestion run:
+            the documents and chunks it records as indexed are skipped.
+
+    Yields:
+        _Document: The parsed files.
+    """
+    for html_file_path in paths:
+        doc_id = get_doc_id(html_file_path)
+        if journal is not None and doc_id in journal.indexed:
+            logger.info(
+                f"Indexing in vect db skipped (already done) for: {html_file_path}"
+            )
             continue
+        html_hash = file_hash(html_file_path)
+        if manifest is not None and manifest.file_hash(doc_id) == html_hash:
+            logger.info(
+                f"Indexing in vect db skipped (unchanged) for: {html_file_path}"
+            )
+            continue
+
+        # Convert HTML to text
+        text = HTML_CONVERTERS[html_converter](html_file_path)
+
+        # Chunk the text
+        text_chunks = split(text)
+        chunks = [chunk.text for chunk in text_chunks]
+        payloads = chunk_payloads(
+            doc_id, text, text_chunks, read_page_meta(html_file_path)
+        )
+        chunk_hashes = [chunk_hash(chunk) for chunk in chunks]
+        ids = [
+            chunk_point_id(doc_id, i, a_hash) for i, a_hash in enumerate(chunk_hashes)
+        ]
+
+        old_ids = set() if manifest is None else manifest.point_ids(doc_id)
+        indexed_ids = set(old_ids)
+        if journal is not None:
+            # chunks upserted by the interrupted run being resumed
+            indexed_ids.update(a_id for a_id in ids if a_id in journal.upserted)
+        if dedup is not None:
+            # the new chunks near-duplicate of a chunk already seen are dropped
+            kept = []
+            for i, a_id in enumerate(ids):
+                if a_id in indexed_ids:
+                    dedup.add(chunks[i])
+                elif dedup.is_duplicate(chunks[i]):
+                    continue
+                kept.append(i)
+            chunks = [chunks[i] for i in kept]
+            chunk_hashes = [chunk_hashes[i] for i in kept]
+            ids = [ids[i] for i in kept]
+            payloads = [payloads[i] for i in kept]
+
+        # only the chunks not already indexed are added, the ones no longer present deleted
+        yield _Document(
+            doc_id=doc_id,
+            path=html_file_path,
+            file_hash=html_hash,
+            chunks=chunks,
+            chunk_hashes=chunk_hashes,
+            ids=ids,
+            payloads=payloads,
+            new=[i for i, a_id in enumerate(ids) if a_id not in indexed_ids],
+            stale_ids=sorted(old_ids.difference(ids)),
+        )
+
+
+def _batch_chunks(docs: Iterator[_Document], batch_size: int) -> Iterator[_Batch]:
+    """
+    Pipeline stage: groups the new chunks of consecutive documents in batches.
+
+    Args:
+        docs (Iterator[_Document]): The parsed files.
+        batch_size (int): The maximum number of chunks of a batch.
+
+    Yields:
+        _Batch: The batches; each document is attached to the batch of its last chunk.
+    """
+    batch = _Batch()
+    for doc in docs:
+        for i in doc.new:
+            if len(batch.chunks) == batch_size:
+                yield batch
+                batch = _Batch()
+            batch.chunks.append(doc.chunks[i])
+            batch.ids.append(doc.ids[i])
+            batch.payloads.append(doc.payloads[i])
+        batch.done.append(doc)
+    if len(batch.chunks) > 0 or len(batch.done) > 0:
+        yield batch
+
+
+def _encode_batches(
+    batches: Iterator[_Batch],
+    token_idf: Optional[TokenIdf],
+    encoder_pool: Optional[EncoderPool],
+    cache: Optional[EmbeddingCache],
+) -> Iterator[_Batch]:
+    """
+    Pipeline stage: computes the dense and sparse vectors of the batches chunks; the
+    sparse vectors are pruned after the cache, which keeps the full ones.
+
+    Args:
+        batches (Iterator[_Batch]): The batches.
+        token_idf (Optional[TokenIdf]): If set, the token statistics to update: the
+            token ids of the chunks are computed (and counted once upserted).
+        encoder_pool (Optional[EncoderPool]): If set, the pool of processes encoding the chunks.
+        cache (Optional[EmbeddingCache]): If set, the cache of the chunks vectors.
 
-        # Convert HTML to markdown
-        markdown_text = convert_html_to_markdown(html_file_path)
-
-        # Chunk the Markdown text
-        chunks = chunk_text(markdown_text)
-
-        # add the chunks to the vector db
-
-        if len(chunks) > 0:
-            logger.info(f"Starting indexing in vect db for: {html_file_path}")
-            # TODO: more informative payloads might be created during ingestion phase
-            loader.add_to_collection(
-                dense_vectors=[
-                    compute_dense_vector(query_text=chunk) for chunk in chunks
-                ],
-                sparse_vectors=[
-                    models.SparseVector(**compute_sparse_vector(query_text=chunk))
-                    for chunk in chunks
-                ],
-                payloads=[{"text": chunk} for chunk in chunks],
+    Yields:
+        _Batch: The batches, with their vectors.
+    """
+    for batch in batches:
+        if len(batch.chunks) > 0:
+            batch.dense_vectors, sparse_vectors = encode_chunks(
+                batch.chunks, encoder_pool, cache
             )
-            logger.info(f"Indexing in vect db ended for: {html_file_path}")
-        else:
+            batch.sparse_vectors = prune_document_vectors(sparse_vectors)
+            if token_idf is not None:
+                batch.token_ids = compute_token_ids(batch.chunks)
+        yield batch
+
+
+def _upsert_batches(
+    batches: Iterator[_Batch],
+    loader: LoadInVdb,
+    manifest: Optional[IndexManifest],
+    journal: Optional[IngestionJournal] = None,
+    doc_store: Optional[DocStore] = None,
+    token_idf: Optional[TokenIdf] = None,
+    idf_path: Optional[str] = None,
+) -> Iterator[_Batch]:
+    """
+    Pipeline stage: adds the batches chunks to the vector database, with their
+    payloads (and their text to the document store), counts their tokens in the idf
+    statistics, deletes the stale chunks of the completed documents and records them
+    in the manifest.
+
+    Args:
+        batches (Iterator[_Batch]): The encoded batches.
+        loader (LoadInVdb): The LoadInVdb instance used to load data into the vector database.
+        manifest (Optional[IndexManifest]): If set, the manifest of the indexed docs,
+            updated and saved after each batch completing some documents.
+        journal (Optional[IngestionJournal]): If set, the journal of the ingestion run,
+            where the upserted batches and the completed documents are recorded.
+        doc_store (Optional[DocStore]): If set, the document store of the chunks text,
+            which is then left out of the points payloads.
+        token_idf (Optional[TokenIdf]): If set, the token statistics updated with the
+            chunks (whose token ids are computed by _encode_batches).
+        idf_path (Optional[str]): If set with a journal, the path where the token idf
+            statistics are saved after each recorded batch, so that a resumed run,
+            which skips the recorded chunks, does not lose their counts.
+
+    Yields:
+        _Batch: The upserted batches.
+    """
+    for batch in batches:
+        if len(batch.chunks) > 0:
+            if doc_store is not None:
+                # stored before the points, so that a retrieved point has its text
+                doc_store.put(batch.ids, batch.chunks, metadata=batch.payloads)
+                payloads = batch.payloads
+            else:
+                payloads = [
+                    {**payload, "text": chunk}
+                    for payload, chunk in zip(batch.payloads, batch.chunks)
+                ]
+            loader.upload(
+                dense_vectors=batch.dense_vectors,
+                sparse_vectors=batch.sparse_vectors,
+                payloads=payloads,
+                ids=batch.ids,
+            )
+            if token_idf is not None:
+                token_idf.update(batch.token_ids)
+            if journal is not None:
+                journal.record_batch(batch.ids)
+                if token_idf is not None and idf_path is not None:
+                    token_idf.save(idf_path)
+        for doc in batch.done:
+            loader.delete_points(doc.stale_ids)
+            if doc_store is not None:
+                doc_store.delete(doc.stale_ids)
+            if manifest is not None:
+                manifest.update(
+                    doc.doc_id, doc.file_hash, dict(zip(doc.ids, doc.chunk_hashes))
+                )
+            if journal is not None:
+                journal.record_document(doc.doc_id)
             logger.info(
-                f"Indexing in vect db skipped (no chunks) for: {html_file_path}"
+                f"Indexing in vect db ended for: {doc.path} "
+                f"({len(doc.new)} of {len(doc.chunks)} chunks added)"
             )
+        if manifest is not None and len(batch.done) > 0:
+            manifest.save()
+        yield batch
 
 
-if __name__ == "__main__":
-    from qdrant_client.qdrant_client import QdrantClient
+def _index_files(
+    loader: LoadInVdb,
+    html_folder_path: str,
+    token_idf: Optional[TokenIdf],
+    encoder_pool: Optional[EncoderPool],
+    cache: Optional[EmbeddingCache],
+    manifest: Optional[IndexManifest] = None,
+    batch_size: int = 256,
+    queue_size: int = 4,
+    html_converter: str = "text",
+    split: Callable[[str], list[TextChunk]] = partial(
+        split_in_chunks, chunker="sentences"
+    ),
+    dedup: Optional[NearDuplicateFilter] = None,
+    journal: Optional[IngestionJournal] = None,
+    doc_store: Optional[DocStore] = None,
+    idf_path: Optional[str] = None,
+) -> None:
+    """
+    Indexes the HTML files of a folder with a streaming pipeline.
 
+    Args:
+        loader (LoadInVdb): The LoadInVdb instance used to load data into the vector database.
+        html_folder_path (str): The path to the folder containing HTML files to be indexed.
+        token_idf (Optional[TokenIdf]): If set, the token statistics updated with the chunks.
+        encoder_pool (Optional[EncoderPool]): If set, the pool of processes encoding the chunks.
+        cache (Optional[EmbeddingCache]): If set, the cache of the chunks vectors.
+        manifest (Optional[IndexManifest]): If set, the manifest of the indexed docs,
+            used to index incrementally.
+        batch_size (int): The number of chunks encoded and upserted together.
+        queue_size (int): The maximum number of items waiting between two stages.
+        html_converter (str): The name of the HTML converter (see HTML_CONVERTERS).
+        split (Callable[[str], list[TextChunk]]): The function chunking the texts
+            (see split_in_chunks).
+        dedup (Optional[NearDuplicateFilter]): If set, the filter dropping the new
+            chunks near-duplicate of a chunk already seen.
+        journal (Optional[IngestionJournal]): If set, the journal of the ingestion run.
+        doc_store (Optional[DocStore]): If set, the document store of the chunks text.
+        idf_path (Optional[str]): If set with a journal, the path where the token idf
+            statistics are saved after each recorded batch.
+    """
+    html_file_paths = []
+    for f in sorted(os.listdir(html_folder_path)):
+        html_file_path = os.path.join(html_folder_path, f)
+        if is_html_file(html_file_path):
+            html_file_paths.append(html_file_path)
+        else:
+            logger.info(f"Indexing in vect skipped for file: {html_file_path}")
+
+    pipeline = Pipeline(
+        [
+            (
+                "parse",
+                lambda paths: _parse_files(
+                    paths, manifest, html_converter, split, dedup, journal
+                ),
+            ),
+            ("batch", lambda docs: _batch_chunks(docs, batch_size)),
+            (
+                "encode",
+                lambda batches: _encode_batches(
+                    batches, token_idf, encoder_pool, cache
+                ),
+            ),
+            (
+                "upsert",
+                lambda batches: _upsert_batches(
+                    batches, loader, manifest, journal, doc_store, token_idf, idf_path
+                ),
+            ),
+        ],
+        queue_size=queue_size,
+    )
+    pipeline.run(html_file_paths)
+    if dedup is not None:
+        logger.info(
+            f"Near-duplicate filter: {dedup.n_duplicates} of {dedup.n_seen} new chunks "
+            f"removed (threshold {dedup.threshold})"
+        )
+
+    # delete the chunks of the docs whose files were removed
+    if manifest is not None:
+        doc_ids = {get_doc_id(path) for path in html_file_paths}
+        for doc_id in set(manifest.documents).difference(doc_ids):
+            logger.info(f"Removing from vect db the chunks of deleted doc: {doc_id}")
+            loader.delete_points(sorted(manifest.point_ids(doc_id)))
+            if doc_store is not None:
+                doc_store.delete(sorted(manifest.point_ids(doc_id)))
+            manifest.remove(doc_id)
+        manifest.save()
+    loader.flush()
+
+
+if __name__ == "__main__":
+    from retrieval.backend import open_vector_store
     from utility.read_config import get_config_from_path
+
     logger.setLevel('INFO')
 
     dct_config = get_config_from_path("config.yaml")
-    client = QdrantClient(path=dct_config["VECTOR_DB"]["PATH_TO_FOLDER"])
+    _, loader, _ = open_vector_store(dct_config)
 
-    COLLECTION_NAME = dct_config["VECTOR_DB"]["COLLECTION_NAME"]
     COLL_FRESH_START = dct_config["VECTOR_DB"]["COLL_FRESH_START"]
     html_folder_path = dct_config["INPUT_DATA"]["PATH_TO_FOLDER"]
-    loader = LoadInVdb(client=client, coll_name=COLLECTION_NAME)
 
     main_indexing(
         loader=loader,
         is_fresh_start=COLL_FRESH_START,
         html_folder_path=html_folder_path,
+        **get_indexing_params(dct_config),
     )
@@ -1,7 +1,9 @@
 from logging import getLogger
+from typing import Optional
 
-from ingestion.download_html import main_html_download
-from ingestion.indexing_qd import main_indexing
+from ingestion.checkpoint import IngestionJournal
+from ingestion.download_html import get_download_params, main_html_download
+from ingestion.indexing_qd import get_indexing_params, main_indexing
 from ingestion.vdb_wrapper import LoadInVdb
 
 logger = getLogger("ingestion")
@@ -14,6 +16,9 @@ def ingest(
     is_fresh_start_indexing: bool,
     html_folder_path: str,
     n_max_docs: int,
+    download_kwargs: Optional[dict] = None,
+    indexing_kwargs: Optional[dict] = None,
+    journal_path: Optional[str] = None,
 ) -> None:
     """Downloads documents based on a keyword and indexes them into a vector database.
 
@@ -24,12 +29,28 @@ def ingest(
         is_fresh_start_indexing (bool): Flag indicating whether to start fresh for indexing.
         html_folder_path (str): The directory path where downloaded HTML files will be stored.
         n_max_docs (int): The maximum number of documents to download.
+        download_kwargs (Optional[dict]): Optional parameters of main_html_download (see get_download_params).
+        indexing_kwargs (Optional[dict]): Optional parameters of main_indexing (see get_indexing_params).
+        journal_path (Optional[str]): If set, the path of the journal of the ingestion
+            runs: if the last run of the same keyword was interrupted, it is resumed
+            (without fresh starts) from its last recorded download and upserted batch.
     """
+    journal = None
+    if journal_path is not None:
+        journal = IngestionJournal(journal_path)
+        if journal.can_resume(keyword):
+            logger.info(f"Resuming the interrupted ingestion of: {keyword}")
+            is_fresh_start_dwnld = is_fresh_start_indexing = False
+        else:
+            journal.start(keyword)
+
     main_html_download(
         keyword,
         html_folder_path,
         is_fresh_start=is_fresh_start_dwnld,
         n_max_docs=n_max_docs,
+        journal=journal,
+        **(download_kwargs or {}),
     )
     logger.info("Document download ended")
 
@@ -37,27 +58,28 @@ def ingest(
         loader=loader,
         is_fresh_start=is_fresh_start_indexing,
         html_folder_path=html_folder_path,
+        journal=journal,
+        **(indexing_kwargs or {}),
     )
     logger.info("Document indexing ended")
 
+    if journal is not None:
+        journal.finish()
 
-if __name__ == "__main__":
-    from qdrant_client.qdrant_client import QdrantClient
 
+if __name__ == "__main__":
+    from retrieval.backend import open_vector_store
     from utility.read_config import get_config_from_path
 
     logger.setLevel('INFO')
     dct_config = get_config_from_path("config.yaml")
-    client = QdrantClient(path=dct_config["VECTOR_DB"]["PATH_TO_FOLDER"])
+    _, loader, _ = open_vector_store(dct_config)
 
-    COLLECTION_NAME = dct_config["VECTOR_DB"]["COLLECTION_NAME"]
     COLL_FRESH_START = dct_config["VECTOR_DB"]["COLL_FRESH_START"]
     html_folder_path = dct_config["INPUT_DATA"]["PATH_TO_FOLDER"]
     fresh_start_dwnld = dct_config["INPUT_DATA"]["DOWNLOAD_FRESH_START"]
     n_max_docs = dct_config["INPUT_DATA"]["N_MAX_DOCS"]
 
-    loader = LoadInVdb(client=client, coll_name=COLLECTION_NAME)
-
     ingest(
         keyword="Riccardo Crupi",
         loader=loader,
@@ -65,4 +87,7 @@ if __name__ == "__main__":
         is_fresh_start_indexing=COLL_FRESH_START,
         html_folder_path=html_folder_path,
         n_max_docs=n_max_docs,
+        download_kwargs=get_download_params(dct_config),
+        indexing_kwargs=get_indexing_params(dct_config),
+        journal_path=dct_config["INPUT_DATA"]["JOURNAL_PATH"],
     )
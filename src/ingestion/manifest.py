@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+from typing import Optional
+from uuid import UUID, uuid5
+
+# namespace of the point ids derived from the chunks content
+POINT_ID_NAMESPACE = UUID("6f1b5c1e-3a51-4c59-9a39-2f0f4f1f6b8e")
+
+
+def file_hash(file_path: str) -> str:
+    """
+    Computes the hash of the content of a file.
+
+    Args:
+        file_path (str): The path of the file.
+
+    Returns:
+        str: The sha256 hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(2**20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_hash(chunk: str) -> str:
+    """
+    Computes the hash of a chunk of text.
+
+    Args:
+        chunk (str): The chunk.
+
+    Returns:
+        str: The sha256 hex digest of the chunk.
+    """
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+
+def chunk_point_id(doc_id: str, chunk_idx: int, chunk_hash: str) -> str:
+    """
+    Computes the deterministic point id of a chunk: the same chunk of the same
+    document always gets the same id, so that re-indexing it overwrites its point.
+
+    Args:
+        doc_id (str): The id of the document of the chunk.
+        chunk_idx (int): The position of the chunk in the document.
+        chunk_hash (str): The hash of the chunk.
+
+    Returns:
+        str: The point id (a UUID).
+    """
+    return str(uuid5(POINT_ID_NAMESPACE, f"{doc_id}/{chunk_idx}/{chunk_hash}"))
+
+
+class IndexManifest:
+    def __init__(self, path: str):
+        """
+        Initializes the IndexManifest instance: the record, saved as a JSON file, of
+        the indexed documents (file hash) and of their chunks (point id and chunk hash).
+
+        Args:
+            path (str): The path of the JSON file; it is read if it exists.
+        """
+        self.path = path
+        self.documents: dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                self.documents = json.load(file)["documents"]
+
+    def file_hash(self, doc_id: str) -> Optional[str]:
+        """
+        Returns the hash of the file of an indexed document.
+
+        Args:
+            doc_id (str): The id of the document.
+
+        Returns:
+            Optional[str]: The file hash, None if the document is not indexed.
+        """
+        return self.documents.get(doc_id, {}).get("file_hash")
+
+    def point_ids(self, doc_id: str) -> set[str]:
+        """
+        Returns the point ids of the chunks of an indexed document.
+
+        Args:
+            doc_id (str): The id of the document.
+
+        Returns:
+            set[str]: The point ids, empty if the document is not indexed.
+        """
+        return set(self.documents.get(doc_id, {}).get("chunks", {}))
+
+    def update(self, doc_id: str, file_hash: str, chunks: dict[str, str]) -> None:
+        """
+        Records a document as indexed.
+
+        Args:
+            doc_id (str): The id of the document.
+            file_hash (str): The hash of the document file.
+            chunks (dict[str, str]): The hash of each chunk, by point id.
+        """
+        self.documents[doc_id] = {"file_hash": file_hash, "chunks": chunks}
+
+    def remove(self, doc_id: str) -> None:
+        """
+        Removes a document from the record.
+
+        Args:
+            doc_id (str): The id of the document.
+        """
+        self.documents.pop(doc_id, None)
+
+    def clear(self) -> None:
+        """
+        Removes all the documents from the record.
+        """
+        self.documents = {}
+
+    def save(self) -> None:
+        """
+        Saves the record to its JSON file (atomically, through a temporary file).
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"documents": self.documents}, file)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,152 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Any, Callable, Iterable, Iterator
+
+logger = getLogger("ingestion")
+
+# a stage transforms the iterator of its inputs into the iterator of its outputs
+Stage = Callable[[Iterator[Any]], Iterator[Any]]
+
+_END = object()
+
+
+@dataclass
+class StageStats:
+    """The throughput statistics of a stage of a pipeline."""
+
+    name: str
+    n_in: int = 0
+    n_out: int = 0
+    wall_s: float = 0.0
+    input_wait_s: float = 0.0
+    output_wait_s: float = 0.0
+
+    @property
+    def busy_s(self) -> float:
+        """The time spent processing, i.e. not waiting for inputs or for room for outputs."""
+        return max(self.wall_s - self.input_wait_s - self.output_wait_s, 0.0)
+
+    def __str__(self) -> str:
+        rate = self.n_out / self.busy_s if self.busy_s > 0 else float("inf")
+        return (
+            f"{self.name}: {self.n_in} in, {self.n_out} out, busy {self.busy_s:.2f}s "
+            f"({rate:.1f} out/s), waiting {self.input_wait_s:.2f}s for inputs "
+            f"and {self.output_wait_s:.2f}s for downstream"
+        )
+
+
+class Pipeline:
+    def __init__(self, stages: list[tuple[str, Stage]], queue_size: int = 4):
+        """
+        Initializes the Pipeline instance: a chain of stages, each one running in its
+        own thread, connected by bounded queues. A stage blocks when its downstream
+        queue is full (backpressure), so the items in flight are bounded whatever the
+        number of inputs, and slow stages (e.g. encoding) overlap with the others
+        (e.g. parsing and DB writes).
+
+        Args:
+            stages (list[tuple[str, Stage]]): The name and the function of each stage,
+                in order; the function takes the iterator of the stage inputs and
+                returns the iterator of its outputs (e.g. a generator), so it can
+                filter, split or batch items.
+            queue_size (int): The maximum number of items waiting between two stages.
+        """
+        self.stages = stages
+        self.queue_size = queue_size
+        self._stop = threading.Event()
+        self._errors: list[BaseException] = []
+
+    def _put(self, q: queue.Queue, item: Any) -> None:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _inputs(self, q: queue.Queue, stats: StageStats) -> Iterator[Any]:
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            try:
+                item = q.get(timeout=0.1)
+            except queue.Empty:
+                stats.input_wait_s += time.perf_counter() - start
+                continue
+            stats.input_wait_s += time.perf_counter() - start
+            if item is _END:
+                return
+            stats.n_in += 1
+            yield item
+
+    def _run_stage(
+        self, stage: Stage, inputs: Iterable[Any], q_out: queue.Queue, stats: StageStats
+    ) -> None:
+        start = time.perf_counter()
+        try:
+            for item in stage(iter(inputs)):
+                if self._stop.is_set():
+                    # another stage failed: do not process the remaining inputs
+                    break
+                stats.n_out += 1
+                start_put = time.perf_counter()
+                self._put(q_out, item)
+                stats.output_wait_s += time.perf_counter() - start_put
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+        finally:
+            stats.wall_s = time.perf_counter() - start
+            self._put(q_out, _END)
+
+    def run(self, items: Iterable[Any]) -> list[StageStats]:
+        """
+        Runs the pipeline on some inputs, until they are all processed by all the stages
+        (the outputs of the last stage are discarded), and logs the stages throughput.
+
+        Args:
+            items (Iterable[Any]): The inputs of the first stage; they are read lazily.
+
+        Raises:
+            BaseException: The first exception raised by a stage, after all the stages
+                are stopped.
+
+        Returns:
+            list[StageStats]: The throughput statistics of each stage.
+        """
+        self._stop.clear()
+        self._errors = []
+        all_stats = [StageStats(name) for name, _ in self.stages]
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = []
+        for i, ((name, stage), stats) in enumerate(zip(self.stages, all_stats)):
+            inputs = items if i == 0 else self._inputs(queues[i - 1], stats)
+            thread = threading.Thread(
+                target=self._run_stage,
+                args=(stage, inputs, queues[i], stats),
+                name=f"pipeline-{name}",
+                daemon=True,
+            )
+            threads.append(thread)
+            thread.start()
+
+        # drain the outputs of the last stage
+        while True:
+            try:
+                if queues[-1].get(timeout=0.1) is _END:
+                    break
+            except queue.Empty:
+                if not any(thread.is_alive() for thread in threads):
+                    break
+        # unblock the stages still running, if any (e.g. after an error)
+        self._stop.set()
+        for thread in threads:
+            thread.join()
+
+        if len(self._errors) > 0:
+            raise self._errors[0]
+        for stats in all_stats:
+            logger.info(f"Pipeline stage {stats}")
+        return all_stats
@@ -1,10 +1,82 @@
-from typing import List
-import nltk
+import gzip
+import os
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Any, List, TextIO
 
-nltk.download('punkt')
+HTML_EXTENSIONS = (".html", ".html.gz")
 
-import markdownify
-from bs4 import BeautifulSoup
+
+def _ensure_punkt() -> None:
+    """
+    Makes sure the NLTK punkt sentence tokenizer is available, downloading it
+    only the first time it is missing (no network access at import time).
+    """
+    import nltk
+
+    try:
+        nltk.data.find("tokenizers/punkt")
+    except LookupError:
+        nltk.download("punkt", quiet=True)
+
+
+def is_html_file(file_path: str) -> bool:
+    """
+    Tells whether a file is an HTML page (plain or gzip-compressed).
+
+    Args:
+        file_path (str): The path of the file.
+
+    Returns:
+        bool: True if the file is an HTML page.
+    """
+    return file_path.endswith(HTML_EXTENSIONS)
+
+
+def get_doc_id(file_path: str) -> str:
+    """
+    Returns the id of the document stored in an HTML file: its file name, without extension.
+
+    Args:
+        file_path (str): The path of the HTML file.
+
+    Returns:
+        str: The id of the document (e.g. the arXiv id).
+    """
+    file_name = os.path.basename(file_path)
+    for extension in HTML_EXTENSIONS:
+        if file_name.endswith(extension):
+            return file_name[: -len(extension)]
+    return file_name
+
+
+def open_html_file(html_file: str) -> TextIO:
+    """
+    Opens an HTML file for reading, decompressing it if it is gzip-compressed (.gz extension).
+
+    Args:
+        html_file (str): The path to the HTML file.
+
+    Returns:
+        TextIO: The opened text file.
+    """
+    if html_file.endswith(".gz"):
+        return gzip.open(html_file, "rt", encoding="utf-8")
+    return open(html_file, "r", encoding="utf-8")
+
+
+def read_html_file(html_file: str) -> str:
+    """
+    Reads an HTML file, decompressing it if it is gzip-compressed (.gz extension).
+
+    Args:
+        html_file (str): The path to the HTML file.
+
+    Returns:
+        str: The HTML content.
+    """
+    with open_html_file(html_file) as file:
+        return file.read()
 
 
 def convert_html_to_markdown(html_file: str) -> str:
@@ -16,8 +88,10 @@ def convert_html_to_markdown(html_file: str) -> str:
     Returns:
         str: The converted Markdown content.
     """
-    with open(html_file, "r", encoding="utf-8") as file:
-        html_content = file.read()
+    import markdownify
+    from bs4 import BeautifulSoup
+
+    html_content = read_html_file(html_file)
 
     # Parse the HTML using BeautifulSoup to clean it
     soup = BeautifulSoup(html_content, "html.parser")
@@ -28,6 +102,111 @@ def convert_html_to_markdown(html_file: str) -> str:
     return markdown_content
 
 
+class _TextExtractor(HTMLParser):
+    """
+    Streaming HTML parser emitting the text of a document, one block (paragraph,
+    heading, list item, ...) per paragraph, with ATX headings and '* ' list items.
+    Scripts, styles, navigation and page header/footer are dropped, and the MathML
+    formulas are replaced by their LaTeX alternative text.
+    """
+
+    SKIPPED_TAGS = {
+        "script", "style", "noscript", "template", "head",
+        "nav", "header", "footer", "svg", "button", "form",
+    }  # fmt: skip
+    BLOCK_TAGS = {
+        "p", "div", "section", "article", "blockquote", "pre", "figure",
+        "figcaption", "table", "tr", "ul", "ol", "dl", "dt", "dd", "br", "hr",
+    }  # fmt: skip
+    HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks: list[str] = []
+        self._current: list[str] = []
+        self._skip_tag = None
+        self._skip_depth = 0
+
+    def _end_block(self) -> None:
+        text = " ".join("".join(self._current).split())
+        if text and text not in ("*", "#" * len(text)):
+            self.blocks.append(text)
+        self._current = []
+
+    def _skip(self, tag: str) -> None:
+        self._skip_tag, self._skip_depth = tag, 1
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if self._skip_tag is not None:
+            self._skip_depth += tag == self._skip_tag
+        elif tag in self.SKIPPED_TAGS:
+            self._skip(tag)
+        elif tag == "math":
+            alttext = dict(attrs).get("alttext")
+            if alttext:
+                self._current.append(f" ${alttext}$ ")
+            self._skip(tag)
+        elif tag in self.HEADING_TAGS:
+            self._end_block()
+            self._current.append("#" * self.HEADING_TAGS[tag] + " ")
+        elif tag == "li":
+            self._end_block()
+            self._current.append("* ")
+        elif tag in self.BLOCK_TAGS:
+            self._end_block()
+        elif tag in ("td", "th"):
+            self._current.append(" ")
+
+    def handle_startendtag(self, tag: str, attrs: list) -> None:
+        if self._skip_tag is None and tag in self.BLOCK_TAGS:
+            self._end_block()
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+        elif tag in self.BLOCK_TAGS or tag in self.HEADING_TAGS or tag == "li":
+            self._end_block()
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_tag is None:
+            self._current.append(data)
+
+    def close(self) -> None:
+        super().close()
+        self._end_block()
+
+
+def convert_html_to_text(html_file: str, block_size: int = 2**16) -> str:
+    """
+    Reads an HTML file and extracts its text in a single streaming pass (no parse
+    tree is built): blocks are separated by blank lines, headings are kept in
+    Markdown (ATX) style, and scripts, styles, navigation and math markup are dropped
+    (formulas are replaced by their LaTeX alternative text).
+
+    Args:
+        html_file (str): The path to the HTML file to be converted.
+        block_size (int): The number of characters read and parsed at a time.
+
+    Returns:
+        str: The extracted text.
+    """
+    parser = _TextExtractor()
+    with open_html_file(html_file) as file:
+        for block in iter(lambda: file.read(block_size), ""):
+            parser.feed(block)
+    parser.close()
+    return "\n\n".join(parser.blocks)
+
+
+HTML_CONVERTERS = {
+    "markdown": convert_html_to_markdown,
+    "text": convert_html_to_text,
+}
+
+
 def chunk_text(text: str, max_chunk_size: int = 300) -> List[str]:
     """
     ---- PLACEHOLDER VERSION ----
@@ -41,7 +220,10 @@ def chunk_text(text: str, max_chunk_size: int = 300) -> List[str]:
     Returns:
         List[str]: A list of text chunks.
     """
-    
+    import nltk
+
+    _ensure_punkt()
+
     # Tokenize the text into sentences
     sentences = nltk.sent_tokenize(text)
     chunks = []
@@ -61,4 +243,86 @@ def chunk_text(text: str, max_chunk_size: int = 300) -> List[str]:
     if current_chunk:
         chunks.append(current_chunk.strip())
     
-    return chunks
\ No newline at end of file
+    return chunks
+
+
+@dataclass
+class TextChunk:
+    """A chunk of a text, with the position of its characters in the text."""
+
+    text: str
+    start: int
+    end: int
+
+
+# tokens ending a sentence, preferred as chunk boundaries
+_SENTENCE_END = (".", "!", "?", ":", ";")
+
+
+def chunk_text_by_tokens(
+    text: str, tokenizer: Any, max_tokens: int = 254, overlap_tokens: int = 32
+) -> List[TextChunk]:
+    """
+    Chunks a text in pieces of at most max_tokens model tokens, so that no token is
+    truncated by the encoders. The text is split in paragraphs (blank lines), which
+    are tokenized together with the batch mode of the fast tokenizer; chunks are then
+    cut, in linear time, preferably after a paragraph or sentence end (in the second
+    half of the window), and consecutive chunks share about overlap_tokens tokens.
+
+    Args:
+        text (str): The text to be chunked.
+        tokenizer (PreTrainedTokenizerFast): The (fast) tokenizer of the encoder.
+        max_tokens (int): The maximum number of tokens per chunk, special tokens excluded.
+        overlap_tokens (int): The number of tokens shared by consecutive chunks.
+
+    Raises:
+        ValueError: If overlap_tokens is not smaller than half max_tokens.
+
+    Returns:
+        List[TextChunk]: The chunks, with their character offsets in the text.
+    """
+    if not 0 <= overlap_tokens < max_tokens // 2:
+        raise ValueError("overlap_tokens must be non negative and < max_tokens / 2")
+
+    paragraphs, paragraph_starts, position = [], [], 0
+    for paragraph in text.split("\n\n"):
+        if paragraph.strip():
+            paragraphs.append(paragraph)
+            paragraph_starts.append(position)
+        position += len(paragraph) + 2
+    if len(paragraphs) == 0:
+        return []
+
+    # character span of each token, and whether a chunk can end after it
+    begins, ends, is_boundary = [], [], []
+    encodings = tokenizer(
+        paragraphs, add_special_tokens=False, return_offsets_mapping=True
+    )["offset_mapping"]
+    for paragraph, paragraph_start, offsets in zip(
+        paragraphs, paragraph_starts, encodings
+    ):
+        for begin, end in offsets:
+            begins.append(paragraph_start + begin)
+            ends.append(paragraph_start + end)
+            is_boundary.append(paragraph[begin:end].endswith(_SENTENCE_END))
+        if len(offsets) > 0:
+            is_boundary[-1] = True
+
+    chunks, start, n_tokens = [], 0, len(begins)
+    while start < n_tokens:
+        end = min(start + max_tokens, n_tokens)
+        if end < n_tokens:
+            for j in range(end - 1, start + max_tokens // 2 - 1, -1):
+                if is_boundary[j]:
+                    end = j + 1
+                    break
+        chunks.append(
+            TextChunk(text[begins[start] : ends[end - 1]], begins[start], ends[end - 1])
+        )
+        if end == n_tokens:
+            break
+        # the next chunk starts overlap_tokens before, at the beginning of a word
+        start = end - overlap_tokens
+        while start < end and start > 0 and begins[start] == ends[start - 1]:
+            start += 1
+    return chunks
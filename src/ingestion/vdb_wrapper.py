@@ -1,9 +1,78 @@
-from typing import Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Union
 from uuid import uuid4
 
+import numpy as np
 from qdrant_client import QdrantClient, models
 
-from embedding.dense import EMB_DIM
+from embedding.dense import get_emb_dim
+from retrieval.filters import PAYLOAD_SCHEMA
+from utility.vectors import as_dense_lists, as_sparse_vector
+
+
+def get_loader_params(dct_config: dict) -> dict:
+    """
+    Reads from the configuration the optional parameters of LoadInVdb.
+
+    Args:
+        dct_config (dict): The parsed configuration.
+
+    Returns:
+        dict: The keyword arguments to pass to LoadInVdb.
+    """
+    return {
+        "upload_batch_size": dct_config["VECTOR_DB"]["UPLOAD_BATCH_SIZE"],
+        "upload_parallel": dct_config["VECTOR_DB"]["UPLOAD_PARALLEL"],
+        "sparse_datatype": dct_config["VECTOR_DB"].get("SPARSE_DATATYPE"),
+        "dense_quantization": dct_config["VECTOR_DB"].get("DENSE_QUANTIZATION"),
+        "quantization_always_ram": dct_config["VECTOR_DB"].get(
+            "QUANTIZATION_ALWAYS_RAM", True
+        ),
+        "hnsw_m": dct_config["VECTOR_DB"].get("HNSW_M"),
+        "hnsw_ef_construct": dct_config["VECTOR_DB"].get("HNSW_EF_CONSTRUCT"),
+        "hnsw_on_disk": dct_config["VECTOR_DB"].get("HNSW_ON_DISK"),
+        "dense_on_disk": dct_config["VECTOR_DB"].get("DENSE_ON_DISK"),
+        "sparse_on_disk": dct_config["VECTOR_DB"].get("SPARSE_ON_DISK", False),
+        "payload_on_disk": dct_config["VECTOR_DB"].get("PAYLOAD_ON_DISK"),
+        "payload_indexes": {
+            field: PAYLOAD_SCHEMA[field]
+            for field in dct_config["VECTOR_DB"].get("PAYLOAD_INDEXES") or []
+        },
+    }
+
+
+def get_quantization_config(
+    quantization: Optional[str], always_ram: bool = True
+) -> Optional[models.QuantizationConfig]:
+    """
+    Builds the quantization config of the dense vectors.
+
+    Args:
+        quantization (Optional[str]): 'scalar' (int8, 4x smaller), 'binary' (1 bit per
+            dimension, 32x smaller) or None (no quantization).
+        always_ram (bool): If True, the quantized vectors are kept in RAM (the original
+            ones, used to rescore, can be stored on disk).
+
+    Returns:
+        Optional[models.QuantizationConfig]: The quantization config, None if no quantization.
+
+    Raises:
+        ValueError: If the quantization is not managed.
+    """
+    if quantization is None:
+        return None
+    if quantization == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8, quantile=0.99, always_ram=always_ram
+            )
+        )
+    if quantization == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=always_ram)
+        )
+    raise ValueError(f"Dense quantization not managed: {quantization}")
 
 
 class LoadInVdb:
@@ -13,6 +82,18 @@ class LoadInVdb:
         coll_name: str,
         dense_vect_name: str = "text-dense",
         sparse_vect_name: str = "text-sparse",
+        upload_batch_size: int = 256,
+        upload_parallel: int = 1,
+        sparse_datatype: Optional[str] = None,
+        dense_quantization: Optional[str] = None,
+        quantization_always_ram: bool = True,
+        hnsw_m: Optional[int] = None,
+        hnsw_ef_construct: Optional[int] = None,
+        hnsw_on_disk: Optional[bool] = None,
+        dense_on_disk: Optional[bool] = None,
+        sparse_on_disk: bool = False,
+        payload_on_disk: Optional[bool] = None,
+        payload_indexes: Optional[dict[str, str]] = None,
     ):
         """
         Initializes the LoadInVdb instance.
@@ -22,15 +103,49 @@ class LoadInVdb:
             coll_name (str): Name of the collection.
             dense_vect_name (str): Name of the dense vector.
             sparse_vect_name (str): Name of the sparse vector.
+            upload_batch_size (int): Number of points sent to the vector database per request.
+            upload_parallel (int): Number of upload requests sent concurrently (by threads).
+            sparse_datatype (Optional[str]): Storage type of the sparse vectors weights
+                ('float32', 'float16' or 'uint8'); if None, the server default (float32).
+            dense_quantization (Optional[str]): Quantization of the dense vectors: 'scalar',
+                'binary' or None (full precision only).
+            quantization_always_ram (bool): If True, the quantized dense vectors are kept in RAM.
+            hnsw_m (Optional[int]): Number of edges per node of the HNSW graph of the dense
+                vectors (more edges: better recall, more memory); if None, the server default.
+            hnsw_ef_construct (Optional[int]): Number of neighbours considered while building
+                the HNSW graph (more: better graph, slower build); if None, the server default.
+            hnsw_on_disk (Optional[bool]): If True, the HNSW graph is stored on disk
+                (memory-mapped); if None, the server default (in RAM).
+            dense_on_disk (Optional[bool]): If True, the (full precision) dense vectors are
+                stored on disk (memory-mapped); if None, the server default (in RAM).
+            sparse_on_disk (bool): If True, the sparse index is stored on disk (memory-mapped).
+            payload_on_disk (Optional[bool]): If True, the payloads are stored on disk and
+                read only for the returned points; if None, the server default.
+            payload_indexes (Optional[dict[str, str]]): The payload fields to index (to
+                filter the searches on them without scanning the collection), each with
+                its index type ('keyword', 'integer', 'datetime', ...).
         """
         self.client = client
         self.coll_name = coll_name
         self.dense_vect_name = dense_vect_name
         self.sparse_vect_name = sparse_vect_name
+        self.upload_batch_size = upload_batch_size
+        self.upload_parallel = upload_parallel
+        self.sparse_datatype = sparse_datatype
+        self.quantization_config = get_quantization_config(
+            dense_quantization, quantization_always_ram
+        )
+        self.hnsw_config = models.HnswConfigDiff(
+            m=hnsw_m, ef_construct=hnsw_ef_construct, on_disk=hnsw_on_disk
+        )
+        self.dense_on_disk = dense_on_disk
+        self.sparse_on_disk = sparse_on_disk
+        self.payload_on_disk = payload_on_disk
+        self.payload_indexes = payload_indexes or {}
 
     def setup_collection(self, is_fresh_start: bool = False) -> None:
         """
-        Ensures that the collection exists; creates it if it does not.
+        Ensures that the collection exists, with its payload indexes; creates it if it does not.
 
         Args:
             is_fresh_start (bool): If True, removes the existing collection before re-creation.
@@ -45,20 +160,35 @@ class LoadInVdb:
             self.client.create_collection(
                 collection_name=self.coll_name,
                 vectors_config={
-                    "text-dense": models.VectorParams(
-                        size=EMB_DIM,  # Vector size is defined by used model
+                    self.dense_vect_name: models.VectorParams(
+                        size=get_emb_dim(),  # Vector size is defined by used model
                         distance=models.Distance.COSINE,
+                        hnsw_config=self.hnsw_config,
+                        quantization_config=self.quantization_config,
+                        on_disk=self.dense_on_disk,
                     )
                 },
                 sparse_vectors_config={
-                    "text-sparse": models.SparseVectorParams(
+                    self.sparse_vect_name: models.SparseVectorParams(
                         index=models.SparseIndexParams(
-                            on_disk=False,
+                            on_disk=self.sparse_on_disk,
+                            datatype=self.sparse_datatype,
                         )
                     )
                 },
+                on_disk_payload=self.payload_on_disk,
             )
 
+        # the local mode has no payload indexes (it logs a warning and scans the points)
+        payload_schema = self.client.get_collection(self.coll_name).payload_schema
+        for field, index_type in self.payload_indexes.items():
+            if field not in payload_schema:
+                self.client.create_payload_index(
+                    collection_name=self.coll_name,
+                    field_name=field,
+                    field_schema=models.PayloadSchemaType(index_type),
+                )
+
     def add_to_collection(
         self,
         dense_vectors: list[list[float]],
@@ -86,17 +216,130 @@ class LoadInVdb:
                 "ids, dense vector, sparse vector and payloads lists must have the same length"
             )
 
-        self.client.upload_points(
-            collection_name=self.coll_name,
-            points=[
-                models.PointStruct(
-                    id=a_id,
-                    vector={"text-dense": dense_vector, "text-sparse": sparse_vector},
-                    payload=payload,
-                )
-                for a_id, dense_vector, sparse_vector, payload in zip(
-                    ids, dense_vectors, sparse_vectors, payloads
-                )
-            ],
-            max_retries=3,
+        self.upload(
+            dense_vectors=dense_vectors,
+            sparse_vectors=sparse_vectors,
+            payloads=payloads,
+            ids=ids,
+        )
+
+    def upload(
+        self,
+        dense_vectors: Union[np.ndarray, Iterable[Iterable[float]]],
+        sparse_vectors: Iterable[Union[models.SparseVector, dict]],
+        payloads: Optional[Iterable[dict]] = None,
+        ids: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Streams points to the collection, in batches of upload_batch_size points sent by
+        upload_parallel threads (one with the local mode). Each batch is sent in columns (models.Batch: the ids,
+        the dense matrix, the sparse vectors and the payloads), without a PointStruct per
+        point. The inputs are consumed lazily, one batch at a time, so they can be
+        generators (e.g. of encoded chunks) of any length.
+
+        Args:
+            dense_vectors (Union[np.ndarray, Iterable[Iterable[float]]]): The dense vectors,
+                as a matrix (one row per point) or an iterable of vectors.
+            sparse_vectors (Iterable[Union[models.SparseVector, dict]]): The sparse vectors,
+                as SparseVector or as dicts of 'indices' and 'values' arrays.
+            payloads (Optional[Iterable[dict]]): The payloads of the points.
+            ids (Optional[Iterable[str]]): The IDs of the points. If None, new UUIDs are
+                generated by the client.
+
+        Returns:
+            None
+        """
+        batches = self._batches(dense_vectors, sparse_vectors, payloads, ids)
+        options = self.client.init_options
+        # the local mode (in memory or in a folder) is not thread-safe
+        is_local = options["path"] is not None or options["location"] == ":memory:"
+        if self.upload_parallel <= 1 or is_local:
+            for batch in batches:
+                self._upsert_batch(batch)
+            return
+        with ThreadPoolExecutor(max_workers=self.upload_parallel) as executor:
+            pending: list[Future] = []
+            for batch in batches:
+                # at most upload_parallel batches in flight
+                if len(pending) >= self.upload_parallel:
+                    pending.pop(0).result()
+                pending.append(executor.submit(self._upsert_batch, batch))
+            for future in pending:
+                future.result()
+
+    def _batches(
+        self,
+        dense_vectors: Union[np.ndarray, Iterable[Iterable[float]]],
+        sparse_vectors: Iterable[Union[models.SparseVector, dict]],
+        payloads: Optional[Iterable[dict]],
+        ids: Optional[Iterable[str]],
+    ) -> Iterator[models.Batch]:
+        """Slices the points in batches of upload_batch_size points, converted to the
+        client types (the only conversion of the vectors): see upload."""
+        size = self.upload_batch_size
+        dense_iter = (
+            None if isinstance(dense_vectors, np.ndarray) else iter(dense_vectors)
         )
+        sparse_iter = iter(sparse_vectors)
+        payloads_iter = None if payloads is None else iter(payloads)
+        ids_iter = None if ids is None else iter(ids)
+        start = 0
+        while True:
+            if dense_iter is None:
+                dense_batch = dense_vectors[start : start + size]
+            else:
+                dense_batch = list(islice(dense_iter, size))
+            if len(dense_batch) == 0:
+                return
+            start += len(dense_batch)
+            yield models.Batch(
+                ids=(
+                    [str(uuid4()) for _ in range(len(dense_batch))]
+                    if ids_iter is None
+                    else list(islice(ids_iter, size))
+                ),
+                vectors={
+                    self.dense_vect_name: as_dense_lists(dense_batch),
+                    self.sparse_vect_name: [
+                        as_sparse_vector(vector) for vector in islice(sparse_iter, size)
+                    ],
+                },
+                payloads=(
+                    None if payloads_iter is None else list(islice(payloads_iter, size))
+                ),
+            )
+
+    def _upsert_batch(self, batch: models.Batch, max_retries: int = 3) -> None:
+        """Sends a batch of points, retried up to max_retries times on failure."""
+        for attempt in range(max_retries):
+            try:
+                # not waiting for the points to be indexed, as upload_collection
+                self.client.upsert(
+                    collection_name=self.coll_name, points=batch, wait=False
+                )
+                return
+            except Exception:
+                if attempt == max_retries - 1:
+                    raise
+
+    def flush(self) -> None:
+        """Makes the changes durable and fast to search: nothing to do, as Qdrant
+        persists and indexes each request itself (see NumpyEngine.flush).
+
+        Returns:
+            None
+        """
+
+    def delete_points(self, ids: list[str]) -> None:
+        """Deletes points from the collection.
+
+        Args:
+            ids (list[str]): list of the IDs of the points to delete.
+
+        Returns:
+            None
+        """
+        if len(ids) > 0:
+            self.client.delete(
+                collection_name=self.coll_name,
+                points_selector=models.PointIdsList(points=ids),
+            )
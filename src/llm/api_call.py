@@ -1,15 +1,19 @@
 import json
 import logging
 import os
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 import requests
 
 from llm.prompt import get_prompt_1, get_prompt_2
-from retrieval.search_qd import main_search
-from retrieval.vdb_wrapper import SearchInVdb
+from retrieval.filters import Filters
+from retrieval.search_qd import get_point_texts, main_search
+from utility.doc_store import DocStore
 from utility.read_config import get_config_from_path
 
+if TYPE_CHECKING:
+    from retrieval.backend import Searcher
+
 dct_config = get_config_from_path("config.yaml")
 LLM_MODEL_NAME = dct_config["RAG"]["LLM_MODEL_NAME"]
 
@@ -131,13 +135,23 @@ def awan_model_chat(usr_content_msg: str) -> str:
     return response_str
 
 
-def main_api_call(searcher: SearchInVdb, question: str, rewriting: bool = True) -> str:
+def main_api_call(
+    searcher: "Searcher",
+    question: str,
+    rewriting: bool = True,
+    doc_store: Optional[DocStore] = None,
+    filters: Optional[Filters] = None,
+) -> str:
     """Handles the main API call flow including question refinement and searching.
 
     Args:
-        searcher (SearchInVdb): The SearchInVdb instance used for searching.
+        searcher (Searcher): The searcher (SearchInVdb or NumpyEngine) used for searching.
         question (str): The user's question to process.
         rewriting (bool): Whether to refine the question using the LLM.
+        doc_store (Optional[DocStore]): The document store of the chunks text, if any
+            (otherwise the text is read from the points payloads).
+        filters (Optional[Filters]): The conditions on the payloads of the points
+            retrieved (see retrieval.filters).
 
     Returns:
         str: The final response text from the LLM after processing.
@@ -151,8 +165,8 @@ def main_api_call(searcher: SearchInVdb, question: str, rewriting: bool = True)
     else:
         _question = question
 
-    lst_points = main_search(searcher, query_text=_question)
-    dct_points = {i: point.payload['text'] for i, point in enumerate(lst_points)}
+    lst_points = main_search(searcher, query_text=_question, filters=filters)
+    dct_points = dict(enumerate(get_point_texts(lst_points, doc_store)))
 
     p2 = get_prompt_2(context=dct_points, question=_question)
     logging.debug(f"RAG prompt: {p2}")
@@ -164,7 +178,9 @@ def main_api_call(searcher: SearchInVdb, question: str, rewriting: bool = True)
 
 if __name__ == "__main__":
     from dotenv import load_dotenv
-    from qdrant_client.qdrant_client import QdrantClient
+
+    from retrieval.backend import open_vector_store
+    from utility.doc_store import get_doc_store_params, open_doc_store
 
     load_dotenv()
 
@@ -174,10 +190,8 @@ if __name__ == "__main__":
     logging.debug(
         f'Looking for vec db files in: {dct_config["VECTOR_DB"]["PATH_TO_FOLDER"]}'
     )
-    client = QdrantClient(path=dct_config["VECTOR_DB"]["PATH_TO_FOLDER"])
-    searcher = SearchInVdb(
-        client=client, coll_name=dct_config["VECTOR_DB"]["COLLECTION_NAME"]
-    )
+    _, _, searcher = open_vector_store(dct_config)
+    doc_store = open_doc_store(**get_doc_store_params(dct_config))
 
     print(
         """Hi! Please provide here your question regarding one of the articles which have been loaded."""
@@ -185,6 +199,9 @@ if __name__ == "__main__":
     question = input("your question >>>")
     # hi, my name is richmond jorge, i'm a software eng, well yaaa use to..ive been a scientist you know..sort of...been to NASA twice, yeah...great stuff.. ahahahhah...just wanna know whether there are any info a bout you know scintillators, I mean particle energy and stuff like that
     response = main_api_call(
-        searcher, question, rewriting=dct_config["RAG"]["QUERY_REWRITING"]
+        searcher,
+        question,
+        rewriting=dct_config["RAG"]["QUERY_REWRITING"],
+        doc_store=doc_store,
     )
     print("RESPONSE: ", response)
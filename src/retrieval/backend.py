@@ -0,0 +1,69 @@
+import os
+from typing import TYPE_CHECKING, Optional, Union
+
+if TYPE_CHECKING:
+    # imported by open_vector_store for the configured engine only, to keep this
+    # module (and the entry points importing it) fast to import
+    from qdrant_client import QdrantClient
+
+    from ingestion.vdb_wrapper import LoadInVdb
+    from retrieval.numpy_engine import NumpyEngine
+    from retrieval.vdb_wrapper import SearchInVdb
+
+Loader = Union["LoadInVdb", "NumpyEngine"]
+Searcher = Union["SearchInVdb", "NumpyEngine"]
+
+
+def open_vector_store(
+    dct_config: dict,
+) -> tuple[Optional["QdrantClient"], Loader, Searcher]:
+    """
+    Opens the collection of the configured engine (VECTOR_DB.ENGINE).
+
+    Args:
+        dct_config (dict): The parsed configuration.
+
+    Returns:
+        tuple[Optional[QdrantClient], Loader, Searcher]: The Qdrant client (None for the
+            'numpy' and 'faiss' engines), the loader and the searcher of the collection.
+
+    Raises:
+        ValueError: If the engine is not managed.
+    """
+    engine = dct_config["VECTOR_DB"].get("ENGINE", "qdrant")
+    coll_name = dct_config["VECTOR_DB"]["COLLECTION_NAME"]
+    if engine == "qdrant":
+        from qdrant_client import QdrantClient
+
+        from ingestion.vdb_wrapper import LoadInVdb, get_loader_params
+        from retrieval.vdb_wrapper import SearchInVdb, get_searcher_params
+
+        client = QdrantClient(path=dct_config["VECTOR_DB"]["PATH_TO_FOLDER"])
+        loader = LoadInVdb(
+            client=client, coll_name=coll_name, **get_loader_params(dct_config)
+        )
+        searcher = SearchInVdb(
+            client=client, coll_name=coll_name, **get_searcher_params(dct_config)
+        )
+        return client, loader, searcher
+    if engine == "numpy":
+        from retrieval.numpy_engine import NumpyEngine
+
+        numpy_engine = NumpyEngine(
+            path=os.path.join(dct_config["VECTOR_DB"]["NUMPY_PATH"], coll_name),
+            coll_name=coll_name,
+            dtype=dct_config["VECTOR_DB"].get("NUMPY_DTYPE", "float32"),
+        )
+        return None, numpy_engine, numpy_engine
+    if engine == "faiss":
+        # faiss is an optional dependency (see requirements.txt)
+        from retrieval.faiss_engine import FaissEngine, get_faiss_params
+
+        faiss_engine = FaissEngine(
+            path=os.path.join(dct_config["FAISS"]["PATH"], coll_name),
+            coll_name=coll_name,
+            dtype=dct_config["VECTOR_DB"].get("NUMPY_DTYPE", "float32"),
+            **get_faiss_params(dct_config),
+        )
+        return None, faiss_engine, faiss_engine
+    raise ValueError(f"Vector store engine not managed: {engine}")
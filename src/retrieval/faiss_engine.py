@@ -0,0 +1,437 @@
+import hashlib
+import json
+import os
+from typing import Iterable, Optional, Union
+from uuid import uuid4
+
+import faiss
+import numpy as np
+
+from retrieval.numpy_engine import NumpyEngine, _Segment, _top_k
+from retrieval.vdb_wrapper import DenseVectorLike
+
+INDEX_TYPES = ["flat", "ivf", "hnsw", "pq", "ivfpq"]
+METRICS = ["cosine", "ip", "l2"]
+
+# filtered points up to which the dense search is exact, without the index (as the
+# full scan threshold of Qdrant): faster, and an HNSW search with a selective filter
+# loses recall
+_EXACT_SEARCH_MAX_ROWS = 10000
+
+
+def get_faiss_params(dct_config: dict) -> dict:
+    """
+    Reads from the configuration the parameters of FaissEngine.
+
+    Args:
+        dct_config (dict): The parsed configuration.
+
+    Returns:
+        dict: The keyword arguments to pass to FaissEngine.
+    """
+    return {
+        "index_type": dct_config["FAISS"]["INDEX_TYPE"],
+        "metric": dct_config["FAISS"]["METRIC"],
+        "nlist": dct_config["FAISS"]["NLIST"],
+        "nprobe": dct_config["FAISS"]["NPROBE"],
+        "hnsw_m": dct_config["FAISS"]["HNSW_M"],
+        "hnsw_ef_search": dct_config["FAISS"]["HNSW_EF_SEARCH"],
+        "pq_m": dct_config["FAISS"]["PQ_M"],
+    }
+
+
+def point_key(point_id: str) -> int:
+    """
+    Computes the FAISS id (a non-negative int64) of a point id, from its hash: it
+    only depends on the point id, so it is stable across runs and index rebuilds.
+
+    Args:
+        point_id (str): The point id.
+
+    Returns:
+        int: The FAISS id.
+    """
+    digest = hashlib.blake2b(str(point_id).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 1
+
+
+def build_faiss_index(
+    dim: int,
+    n_train: int,
+    index_type: str = "flat",
+    metric: str = "cosine",
+    nlist: int = 1024,
+    hnsw_m: int = 32,
+    pq_m: int = 16,
+) -> faiss.Index:
+    """
+    Builds an empty FAISS index, which addresses the vectors by id: the IVF indexes
+    store the ids in their inverted lists, the others are wrapped in an IndexIDMap2
+    (IndexIDMap does not support removals from an IVF index, whose positions do not
+    shift).
+
+    Args:
+        dim (int): The dimension of the vectors.
+        n_train (int): The number of vectors the index will be trained on: the number
+            of IVF lists and of PQ centroids are reduced for small collections.
+        index_type (str): 'flat' (exact), 'ivf' (inverted lists), 'hnsw' (graph), 'pq'
+            (product quantization) or 'ivfpq' (inverted lists of PQ codes).
+        metric (str): 'cosine' (inner product of normalized vectors), 'ip' or 'l2'.
+        nlist (int): The number of inverted lists of the IVF indexes.
+        hnsw_m (int): The number of edges per node of the HNSW graph.
+        pq_m (int): The number of sub-quantizers of the PQ indexes (dividing dim).
+
+    Returns:
+        faiss.Index: The index (to be trained if not is_trained).
+
+    Raises:
+        ValueError: If the index type or the metric is not managed.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"FAISS index type not managed: {index_type}")
+    if metric not in METRICS:
+        raise ValueError(f"FAISS metric not managed: {metric}")
+
+    faiss_metric = faiss.METRIC_L2 if metric == "l2" else faiss.METRIC_INNER_PRODUCT
+    # faiss wants at least 39 training points per IVF list and per PQ centroid
+    nlist = max(1, min(nlist, n_train // 39))
+    nbits = int(np.clip(np.log2(max(n_train // 39, 2)), 1, 8))
+    if index_type == "ivf":
+        quantizer = faiss.IndexFlat(dim, faiss_metric)
+        return faiss.IndexIVFFlat(quantizer, dim, nlist, faiss_metric)
+    if index_type == "ivfpq":
+        quantizer = faiss.IndexFlat(dim, faiss_metric)
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, nbits, faiss_metric)
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m, faiss_metric)
+    elif index_type == "pq":
+        index = faiss.IndexPQ(dim, pq_m, nbits, faiss_metric)
+    else:
+        index = faiss.IndexFlat(dim, faiss_metric)
+    return faiss.IndexIDMap2(index)
+
+
+class FaissEngine(NumpyEngine):
+    def __init__(
+        self,
+        path: str,
+        coll_name: str,
+        dtype: str = "float32",
+        index_type: str = "flat",
+        metric: str = "cosine",
+        nlist: int = 1024,
+        nprobe: int = 16,
+        hnsw_m: int = 32,
+        hnsw_ef_search: int = 64,
+        pq_m: int = 16,
+    ):
+        """
+        Initializes the FaissEngine instance: a NumpyEngine whose dense search runs on
+        a FAISS index, with the same interfaces as LoadInVdb and SearchInVdb.
+
+        The points (dense and sparse vectors, ids and payloads) are stored as by the
+        NumpyEngine: the payloads (e.g. the chunks text) in a memory-mapped
+        random-access file, the sparse vectors searched with its inverted index. The
+        dense vectors are added to the FAISS index as they are uploaded, under ids
+        derived from the point ids (see point_key), and removed with the points: it is
+        read in memory once for the whole update session, and its file, which holds the
+        points of the last flush, is only replaced by the next flush. It is loaded
+        memory-mapped (IO_FLAG_MMAP) when up to date, and rebuilt from the stored
+        vectors when missing or out of date (e.g. after a crash, or after a deletion
+        from an HNSW index, which does not support removals); the IVF and PQ indexes
+        are trained on the vectors stored when it is built.
+
+        Args:
+            path (str): The folder of the collection files.
+            coll_name (str): The name of the collection.
+            dtype (str): The dtype of the stored dense vectors ('float32' or 'float16').
+            index_type (str): The FAISS index type (see build_faiss_index).
+            metric (str): 'cosine', 'ip' (inner product) or 'l2'.
+            nlist (int): The number of inverted lists of the IVF indexes.
+            nprobe (int): The number of inverted lists searched by the IVF indexes.
+            hnsw_m (int): The number of edges per node of the HNSW graph.
+            hnsw_ef_search (int): The candidates list size of the HNSW search.
+            pq_m (int): The number of sub-quantizers of the PQ indexes.
+        """
+        super().__init__(path, coll_name, dtype)
+        self.normalize = metric == "cosine"
+        self.index_kwargs = {
+            "index_type": index_type,
+            "metric": metric,
+            "nlist": nlist,
+            "hnsw_m": hnsw_m,
+            "pq_m": pq_m,
+        }
+        self.nprobe = nprobe
+        self.hnsw_ef_search = hnsw_ef_search
+        self.index_path = os.path.join(path, "dense.faiss")
+        # the sequence number of the merged segment the index file holds
+        self._index_stamp_path = os.path.join(path, "dense.json")
+        self._index: Optional[faiss.Index] = None
+        self._index_mmap = False
+        # the FAISS ids in the HNSW index (which cannot replace its vectors)
+        self._hnsw_keys: Optional[set[int]] = None
+        self._keys: Optional[tuple[_Segment, np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def _load_index(self, writable: bool = False) -> Optional[faiss.Index]:
+        """
+        Returns the FAISS index, read from its file if needed: memory-mapped, or in
+        memory when it is to be modified.
+
+        Args:
+            writable (bool): If True, the index is to be modified.
+
+        Returns:
+            Optional[faiss.Index]: The index, None if not built yet.
+        """
+        if self._index is not None and not (writable and self._index_mmap):
+            return self._index
+        if not self._index_file_is_current():
+            return None
+        flags = 0 if writable else faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        self._set_index(faiss.read_index(self.index_path, flags), mmap=not writable)
+        return self._index
+
+    def _index_file_is_current(self) -> bool:
+        """Whether the index file holds the stored points: it was saved by the flush of
+        the merged segment, and no point was uploaded or deleted since."""
+        base, segments = self._folders()
+        if base is None or len(segments) > 0 or len(self._tombstones()) > 0:
+            return False
+        if not os.path.exists(self.index_path):
+            return False
+        if not os.path.exists(self._index_stamp_path):
+            return False
+        with open(self._index_stamp_path, "r", encoding="utf-8") as file:
+            return json.load(file)["base"] == base[0]
+
+    def _set_index(self, index: Optional[faiss.Index], mmap: bool = False) -> None:
+        self._index, self._index_mmap = index, mmap
+        self._hnsw_keys = None
+
+    def _writable_index(self) -> Optional[faiss.Index]:
+        """The FAISS index, to be modified in memory: to be called before the points
+        are stored, while the index file is still up to date."""
+        return self._load_index(writable=True)
+
+    def _build_index(self, view: _Segment) -> faiss.Index:
+        """
+        Builds (and trains) the FAISS index of all the stored points.
+
+        Args:
+            view (_Segment): The stored points.
+
+        Returns:
+            faiss.Index: The index.
+        """
+        vectors = np.ascontiguousarray(view.dense, dtype=np.float32)
+        index = build_faiss_index(vectors.shape[1], len(vectors), **self.index_kwargs)
+        if not index.is_trained:
+            index.train(vectors)
+        keys = np.fromiter((point_key(i) for i in view.ids.tolist()), dtype=np.int64)
+        index.add_with_ids(vectors, keys)
+        self._set_index(index)
+        return index
+
+    def _synced_index(self, view: _Segment) -> faiss.Index:
+        """The FAISS index, rebuilt if it does not hold all the stored points."""
+        index = self._load_index()
+        if index is None or index.ntotal != len(view):
+            index = self._build_index(view)
+        return index
+
+    def _view_keys(self, view: _Segment) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The FAISS ids of the stored points (one per row), sorted, and their rows."""
+        if self._keys is None or self._keys[0] is not view:
+            view_keys = np.fromiter(
+                (point_key(i) for i in view.ids.tolist()), dtype=np.int64
+            )
+            order = np.argsort(view_keys)
+            self._keys = (view, view_keys, view_keys[order], order)
+        return self._keys[1:]
+
+    def _rows_of(self, view: _Segment, keys: np.ndarray) -> np.ndarray:
+        """
+        Finds the rows of the stored points with the given FAISS ids.
+
+        Args:
+            view (_Segment): The stored points.
+            keys (np.ndarray): The FAISS ids.
+
+        Returns:
+            np.ndarray: The rows (-1 for the unknown ids).
+        """
+        _, sorted_keys, order = self._view_keys(view)
+        pos = np.clip(np.searchsorted(sorted_keys, keys), 0, max(len(order) - 1, 0))
+        found = (len(order) > 0) & (sorted_keys[pos] == keys)
+        return np.where(found, order[pos], -1)
+
+    def setup_collection(self, is_fresh_start: bool = False) -> None:
+        """
+        Ensures that the collection folder exists.
+
+        Args:
+            is_fresh_start (bool): If True, removes the existing collection before re-creation.
+
+        Returns:
+            None
+        """
+        super().setup_collection(is_fresh_start)
+        if is_fresh_start:
+            self._set_index(None)
+            self._keys = None
+
+    def upload(
+        self,
+        dense_vectors: Union[np.ndarray, Iterable[Iterable[float]]],
+        sparse_vectors: Iterable[dict],
+        payloads: Optional[Iterable[dict]] = None,
+        ids: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Adds points to the collection (points with the id of an existing point
+        replace it), and their dense vectors to the FAISS index, if built and trained.
+
+        Args:
+            dense_vectors (Union[np.ndarray, Iterable[Iterable[float]]]): The dense vectors.
+            sparse_vectors (Iterable[dict]): The sparse vectors, as dicts of 'indices'
+                and 'values' arrays (or as models.SparseVector).
+            payloads (Optional[Iterable[dict]]): The payloads of the points.
+            ids (Optional[Iterable[str]]): The IDs of the points. If None, new UUIDs are generated.
+
+        Returns:
+            None
+        """
+        dense_vectors = np.array(list(dense_vectors), dtype=np.float32)
+        ids = [str(uuid4()) for _ in dense_vectors] if ids is None else list(ids)
+        index = self._writable_index()
+        super().upload(dense_vectors, sparse_vectors, payloads, ids)
+
+        if index is None or not index.is_trained or len(ids) == 0:
+            return
+        keys = np.fromiter((point_key(i) for i in ids), dtype=np.int64)
+        if self.index_kwargs["index_type"] == "hnsw":
+            if self._hnsw_keys is None:
+                self._hnsw_keys = set(faiss.vector_to_array(index.id_map).tolist())
+            # HNSW does not support removals: rebuilt when searched if points are replaced
+            if not self._hnsw_keys.isdisjoint(keys.tolist()):
+                self._set_index(None)
+                return
+            self._hnsw_keys.update(keys.tolist())
+        else:
+            index.remove_ids(faiss.IDSelectorBatch(keys))
+        if self.normalize:
+            faiss.normalize_L2(dense_vectors)
+        index.add_with_ids(dense_vectors, keys)
+
+    def delete_points(self, ids: list[str]) -> None:
+        """Deletes points from the collection and from the FAISS index.
+
+        Args:
+            ids (list[str]): list of the IDs of the points to delete.
+
+        Returns:
+            None
+        """
+        index = self._writable_index()
+        super().delete_points(ids)
+        if index is None or len(ids) == 0:
+            return
+        if self.index_kwargs["index_type"] == "hnsw":
+            self._set_index(None)  # rebuilt when searched
+            return
+        keys = np.fromiter((point_key(i) for i in ids), dtype=np.int64)
+        index.remove_ids(faiss.IDSelectorBatch(keys))
+
+    def flush(self) -> None:
+        """
+        Merges the stored points (see NumpyEngine.flush) and saves the FAISS index,
+        with the sequence number of the merged segment it holds.
+
+        Returns:
+            None
+        """
+        super().flush()
+        view = self._load()
+        if view is None:
+            self._set_index(None)
+            for file_path in (self.index_path, self._index_stamp_path):
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            return
+        index = self._synced_index(view)
+        if not self._index_mmap:
+            faiss.write_index(index, self.index_path + ".tmp")
+            os.replace(self.index_path + ".tmp", self.index_path)
+            with open(self._index_stamp_path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump({"base": self._folders()[0][0]}, file)
+            os.replace(self._index_stamp_path + ".tmp", self._index_stamp_path)
+
+    def _exact_rank(
+        self, view: _Segment, query: np.ndarray, rows: np.ndarray, k: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """The rows and the scores (as the ones of the index) of the k best points
+        among some rows, scored exactly with the stored vectors."""
+        vectors = view.dense[rows].astype(np.float32)
+        if self.index_kwargs["metric"] == "l2":
+            scores = ((vectors - query) ** 2).sum(axis=1)  # squared distances
+            top = _top_k(-scores, k)
+        else:
+            scores = vectors @ query
+            top = _top_k(scores, k)
+        return rows[top], scores[top]
+
+    def _dense_rank(
+        self,
+        view: _Segment,
+        query_vector: DenseVectorLike,
+        k: int,
+        hnsw_ef: Optional[int] = None,
+        mask: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """The rows and the scores (similarity, or distance for 'l2') of the k best
+        points for a dense vector, searched in the FAISS index; with a mask, among the
+        filtered points: scored exactly if they are few, otherwise searched in the
+        index restricted to their ids."""
+        if mask is not None and not mask.any():
+            return np.zeros(0, np.int64), np.zeros(0, np.float32)
+        index = self._synced_index(view)
+        query = np.asarray(query_vector, dtype=np.float32).reshape(1, -1).copy()
+        if self.normalize:
+            faiss.normalize_L2(query)
+
+        inner = faiss.downcast_index(index.index) if hasattr(index, "id_map") else index
+        if isinstance(inner, faiss.IndexHNSW):
+            inner.hnsw.efSearch = self.hnsw_ef_search if hnsw_ef is None else hnsw_ef
+            params = faiss.SearchParametersHNSW()
+            params.efSearch = inner.hnsw.efSearch
+        elif isinstance(inner, faiss.IndexIVF):
+            inner.nprobe = self.nprobe
+            params = faiss.SearchParametersIVF()
+            params.nprobe = self.nprobe
+        else:
+            params = faiss.SearchParameters()
+
+        if mask is None:
+            scores, keys = index.search(query, min(k, len(view)))
+        elif mask.sum() <= _EXACT_SEARCH_MAX_ROWS:
+            return self._exact_rank(view, query[0], np.flatnonzero(mask), k)
+        elif isinstance(inner, faiss.IndexPQ):
+            # IndexPQ takes no search params: the search is widened until k of the
+            # points found are filtered in
+            n_fetch = k
+            while True:
+                scores, keys = index.search(query, min(n_fetch, len(view)))
+                rows = self._rows_of(view, keys[0])
+                found = (keys[0] >= 0) & (rows >= 0) & mask[rows]
+                if found.sum() >= k or n_fetch >= len(view):
+                    break
+                n_fetch *= 4
+            return rows[found][:k], scores[0][found][:k]
+        else:
+            view_keys, _, _ = self._view_keys(view)
+            selector = faiss.IDSelectorBatch(view_keys[mask])
+            params.sel = selector
+            scores, keys = index.search(query, min(k, int(mask.sum())), params=params)
+        rows = self._rows_of(view, keys[0][keys[0] >= 0])
+        return rows[rows >= 0], scores[0][keys[0] >= 0][rows >= 0]
@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+if TYPE_CHECKING:
+    from qdrant_client import models
+
+# payload fields recorded at ingestion, with the type of their payload index
+PAYLOAD_SCHEMA = {
+    "source_id": "keyword",  # the arXiv id of the document
+    "keywords": "keyword",  # the search keywords the document was downloaded for
+    "title": "keyword",
+    "published": "datetime",  # ISO 8601
+    "section": "keyword",  # the heading the chunk belongs to
+    "chunk_index": "integer",  # the position of the chunk in the document
+}
+
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+
+# the filters of a search: for each payload field, a value (the field must be equal
+# to it, or contain it if a list), a list of values (any of them) or a range (a dict
+# of RANGE_OPERATORS, e.g. {"gte": "2024-01-01"}); the conditions must all hold
+Filters = dict[str, Any]
+
+
+def is_range(condition: Any) -> bool:
+    """
+    Tells whether a filter condition is a range.
+
+    Args:
+        condition (Any): The condition.
+
+    Returns:
+        bool: True if the condition is a range.
+
+    Raises:
+        ValueError: If the condition is a dict of other keys than RANGE_OPERATORS.
+    """
+    if not isinstance(condition, dict):
+        return False
+    if len(condition) == 0 or not set(condition).issubset(RANGE_OPERATORS):
+        raise ValueError(
+            f"Filter range not managed: {condition} (expected keys in {RANGE_OPERATORS})"
+        )
+    return True
+
+
+def as_timestamp(value: Union[str, int, float]) -> float:
+    """
+    Converts a range bound or a payload value to a number: ISO 8601 dates and
+    datetimes (UTC if without timezone) to POSIX timestamps.
+
+    Args:
+        value (Union[str, int, float]): The value.
+
+    Returns:
+        float: The number.
+    """
+    if not isinstance(value, str):
+        return float(value)
+    date = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
+
+
+def to_qdrant_filter(filters: Optional[Filters]) -> Optional["models.Filter"]:
+    """
+    Converts search filters to a Qdrant filter.
+
+    Args:
+        filters (Optional[Filters]): The filters.
+
+    Returns:
+        Optional[models.Filter]: The Qdrant filter, None if there are no filters.
+    """
+    if not filters:
+        return None
+    from qdrant_client import models
+
+    conditions = []
+    for key, condition in filters.items():
+        if is_range(condition):
+            is_datetime = PAYLOAD_SCHEMA.get(key) == "datetime" or any(
+                isinstance(bound, str) for bound in condition.values()
+            )
+            range_type = models.DatetimeRange if is_datetime else models.Range
+            conditions.append(
+                models.FieldCondition(key=key, range=range_type(**condition))
+            )
+        elif isinstance(condition, (list, tuple, set)):
+            conditions.append(
+                models.FieldCondition(
+                    key=key, match=models.MatchAny(any=list(condition))
+                )
+            )
+        else:
+            conditions.append(
+                models.FieldCondition(key=key, match=models.MatchValue(value=condition))
+            )
+    return models.Filter(must=conditions)
@@ -0,0 +1,740 @@
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from typing import Iterable, Optional, Union
+from uuid import uuid4
+
+import numpy as np
+from qdrant_client import models
+
+from retrieval.filters import Filters, as_timestamp, is_range
+from retrieval.vdb_wrapper import DenseVectorLike, SparseVectorLike
+
+# the k of the reciprocal rank fusion, 1 / (RRF_K + rank) with 0-based ranks: the one
+# of Qdrant, so that the scores of hybrid_qd match the ones of SearchInVdb
+RRF_K = 2
+
+# rows of the dense matrix scored at once (bounds the float32 copy of a float16 matrix)
+_DENSE_BLOCK_ROWS = 2**16
+
+_ARRAYS = ["dense", "ids", "sparse_ptr", "sparse_terms", "sparse_values"]
+_ARRAYS += ["payload_bytes", "payload_ptr"]
+_INVERTED_ARRAYS = ["inverted_ptr", "inverted_docs", "inverted_values"]
+
+
+@dataclass
+class _Segment:
+    """
+    A set of points: their (normalized) dense vectors (one row each), their ids, their
+    sparse vectors (CSR, one row each), their JSON payloads (concatenated, with
+    offsets) and, once merged, the inverted index of the sparse vectors (CSR, one row
+    per vocabulary term, holding the points with that term and its weight).
+    """
+
+    dense: np.ndarray
+    ids: np.ndarray
+    sparse_ptr: np.ndarray
+    sparse_terms: np.ndarray
+    sparse_values: np.ndarray
+    payload_bytes: np.ndarray
+    payload_ptr: np.ndarray
+    inverted_ptr: Optional[np.ndarray] = None
+    inverted_docs: Optional[np.ndarray] = None
+    inverted_values: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def save(self, path: str) -> None:
+        """
+        Saves the arrays in a new folder, as .npy files; the folder appears once complete.
+
+        Args:
+            path (str): The path of the folder.
+        """
+        tmp_path = path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        names = _ARRAYS + (_INVERTED_ARRAYS if self.inverted_ptr is not None else [])
+        for name in names:
+            np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(self, name))
+        os.rename(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "_Segment":
+        """
+        Loads the arrays of a folder, memory-mapped (read only).
+
+        Args:
+            path (str): The path of the folder.
+
+        Returns:
+            _Segment: The segment.
+        """
+        arrays = {}
+        for name in _ARRAYS + _INVERTED_ARRAYS:
+            file_path = os.path.join(path, f"{name}.npy")
+            if os.path.exists(file_path):
+                arrays[name] = np.load(file_path, mmap_mode="r")
+        return cls(**arrays)
+
+    @classmethod
+    def from_points(
+        cls,
+        dense_vectors: np.ndarray,
+        sparse_vectors: list[dict],
+        payloads: list[dict],
+        ids: list[str],
+        dtype: str,
+        normalize: bool = True,
+    ) -> "_Segment":
+        """
+        Builds a segment from a batch of points.
+
+        Args:
+            dense_vectors (np.ndarray): The dense vectors (one row per point).
+            sparse_vectors (list[dict]): The sparse vectors indices and values.
+            payloads (list[dict]): The payloads.
+            ids (list[str]): The ids.
+            dtype (str): The dtype of the stored dense vectors.
+            normalize (bool): If True, the dense vectors are stored normalized.
+
+        Returns:
+            _Segment: The segment.
+        """
+        dense = np.asarray(dense_vectors, dtype=np.float32)
+        if normalize:
+            norms = np.linalg.norm(dense, axis=1, keepdims=True)
+            dense = dense / np.where(norms > 0, norms, 1)
+        dense = dense.astype(dtype)
+
+        lengths = [len(vector["indices"]) for vector in sparse_vectors]
+        payload_chunks = [json.dumps(p).encode("utf-8") for p in payloads]
+        return cls(
+            dense=dense,
+            ids=np.asarray(ids, dtype=str),
+            sparse_ptr=np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+            sparse_terms=np.concatenate(
+                [np.asarray(v["indices"], dtype=np.int32) for v in sparse_vectors]
+                + [np.zeros(0, np.int32)]
+            ),
+            sparse_values=np.concatenate(
+                [np.asarray(v["values"], dtype=np.float32) for v in sparse_vectors]
+                + [np.zeros(0, np.float32)]
+            ),
+            payload_bytes=np.frombuffer(b"".join(payload_chunks), dtype=np.uint8),
+            payload_ptr=np.concatenate(
+                [[0], np.cumsum([len(c) for c in payload_chunks])]
+            ).astype(np.int64),
+        )
+
+    def take(self, rows: np.ndarray) -> "_Segment":
+        """
+        Selects some points (without their inverted index).
+
+        Args:
+            rows (np.ndarray): The rows of the points.
+
+        Returns:
+            _Segment: The segment of the points.
+        """
+        sparse_rows = _csr_rows(self.sparse_ptr, rows)
+        payload_rows = _csr_rows(self.payload_ptr, rows)
+        return _Segment(
+            dense=self.dense[rows],
+            ids=self.ids[rows],
+            sparse_ptr=_csr_ptr(self.sparse_ptr, rows),
+            sparse_terms=self.sparse_terms[sparse_rows],
+            sparse_values=self.sparse_values[sparse_rows],
+            payload_bytes=self.payload_bytes[payload_rows],
+            payload_ptr=_csr_ptr(self.payload_ptr, rows),
+        )
+
+    def payload(self, row: int) -> dict:
+        data = self.payload_bytes[self.payload_ptr[row] : self.payload_ptr[row + 1]]
+        return json.loads(data.tobytes())
+
+
+class _PayloadIndex:
+    def __init__(self, segment: _Segment):
+        """
+        Initializes the _PayloadIndex instance: the in-memory index of the payload
+        fields of a segment, built per field when first filtered on. For the matches,
+        the rows of each value (of each item of the list values); for the ranges, the
+        numeric values (the dates as timestamps) sorted, with their rows.
+
+        Args:
+            segment (_Segment): The segment.
+        """
+        self.segment = segment
+        self._payloads: Optional[list[dict]] = None
+        self._matches: dict[str, dict] = {}
+        self._ranges: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+
+    def _field_values(self, key: str) -> Iterable[tuple[int, object]]:
+        """The (row, value) pairs of a payload field, one per item of the list values."""
+        if self._payloads is None:
+            self._payloads = [self.segment.payload(r) for r in range(len(self.segment))]
+        for row, payload in enumerate(self._payloads):
+            value = payload.get(key)
+            for item in value if isinstance(value, list) else [value]:
+                if item is not None:
+                    yield row, item
+
+    def _match_rows(self, key: str, values: list) -> np.ndarray:
+        if key not in self._matches:
+            rows_of = {}
+            for row, value in self._field_values(key):
+                if isinstance(value, (str, int)):
+                    rows_of.setdefault(value, []).append(row)
+            self._matches[key] = {
+                value: np.asarray(rows, dtype=np.int64)
+                for value, rows in rows_of.items()
+            }
+        return np.concatenate(
+            [self._matches[key].get(value, np.zeros(0, np.int64)) for value in values]
+            + [np.zeros(0, np.int64)]
+        )
+
+    def _range_rows(self, key: str, condition: dict) -> np.ndarray:
+        if key not in self._ranges:
+            rows, numbers = [], []
+            for row, value in self._field_values(key):
+                try:
+                    numbers.append(as_timestamp(value))
+                except (TypeError, ValueError):
+                    continue  # neither a number nor a date
+                rows.append(row)
+            order = np.argsort(numbers, kind="stable")
+            self._ranges[key] = (
+                np.asarray(numbers, dtype=np.float64)[order],
+                np.asarray(rows, dtype=np.int64)[order],
+            )
+        numbers, rows = self._ranges[key]
+        start, end = 0, len(numbers)
+        if "gt" in condition:
+            start = max(
+                start, np.searchsorted(numbers, as_timestamp(condition["gt"]), "right")
+            )
+        if "gte" in condition:
+            start = max(
+                start, np.searchsorted(numbers, as_timestamp(condition["gte"]), "left")
+            )
+        if "lt" in condition:
+            end = min(
+                end, np.searchsorted(numbers, as_timestamp(condition["lt"]), "left")
+            )
+        if "lte" in condition:
+            end = min(
+                end, np.searchsorted(numbers, as_timestamp(condition["lte"]), "right")
+            )
+        return rows[start:end]
+
+    def mask(self, filters: Filters) -> np.ndarray:
+        """
+        Finds the points matching filters.
+
+        Args:
+            filters (Filters): The filters (see retrieval.filters).
+
+        Returns:
+            np.ndarray: The boolean mask of the matching points.
+        """
+        mask = np.ones(len(self.segment), dtype=bool)
+        for key, condition in filters.items():
+            if is_range(condition):
+                rows = self._range_rows(key, condition)
+            elif isinstance(condition, (list, tuple, set)):
+                rows = self._match_rows(key, list(condition))
+            else:
+                rows = self._match_rows(key, [condition])
+            matching = np.zeros(len(self.segment), dtype=bool)
+            matching[rows] = True
+            mask &= matching
+        return mask
+
+
+def _csr_ptr(ptr: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """The row pointers of the selected rows of a CSR structure."""
+    return np.concatenate([[0], np.cumsum(ptr[rows + 1] - ptr[rows])]).astype(np.int64)
+
+
+def _csr_rows(ptr: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """The positions (in the data arrays) of the entries of the selected rows of a CSR."""
+    lengths = ptr[rows + 1] - ptr[rows]
+    starts = np.repeat(ptr[rows] - _csr_ptr(ptr, rows)[:-1], lengths)
+    return starts + np.arange(lengths.sum(), dtype=np.int64)
+
+
+def _merge(segments: list[_Segment], deleted: list[np.ndarray]) -> _Segment:
+    """
+    Merges segments into one, with its inverted index: the deleted points are dropped
+    and, of the points with the same id, only the last one is kept (upsert).
+
+    Args:
+        segments (list[_Segment]): The segments, oldest first.
+        deleted (list[np.ndarray]): For each segment, the mask of its deleted points.
+
+    Returns:
+        _Segment: The merged segment.
+    """
+    kept = [s.take(np.flatnonzero(~mask)) for s, mask in zip(segments, deleted)]
+    merged = _Segment(
+        dense=np.concatenate([s.dense for s in kept]),
+        ids=np.concatenate([s.ids for s in kept]),
+        sparse_ptr=np.concatenate(
+            [[0]] + [s.sparse_ptr[1:] + n for s, n in zip(kept, _offsets(kept, "sp"))]
+        ).astype(np.int64),
+        sparse_terms=np.concatenate([s.sparse_terms for s in kept]),
+        sparse_values=np.concatenate([s.sparse_values for s in kept]),
+        payload_bytes=np.concatenate([s.payload_bytes for s in kept]),
+        payload_ptr=np.concatenate(
+            [[0]] + [s.payload_ptr[1:] + n for s, n in zip(kept, _offsets(kept, "pl"))]
+        ).astype(np.int64),
+    )
+    # keep the last version of the points uploaded more than once
+    _, last_reversed = np.unique(merged.ids[::-1], return_index=True)
+    rows = np.sort(len(merged) - 1 - last_reversed)
+    if len(rows) < len(merged):
+        merged = merged.take(rows)
+
+    # inverted index: the (term, point, weight) entries sorted by term
+    docs = np.repeat(np.arange(len(merged), dtype=np.int32), np.diff(merged.sparse_ptr))
+    order = np.argsort(merged.sparse_terms, kind="stable")
+    vocab_size = int(merged.sparse_terms.max(initial=-1)) + 1
+    counts = np.bincount(merged.sparse_terms, minlength=vocab_size)
+    merged.inverted_ptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    merged.inverted_docs = docs[order]
+    merged.inverted_values = merged.sparse_values[order]
+    return merged
+
+
+def _offsets(segments: list[_Segment], kind: str) -> list[int]:
+    """The offsets of the data arrays (sparse entries or payload bytes) of the segments."""
+    sizes = [s.sparse_ptr[-1] if kind == "sp" else s.payload_ptr[-1] for s in segments]
+    return np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64).tolist()
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Finds the rows of the k highest scores, in decreasing order of score.
+
+    Args:
+        scores (np.ndarray): The scores.
+        k (int): The number of rows.
+
+    Returns:
+        np.ndarray: The rows.
+    """
+    if k < len(scores):
+        rows = np.argpartition(-scores, k)[:k]
+    else:
+        rows = np.arange(len(scores))
+    return rows[np.argsort(-scores[rows], kind="stable")]
+
+
+def rrf_fusion(rankings: list[np.ndarray], k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Fuses rankings with the reciprocal rank fusion: each item scores the sum, over
+    the rankings, of 1 / (RRF_K + its rank).
+
+    Args:
+        rankings (list[np.ndarray]): The rankings, as arrays of items (best first).
+        k (int): The number of fused items to return.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The k best items and their scores, best first.
+    """
+    items = np.concatenate(rankings)
+    ranks = np.concatenate([np.arange(len(r)) for r in rankings])
+    unique, inverse = np.unique(items, return_inverse=True)
+    scores = np.bincount(inverse, weights=1 / (RRF_K + ranks), minlength=len(unique))
+    top = _top_k(scores, k)
+    return unique[top], scores[top]
+
+
+class NumpyEngine:
+    def __init__(
+        self,
+        path: str,
+        coll_name: str,
+        dtype: str = "float32",
+    ):
+        """
+        Initializes the NumpyEngine instance: an in-process retrieval engine, with the
+        interfaces of both LoadInVdb (setup_collection, upload, delete_points) and
+        SearchInVdb (dense, sparse, hybrid_qd). The points are stored in a folder of
+        .npy files, memory-mapped when read: the dense vectors as a normalized matrix,
+        searched exactly with a matrix-vector product, and the sparse vectors with an
+        inverted index, searched with a weighted count over the postings of the query
+        terms.
+
+        Each upload is written as a new segment, each deletion recorded as a tombstone;
+        flush merges them all into a single segment, with its inverted index, which is
+        loaded instantly. Until then, the segments are merged in memory when searched.
+
+        Args:
+            path (str): The folder of the collection files.
+            coll_name (str): The name of the collection.
+            dtype (str): The dtype of the stored dense vectors ('float32' or 'float16').
+        """
+        self.path = path
+        self.coll_name = coll_name
+        self.dtype = dtype
+        # cosine similarity: the dense vectors are stored normalized
+        self.normalize = True
+        self._view: Optional[_Segment] = None
+        self._payload_index: Optional[_PayloadIndex] = None
+
+    # -- storage --------------------------------------------------------------
+
+    def _folders(self) -> tuple[Optional[tuple[int, str]], list[tuple[int, str]]]:
+        """The (sequence number, path) of the latest merged segment and of the newer segments."""
+        if not os.path.isdir(self.path):
+            return None, []
+        bases, segments = [], []
+        for name in os.listdir(self.path):
+            kind, _, seq = name.partition("-")
+            if not seq.isdigit():
+                continue
+            folder = (int(seq), os.path.join(self.path, name))
+            (bases if kind == "base" else segments).append(folder)
+        base = max(bases, default=None)
+        seq_base = -1 if base is None else base[0]
+        return base, sorted(s for s in segments if s[0] > seq_base)
+
+    def _next_seq(self) -> int:
+        base, segments = self._folders()
+        return max([s for s, _ in segments] + [-1 if base is None else base[0]]) + 1
+
+    def _tombstones(self) -> dict[str, int]:
+        """The deleted point ids, each with the last segment it is deleted from."""
+        file_path = os.path.join(self.path, "tombstones.json")
+        if not os.path.exists(file_path):
+            return {}
+        with open(file_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def _save_tombstones(self, tombstones: dict[str, int]) -> None:
+        file_path = os.path.join(self.path, "tombstones.json")
+        with open(file_path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(tombstones, file)
+        os.replace(file_path + ".tmp", file_path)
+
+    def _load(self) -> Optional[_Segment]:
+        """
+        Returns the points of the collection, as a single segment (None if empty).
+        """
+        if self._view is not None:
+            return self._view
+
+        base, segments = self._folders()
+        folders = ([] if base is None else [base]) + segments
+        if len(folders) == 0:
+            return None
+        tombstones = self._tombstones()
+        loaded = [_Segment.load(path) for _, path in folders]
+        if len(loaded) == 1 and len(tombstones) == 0 and base is not None:
+            self._view = loaded[0]
+            return self._view
+
+        deleted = [
+            np.array([tombstones.get(i, -1) >= seq for i in s.ids.tolist()], dtype=bool)
+            for (seq, _), s in zip(folders, loaded)
+        ]
+        self._view = _merge(loaded, deleted)
+        return self._view
+
+    def setup_collection(self, is_fresh_start: bool = False) -> None:
+        """
+        Ensures that the collection folder exists.
+
+        Args:
+            is_fresh_start (bool): If True, removes the existing collection before re-creation.
+
+        Returns:
+            None
+        """
+        if is_fresh_start:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._view = None
+        os.makedirs(self.path, exist_ok=True)
+
+    def upload(
+        self,
+        dense_vectors: Union[np.ndarray, Iterable[Iterable[float]]],
+        sparse_vectors: Iterable[dict],
+        payloads: Optional[Iterable[dict]] = None,
+        ids: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Adds points to the collection, as a new segment (points with the id of an
+        existing point replace it).
+
+        Args:
+            dense_vectors (Union[np.ndarray, Iterable[Iterable[float]]]): The dense vectors.
+            sparse_vectors (Iterable[dict]): The sparse vectors, as dicts of 'indices'
+                and 'values' arrays (or as models.SparseVector).
+            payloads (Optional[Iterable[dict]]): The payloads of the points.
+            ids (Optional[Iterable[str]]): The IDs of the points. If None, new UUIDs are generated.
+
+        Returns:
+            None
+        """
+        dense_vectors = np.asarray(list(dense_vectors), dtype=np.float32)
+        sparse_vectors = [
+            (
+                {"indices": v.indices, "values": v.values}
+                if isinstance(v, models.SparseVector)
+                else v
+            )
+            for v in sparse_vectors
+        ]
+        n_points = len(dense_vectors)
+        payloads = [{}] * n_points if payloads is None else list(payloads)
+        ids = [str(uuid4()) for _ in range(n_points)] if ids is None else list(ids)
+        if not (n_points == len(sparse_vectors) == len(payloads) == len(ids)):
+            raise ValueError(
+                "ids, dense vector, sparse vector and payloads lists must have the same length"
+            )
+        if n_points == 0:
+            return
+
+        os.makedirs(self.path, exist_ok=True)
+        segment = _Segment.from_points(
+            dense_vectors, sparse_vectors, payloads, ids, self.dtype, self.normalize
+        )
+        segment.save(os.path.join(self.path, f"segment-{self._next_seq():08d}"))
+        self._view = None
+
+    def add_to_collection(
+        self,
+        dense_vectors: list[list[float]],
+        sparse_vectors: list[dict],
+        payloads: list[dict],
+        ids: Union[list[str], None] = None,
+    ) -> None:
+        """Same as upload (interface of LoadInVdb)."""
+        self.upload(dense_vectors, sparse_vectors, payloads, ids)
+
+    def delete_points(self, ids: list[str]) -> None:
+        """Deletes points from the collection.
+
+        Args:
+            ids (list[str]): list of the IDs of the points to delete.
+
+        Returns:
+            None
+        """
+        if len(ids) == 0:
+            return
+        # the points uploaded up to the last segment are deleted
+        seq = self._next_seq() - 1
+        tombstones = self._tombstones()
+        tombstones.update({str(i): seq for i in ids})
+        os.makedirs(self.path, exist_ok=True)
+        self._save_tombstones(tombstones)
+        self._view = None
+
+    def flush(self) -> None:
+        """
+        Merges the segments and the tombstones into a single segment, with its
+        inverted index, which is then loaded instantly.
+
+        Returns:
+            None
+        """
+        base, segments = self._folders()
+        if len(segments) == 0 and len(self._tombstones()) == 0:
+            return
+        merged = self._load()
+        if merged is not None:
+            # a new sequence number: with only deletions, the last one is the base's
+            merged.save(os.path.join(self.path, f"base-{self._next_seq():08d}"))
+        self._save_tombstones({})
+        for _, folder in ([] if base is None else [base]) + segments:
+            shutil.rmtree(folder, ignore_errors=True)
+        self._view = None
+
+    def count(self) -> int:
+        """
+        Returns:
+            int: The number of points of the collection.
+        """
+        view = self._load()
+        return 0 if view is None else len(view)
+
+    # -- search ---------------------------------------------------------------
+
+    def _scored_points(
+        self, view: _Segment, rows: np.ndarray, scores: np.ndarray
+    ) -> list[models.ScoredPoint]:
+        return [
+            models.ScoredPoint(
+                id=str(view.ids[row]),
+                version=0,
+                score=float(score),
+                payload=view.payload(row),
+            )
+            for row, score in zip(rows.tolist(), scores.tolist())
+        ]
+
+    def _filter_mask(
+        self, view: _Segment, filters: Optional[Filters]
+    ) -> Optional[np.ndarray]:
+        """The mask of the points matching filters (None if there are no filters)."""
+        if not filters:
+            return None
+        if self._payload_index is None or self._payload_index.segment is not view:
+            self._payload_index = _PayloadIndex(view)
+        return self._payload_index.mask(filters)
+
+    def _dense_rank(
+        self,
+        view: _Segment,
+        query_vector: DenseVectorLike,
+        k: int,
+        hnsw_ef: Optional[int] = None,
+        mask: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """The rows and the cosine similarities of the k points closest to a dense
+        vector, among the ones of the mask if any (hnsw_ef is ignored: the search is
+        exact)."""
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        # only the rows of the filtered points are read (and scored)
+        candidates = None if mask is None else np.flatnonzero(mask)
+        n_rows = len(view) if candidates is None else len(candidates)
+        scores = np.empty(n_rows, dtype=np.float32)
+        for start in range(0, n_rows, _DENSE_BLOCK_ROWS):
+            if candidates is None:
+                block = view.dense[start : start + _DENSE_BLOCK_ROWS]
+            else:
+                block = view.dense[candidates[start : start + _DENSE_BLOCK_ROWS]]
+            scores[start : start + len(block)] = block.astype(np.float32) @ query
+        top = _top_k(scores, k)
+        return (top if candidates is None else candidates[top]), scores[top]
+
+    def _sparse_rank(
+        self,
+        view: _Segment,
+        query_vector: SparseVectorLike,
+        k: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """The rows and the dot products of the k best points for a sparse vector,
+        among the ones of the mask if any."""
+        if isinstance(query_vector, models.SparseVector):
+            query_vector = {
+                "indices": query_vector.indices,
+                "values": query_vector.values,
+            }
+        terms = np.asarray(query_vector["indices"], dtype=np.int64)
+        weights = np.asarray(query_vector["values"], dtype=np.float32)
+        in_vocab = terms < len(view.inverted_ptr) - 1
+        terms, weights = terms[in_vocab], weights[in_vocab]
+
+        starts, ends = view.inverted_ptr[terms], view.inverted_ptr[terms + 1]
+        docs = np.concatenate(
+            [view.inverted_docs[s:e] for s, e in zip(starts, ends)] + [np.zeros(0, int)]
+        )
+        values = np.concatenate(
+            [view.inverted_values[s:e] * w for s, e, w in zip(starts, ends, weights)]
+            + [np.zeros(0, np.float32)]
+        )
+        scores = np.bincount(docs, weights=values, minlength=len(view))
+        # as Qdrant, only the points sharing a term with the query are returned
+        matching = np.unique(docs)
+        if mask is not None:
+            matching = matching[mask[matching]]
+        rows = matching[_top_k(scores[matching], k)]
+        return rows, scores[rows]
+
+    def dense(
+        self,
+        query_vector: DenseVectorLike,
+        k: int = 5,
+        hnsw_ef: Optional[int] = None,
+        filters: Optional[Filters] = None,
+    ) -> list[models.ScoredPoint]:
+        """
+        Performs a dense vector search (exact, cosine similarity).
+
+        Args:
+            query_vector (DenseVectorLike): The dense vector to search with (array or list).
+            k (int): The number of top results to return.
+            hnsw_ef (Optional[int]): Ignored (the search is exact).
+            filters (Optional[Filters]): The conditions on the payloads of the points
+                searched (see retrieval.filters).
+
+        Returns:
+            List[models.ScoredPoint]: The top-k scored points resulting from the search.
+        """
+        view = self._load()
+        if view is None:
+            return []
+        mask = self._filter_mask(view, filters)
+        return self._scored_points(
+            view, *self._dense_rank(view, query_vector, k, hnsw_ef, mask)
+        )
+
+    def sparse(
+        self,
+        query_vector: SparseVectorLike,
+        k: int = 5,
+        filters: Optional[Filters] = None,
+    ) -> list[models.ScoredPoint]:
+        """
+        Performs a sparse vector search (dot product).
+
+        Args:
+            query_vector (SparseVectorLike): The sparse vector to search with (dict of
+                'indices' and 'values' arrays, or models.SparseVector).
+            k (int): The number of top results to return.
+            filters (Optional[Filters]): The conditions on the payloads of the points
+                searched (see retrieval.filters).
+
+        Returns:
+            List[models.ScoredPoint]: The top-k scored points resulting from the search.
+        """
+        view = self._load()
+        if view is None:
+            return []
+        mask = self._filter_mask(view, filters)
+        return self._scored_points(
+            view, *self._sparse_rank(view, query_vector, k, mask)
+        )
+
+    def hybrid_qd(
+        self,
+        de_query_vector: DenseVectorLike,
+        sp_query_vector: SparseVectorLike,
+        sp_k: int = 20,
+        de_k: int = 20,
+        k: int = 5,
+        hnsw_ef: Optional[int] = None,
+        filters: Optional[Filters] = None,
+    ) -> list[models.ScoredPoint]:
+        """Performs a hybrid query combining dense and sparse vector searches, fused
+        with the reciprocal rank fusion (as SearchInVdb.hybrid_qd).
+
+        Args:
+            de_query_vector (DenseVectorLike): The dense vector to search with.
+            sp_query_vector (SparseVectorLike): The sparse vector to search with.
+            sp_k (int): The number of top results to return from the sparse search.
+            de_k (int): The number of top results to return from the dense search.
+            k (int): The total number of results to return.
+            hnsw_ef (Optional[int]): Ignored (the search is exact).
+            filters (Optional[Filters]): The conditions on the payloads of the points
+                searched (see retrieval.filters).
+
+        Returns:
+            List[models.ScoredPoint]: The top-k scored points resulting from the hybrid search.
+        """
+        view = self._load()
+        if view is None:
+            return []
+        mask = self._filter_mask(view, filters)
+        sp_rows, _ = self._sparse_rank(view, sp_query_vector, sp_k, mask)
+        de_rows, _ = self._dense_rank(view, de_query_vector, de_k, hnsw_ef, mask)
+        return self._scored_points(view, *rrf_fusion([sp_rows, de_rows], k))
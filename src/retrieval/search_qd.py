@@ -1,13 +1,25 @@
-from typing import List
+import threading
+from typing import TYPE_CHECKING, List, Optional
 
-from qdrant_client.models import ScoredPoint, SparseVector
+from embedding.dense import compute_dense_vector, get_encoder
+from embedding.registry import warm_up
+from embedding.sparse import (
+    QUERY_MODE,
+    compute_sparse_query_vector,
+    get_sparse_model,
+    get_sparse_tokenizer,
+)
+from retrieval.filters import Filters
+from utility.doc_store import DocStore
 
-from embedding.dense import compute_dense_vector
-from embedding.sparse import compute_sparse_vector
-from retrieval.vdb_wrapper import SearchInVdb
+if TYPE_CHECKING:
+    # the Qdrant client is imported by the searcher, to keep this module fast to import
+    from qdrant_client.models import ScoredPoint
 
+    from retrieval.vdb_wrapper import SearchInVdb
 
-def print_info(r: ScoredPoint):
+
+def print_info(r: "ScoredPoint"):
     """
     Prints the information of a scored point.
 
@@ -20,9 +32,25 @@ def print_info(r: ScoredPoint):
     print()
 
 
+def warm_up_query_encoders() -> threading.Thread:
+    """
+    Loads, in a background thread, the models needed to encode the queries of main_search.
+
+    Returns:
+        threading.Thread: The thread loading the models.
+    """
+    sparse_loader = get_sparse_model if QUERY_MODE == "model" else get_sparse_tokenizer
+    return warm_up(get_encoder, sparse_loader)
+
+
 def main_search(
-    searcher: SearchInVdb, query_text: str, sp_k: int = 20, de_k: int = 20, k: int = 5
-) -> List[ScoredPoint]:
+    searcher: "SearchInVdb",
+    query_text: str,
+    sp_k: int = 20,
+    de_k: int = 20,
+    k: int = 5,
+    filters: Optional[Filters] = None,
+) -> List["ScoredPoint"]:
     """
     Performs a search using the provided searcher with the given query text.
 
@@ -32,11 +60,14 @@ def main_search(
         sp_k (int): The number of top results to return from the sparse search.
         de_k (int): The number of top results to return from the dense search.
         k (int): The total number of results to return.
+        filters (Optional[Filters]): The conditions on the payloads of the points
+            searched, e.g. {"source_id": "2401.01234v1"} or
+            {"published": {"gte": "2024-01-01"}} (see retrieval.filters).
 
     Returns:
         List[ScoredPoint]: The list of scored points resulting from the search.
     """
-    query_sparse_vector = SparseVector(**compute_sparse_vector(query_text))
+    query_sparse_vector = compute_sparse_query_vector(query_text)
     query_dense_vector = compute_dense_vector(query_text)
 
     # res = searcher.dense(query_dense_vector, k=5)
@@ -48,21 +79,41 @@ def main_search(
         sp_k=sp_k,  # e.g., 20
         de_k=de_k,  # e.g., 20
         k=k,  # e.g., 5
+        filters=filters,
     )
     return res
 
 
-if __name__ == "__main__":
-    from qdrant_client.qdrant_client import QdrantClient
+def get_point_texts(
+    points: List["ScoredPoint"], doc_store: Optional[DocStore] = None
+) -> List[str]:
+    """
+    Gets the chunk texts of the retrieved points: from the document store, in one
+    bulk read, or from the points payloads (also for the points missing from the store).
 
+    Args:
+        points (List[ScoredPoint]): The retrieved points.
+        doc_store (Optional[DocStore]): The document store of the chunks text, if any.
+
+    Returns:
+        List[str]: The texts of the points.
+    """
+    texts = [(point.payload or {}).get("text", "") for point in points]
+    if doc_store is None:
+        return texts
+    stored = doc_store.get_texts([str(point.id) for point in points])
+    return [text if text is not None else texts[i] for i, text in enumerate(stored)]
+
+
+if __name__ == "__main__":
+    from retrieval.backend import open_vector_store
+    from utility.doc_store import get_doc_store_params, open_doc_store
     from utility.read_config import get_config_from_path
 
     dct_config = get_config_from_path("config.yaml")
 
-    client = QdrantClient(path=dct_config["VECTOR_DB"]["PATH_TO_FOLDER"])
-    searcher = SearchInVdb(
-        client=client, coll_name=dct_config["VECTOR_DB"]["COLLECTION_NAME"]
-    )
+    _, _, searcher = open_vector_store(dct_config)
+    doc_store = open_doc_store(**get_doc_store_params(dct_config))
 
     # Get a query from the user
     query_text = (
@@ -71,5 +122,7 @@ if __name__ == "__main__":
 
     print("Search results:")
     res = main_search(searcher=searcher, query_text=query_text)
-    for r in res:
+    for r, text in zip(res, get_point_texts(res, doc_store)):
         print_info(r)
+        print("TEXT: ", text)
+        print()
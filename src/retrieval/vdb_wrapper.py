@@ -1,5 +1,31 @@
+from typing import Optional, Union
+
+import numpy as np
 from qdrant_client import QdrantClient, models
 
+from retrieval.filters import Filters, to_qdrant_filter
+from utility.vectors import as_dense_list, as_sparse_vector
+
+DenseVectorLike = Union[np.ndarray, list[float]]
+SparseVectorLike = Union[dict[str, np.ndarray], models.SparseVector]
+
+
+def get_searcher_params(dct_config: dict) -> dict:
+    """
+    Reads from the configuration the optional parameters of SearchInVdb.
+
+    Args:
+        dct_config (dict): The parsed configuration.
+
+    Returns:
+        dict: The keyword arguments to pass to SearchInVdb.
+    """
+    return {
+        "oversampling": dct_config["VECTOR_DB"].get("SEARCH_OVERSAMPLING"),
+        "rescore": dct_config["VECTOR_DB"].get("SEARCH_RESCORE", True),
+        "hnsw_ef": dct_config["VECTOR_DB"].get("SEARCH_HNSW_EF"),
+    }
+
 
 class SearchInVdb:
     def __init__(
@@ -8,6 +34,9 @@ class SearchInVdb:
         coll_name: str,
         dense_vect_name: str = "text-dense",
         sparse_vect_name: str = "text-sparse",
+        oversampling: Optional[float] = None,
+        rescore: bool = True,
+        hnsw_ef: Optional[int] = None,
     ):
         """
         Initializes the SearchInVdb instance.
@@ -17,19 +46,61 @@ class SearchInVdb:
             coll_name (str): The name of the collection to search within.
             dense_vect_name (str): The name of the dense vector to use for searching.
             sparse_vect_name (str): The name of the sparse vector to use for searching.
+            oversampling (Optional[float]): If the dense vectors are quantized, the factor
+                by which the candidates retrieved with the quantized vectors exceed the
+                requested ones; if None, the server default (no oversampling).
+            rescore (bool): If the dense vectors are quantized, whether the candidates
+                are rescored with the original vectors.
+            hnsw_ef (Optional[int]): The size of the candidates list of the HNSW search
+                of the dense vectors (larger: better recall, slower); if None, the
+                server default (ef_construct).
         """
         self.client = client
         self.coll_name = coll_name
         self.dense_vect_name = dense_vect_name
         self.sparse_vect_name = sparse_vect_name
+        self.oversampling = oversampling
+        self.rescore = rescore
+        self.hnsw_ef = hnsw_ef
 
-    def dense(self, query_vector: list[float], k: int = 5) -> list[models.ScoredPoint]:
+    def _dense_search_params(
+        self, hnsw_ef: Optional[int] = None
+    ) -> models.SearchParams:
+        """
+        Builds the search params of the dense vectors.
+
+        Args:
+            hnsw_ef (Optional[int]): The HNSW candidates list size of this search; if
+                None, the one of the instance.
+
+        Returns:
+            models.SearchParams: The search params.
+        """
+        return models.SearchParams(
+            hnsw_ef=self.hnsw_ef if hnsw_ef is None else hnsw_ef,
+            # ignored by the server if the dense vectors are not quantized
+            quantization=models.QuantizationSearchParams(
+                rescore=self.rescore, oversampling=self.oversampling
+            ),
+        )
+
+    def dense(
+        self,
+        query_vector: DenseVectorLike,
+        k: int = 5,
+        hnsw_ef: Optional[int] = None,
+        filters: Optional[Filters] = None,
+    ) -> list[models.ScoredPoint]:
         """
         Performs a dense vector search.
 
         Args:
-            query_vector (List[float]): The dense vector to search with.
+            query_vector (DenseVectorLike): The dense vector to search with (array or list).
             k (int): The number of top results to return.
+            hnsw_ef (Optional[int]): The HNSW candidates list size of this search; if
+                None, the one of the instance.
+            filters (Optional[Filters]): The conditions on the payloads of the points
+                searched (see retrieval.filters).
 
         Returns:
             List[models.ScoredPoint]: The top-k scored points resulting from the search.
@@ -38,27 +109,30 @@ class SearchInVdb:
             collection_name=self.coll_name,
             query_vector=models.NamedVector(
                 name=self.dense_vect_name,
-                vector=query_vector,
+                vector=as_dense_list(query_vector),
             ),
-            # query_filter=models.Filter(must=[models.FieldCondition(key='title',
-            #                                                        match=models.MatchAny(
-            #                                                            any=['Super_Bowl_50', 'Orso']))]),
-            # many types of filter available (still not tried) among which:
-            # range, is Null, exact match, etc..
             # for more info, https://qdrant.tech/articles/vector-search-filtering/
+            query_filter=to_qdrant_filter(filters),
+            search_params=self._dense_search_params(hnsw_ef),
             limit=k,
         )
         return hits
 
     def sparse(
-        self, query_vector: models.SparseVector, k: int = 5
+        self,
+        query_vector: SparseVectorLike,
+        k: int = 5,
+        filters: Optional[Filters] = None,
     ) -> list[models.ScoredPoint]:
         """
         Performs a sparse vector search.
 
         Args:
-            query_vector (models.SparseVector): The sparse vector to search with.
+            query_vector (SparseVectorLike): The sparse vector to search with (dict of
+                'indices' and 'values' arrays, or models.SparseVector).
             k (int): The number of top results to return.
+            filters (Optional[Filters]): The conditions on the payloads of the points
+                searched (see retrieval.filters).
 
         Returns:
             List[models.ScoredPoint]: The top-k scored points resulting from the search.
@@ -67,43 +141,54 @@ class SearchInVdb:
             collection_name=self.coll_name,
             query_vector=models.NamedSparseVector(
                 name=self.sparse_vect_name,
-                vector=query_vector,
+                vector=as_sparse_vector(query_vector),
             ),
+            query_filter=to_qdrant_filter(filters),
             limit=k,
         )
         return hits
 
     def hybrid_qd(
         self,
-        de_query_vector: list[float],
-        sp_query_vector: models.SparseVector,
+        de_query_vector: DenseVectorLike,
+        sp_query_vector: SparseVectorLike,
         sp_k: int = 20,
         de_k: int = 20,
         k: int = 5,
+        hnsw_ef: Optional[int] = None,
+        filters: Optional[Filters] = None,
     ) -> list[models.ScoredPoint]:
         """Performs a hybrid query combining dense and sparse vector searches.
         From https://qdrant.tech/documentation/concepts/hybrid-queries/#hybrid-search
         Args:
-            de_query_vector (List[float]): The dense vector to search with.
-            sp_query_vector (models.SparseVector): The sparse vector to search with.
+            de_query_vector (DenseVectorLike): The dense vector to search with.
+            sp_query_vector (SparseVectorLike): The sparse vector to search with.
             sp_k (int): The number of top results to return from the sparse search.
             de_k (int): The number of top results to return from the dense search.
             k (int): The total number of results to return.
+            hnsw_ef (Optional[int]): The HNSW candidates list size of the dense search; if
+                None, the one of the instance.
+            filters (Optional[Filters]): The conditions on the payloads of the points
+                searched (see retrieval.filters).
 
         Returns:
             List[models.ScoredPoint]: The top-k scored points resulting from the hybrid search.
         """
+        query_filter = to_qdrant_filter(filters)
         hits = self.client.query_points(
             collection_name=self.coll_name,
             prefetch=[
                 models.Prefetch(
-                    query=sp_query_vector,
+                    query=as_sparse_vector(sp_query_vector),
                     using=self.sparse_vect_name,
+                    filter=query_filter,
                     limit=sp_k,
                 ),
                 models.Prefetch(
-                    query=de_query_vector,
+                    query=as_dense_list(de_query_vector),
                     using=self.dense_vect_name,
+                    params=self._dense_search_params(hnsw_ef),
+                    filter=query_filter,
                     limit=de_k,
                 ),
             ],
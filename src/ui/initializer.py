@@ -2,18 +2,24 @@ import logging
 import sys
 from functools import partial
 from logging import getLogger
-from typing import Callable, Optional
+from typing import Callable, Optional, Union
 
 import streamlit as st
 from dotenv import load_dotenv
 from pydantic import BaseModel, ConfigDict
 from qdrant_client.qdrant_client import QdrantClient
 
+from ingestion.download_html import get_download_params
+from ingestion.indexing_qd import get_indexing_params
 from ingestion.ingesting import ingest
 from ingestion.vdb_wrapper import LoadInVdb
 from llm.api_call import main_api_call
+from retrieval.backend import open_vector_store
+from retrieval.numpy_engine import NumpyEngine
+from retrieval.search_qd import warm_up_query_encoders
 from retrieval.vdb_wrapper import SearchInVdb
 from ui.utils import setup_logger as _setup_logger
+from utility.doc_store import DocStore, get_doc_store_params, open_doc_store
 from utility.read_config import get_config_from_path
 
 
@@ -24,8 +30,10 @@ class AppParams(BaseModel):
 
     dct_config: Optional[dict] = None
     vdb_client: Optional[QdrantClient] = None
-    searcher: Optional[SearchInVdb] = None
-    loader: Optional[LoadInVdb] = None
+    # the concrete types of retrieval.backend.Searcher and Loader, which pydantic resolves
+    searcher: Optional[Union[SearchInVdb, NumpyEngine]] = None
+    loader: Optional[Union[LoadInVdb, NumpyEngine]] = None
+    doc_store: Optional[DocStore] = None
     log_formatter: Optional[logging.Formatter] = None
 
     ingest: Optional[Callable[..., None]] = None
@@ -38,8 +46,9 @@ def initialize() -> AppParams:
     """
     Initializes the application parameters and configurations.
 
-    Loads environment variables, configurations, sets up logging, and initializes
-    the Qdrant client and related components.
+    Loads environment variables, configurations, sets up logging, starts loading
+    the query encoders in background (if enabled), and initializes the vector store
+    (Qdrant client, NumPy or FAISS engine), the document store and related components.
 
     Returns:
         AppParams: The application parameters containing configuration and services.
@@ -64,20 +73,17 @@ def initialize() -> AppParams:
         force=True,
     )
 
-    client = QdrantClient(path=dct_config["VECTOR_DB"]["PATH_TO_FOLDER"])
+    if dct_config["UI"].get("WARM_UP_MODELS", False):
+        warm_up_query_encoders()
 
-    # for Retrieval
-    searcher = SearchInVdb(
-        client=client, coll_name=dct_config["VECTOR_DB"]["COLLECTION_NAME"]
-    )
+    # searcher for Retrieval, loader for Ingestion - indexing
+    client, loader, searcher = open_vector_store(dct_config)
+    doc_store = open_doc_store(**get_doc_store_params(dct_config))
 
-    # for Ingestion - indexing
-    collection_name = dct_config["VECTOR_DB"]["COLLECTION_NAME"]
     collection_fresh_start = dct_config["VECTOR_DB"]["COLL_FRESH_START"]
     html_folder_path = dct_config["INPUT_DATA"]["PATH_TO_FOLDER"]
     dwnld_fresh_start = dct_config["INPUT_DATA"]["DOWNLOAD_FRESH_START"]
     n_max_docs = dct_config["INPUT_DATA"]["N_MAX_DOCS"]
-    loader = LoadInVdb(client=client, coll_name=collection_name)
 
     complete_ingest = partial(
         ingest,
@@ -86,10 +92,16 @@ def initialize() -> AppParams:
         is_fresh_start_indexing=collection_fresh_start,
         html_folder_path=html_folder_path,
         n_max_docs=n_max_docs,
+        download_kwargs=get_download_params(dct_config),
+        indexing_kwargs=get_indexing_params(dct_config),
+        journal_path=dct_config["INPUT_DATA"]["JOURNAL_PATH"],
     )
 
     llm_gen_answer = partial(
-        main_api_call, searcher=searcher, rewriting=dct_config["RAG"]["QUERY_REWRITING"]
+        main_api_call,
+        searcher=searcher,
+        rewriting=dct_config["RAG"]["QUERY_REWRITING"],
+        doc_store=doc_store,
     )
 
     out = AppParams(
@@ -97,6 +109,7 @@ def initialize() -> AppParams:
         vdb_client=client,
         searcher=searcher,
         loader=loader,
+        doc_store=doc_store,
         log_formatter=log_formatter,
         ingest=complete_ingest,
         llm_gen_answer=llm_gen_answer,
@@ -0,0 +1,193 @@
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Optional
+
+# max num of parameters of a SQLite statement (the default limit is 999 before 3.32)
+_BATCH_SIZE = 500
+
+
+def get_doc_store_params(dct_config: dict) -> dict:
+    """
+    Reads from the configuration the parameters of the document store.
+
+    Args:
+        dct_config (dict): The parsed configuration.
+
+    Returns:
+        dict: The keyword arguments to pass to open_doc_store (and to main_indexing).
+    """
+    return {
+        "doc_store_path": dct_config["VECTOR_DB"]["DOC_STORE_PATH"],
+        "doc_store_compression": dct_config["VECTOR_DB"]["DOC_STORE_COMPRESSION"],
+    }
+
+
+def open_doc_store(
+    doc_store_path: Optional[str], doc_store_compression: bool = False
+) -> Optional["DocStore"]:
+    """
+    Opens the document store, if configured.
+
+    Args:
+        doc_store_path (Optional[str]): The path of the SQLite file; if None, there is
+            no document store (the chunks text is kept in the points payloads).
+        doc_store_compression (bool): If True, the texts are stored zlib-compressed.
+
+    Returns:
+        Optional[DocStore]: The document store, None if not configured.
+    """
+    if doc_store_path is None:
+        return None
+    return DocStore(doc_store_path, compression=doc_store_compression)
+
+
+class DocStore:
+    def __init__(self, path: str, compression: bool = False):
+        """
+        Initializes the DocStore instance: an on-disk (SQLite) store of the chunks
+        text and metadata, keyed by point id, so that the vector database only holds
+        the vectors and the small payload fields. The texts of the retrieved points
+        are read back in one query.
+
+        Args:
+            path (str): The path of the SQLite file.
+            compression (bool): If True, the texts added are stored zlib-compressed
+                (the texts already stored are read either way).
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.compression = compression
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            "id TEXT PRIMARY KEY, text BLOB NOT NULL, compressed INTEGER NOT NULL, "
+            "metadata TEXT)"
+        )
+
+    def put(
+        self,
+        ids: list[str],
+        texts: list[str],
+        metadata: Optional[list[dict]] = None,
+    ) -> None:
+        """
+        Stores the texts (and metadata) of some points, replacing the ones stored
+        with the same ids.
+
+        Args:
+            ids (list[str]): The point ids.
+            texts (list[str]): The texts.
+            metadata (Optional[list[dict]]): The metadata of the points.
+        """
+        metadata = [None] * len(ids) if metadata is None else metadata
+        if not (len(ids) == len(texts) == len(metadata)):
+            raise ValueError("ids, texts and metadata lists must have the same length")
+        rows = []
+        for a_id, text, meta in zip(ids, texts, metadata):
+            data = text.encode("utf-8")
+            if self.compression:
+                data = zlib.compress(data)
+            rows.append(
+                (
+                    str(a_id),
+                    data,
+                    int(self.compression),
+                    None if meta is None else json.dumps(meta),
+                )
+            )
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO docs VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def get(self, ids: list[str]) -> list[Optional[dict]]:
+        """
+        Reads the texts and metadata of some points, with one query (per 500 ids).
+
+        Args:
+            ids (list[str]): The point ids.
+
+        Returns:
+            list[Optional[dict]]: For each point, its metadata and its text (under the
+                'text' key), or None if it is not stored.
+        """
+        ids = [str(a_id) for a_id in ids]
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), _BATCH_SIZE):
+                batch = ids[start : start + _BATCH_SIZE]
+                found.update(
+                    {
+                        a_id: (data, compressed, meta)
+                        for a_id, data, compressed, meta in self._conn.execute(
+                            "SELECT id, text, compressed, metadata FROM docs WHERE id IN "
+                            f"({','.join('?' * len(batch))})",
+                            batch,
+                        )
+                    }
+                )
+
+        out = []
+        for a_id in ids:
+            if a_id not in found:
+                out.append(None)
+                continue
+            data, compressed, meta = found[a_id]
+            doc = {} if meta is None else json.loads(meta)
+            doc["text"] = (zlib.decompress(data) if compressed else data).decode(
+                "utf-8"
+            )
+            out.append(doc)
+        return out
+
+    def get_texts(self, ids: list[str]) -> list[Optional[str]]:
+        """
+        Reads the texts of some points (see get).
+
+        Args:
+            ids (list[str]): The point ids.
+
+        Returns:
+            list[Optional[str]]: For each point, its text, or None if it is not stored.
+        """
+        return [None if doc is None else doc["text"] for doc in self.get(ids)]
+
+    def delete(self, ids: list[str]) -> None:
+        """
+        Deletes the texts of some points.
+
+        Args:
+            ids (list[str]): The point ids.
+        """
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM docs WHERE id = ?", [(str(a_id),) for a_id in ids]
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """
+        Deletes all the stored texts.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM docs")
+            self._conn.commit()
+
+    def count(self) -> int:
+        """
+        Returns:
+            int: The number of stored texts.
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def close(self) -> None:
+        """
+        Closes the SQLite connection.
+        """
+        self._conn.close()
@@ -1,5 +1,6 @@
 import logging
 import os
+from functools import lru_cache
 
 from pyaml_env import parse_config
 
@@ -7,6 +8,8 @@ from pyaml_env import parse_config
 def get_config_from_path(file_name: str) -> dict:
     """
     Loads a YAML configuration file from a specified path.
+    Each file is parsed once per process: later calls return the same (cached)
+    dictionary, which must not be modified.
 
     Args:
         file_name (str): The name of the YAML configuration file to load.
@@ -28,6 +31,20 @@ def get_config_from_path(file_name: str) -> dict:
     full_path = os.path.join(path_to_yaml_files, file_name)
 
     if full_path.endswith(".yaml"):
-        return parse_config(full_path)
+        return _parse_config(os.path.abspath(full_path))
     else:
         raise ValueError(f"Only .yaml files are managed.")
+
+
+@lru_cache(maxsize=None)
+def _parse_config(full_path: str) -> dict:
+    """
+    Parses a YAML configuration file, caching the result.
+
+    Args:
+        full_path (str): The absolute path of the YAML file.
+
+    Returns:
+        dict: The parsed configuration as a dictionary.
+    """
+    return parse_config(full_path)
@@ -0,0 +1,59 @@
+from typing import Union
+
+import numpy as np
+from qdrant_client import models
+
+# the vectors flow through the pipelines as NumPy arrays: dense vectors as float32
+# arrays, sparse vectors as dicts of 'indices' (int32) and 'values' (float32) arrays;
+# they are converted to the client types only when sent to the vector database
+
+
+def as_dense_list(vector: Union[np.ndarray, list[float]]) -> list[float]:
+    """
+    Converts a dense vector to the list of floats expected by the Qdrant client.
+
+    Args:
+        vector (Union[np.ndarray, list[float]]): The dense vector.
+
+    Returns:
+        list[float]: The vector as a list.
+    """
+    return vector.tolist() if isinstance(vector, np.ndarray) else vector
+
+
+def as_dense_lists(vectors: Union[np.ndarray, list]) -> list[list[float]]:
+    """
+    Converts dense vectors to the lists of floats expected by the Qdrant client, at
+    once for a matrix.
+
+    Args:
+        vectors (Union[np.ndarray, list]): The dense vectors, as a matrix (one row per
+            vector) or a list of vectors (arrays or lists).
+
+    Returns:
+        list[list[float]]: The vectors as lists.
+    """
+    if isinstance(vectors, np.ndarray):
+        return vectors.tolist()
+    return [as_dense_list(vector) for vector in vectors]
+
+
+def as_sparse_vector(
+    vector: Union[dict[str, np.ndarray], models.SparseVector]
+) -> models.SparseVector:
+    """
+    Converts a sparse vector to the SparseVector expected by the Qdrant client.
+
+    Args:
+        vector (Union[dict[str, np.ndarray], models.SparseVector]): The sparse vector,
+            as a dict of 'indices' and 'values' (arrays or lists).
+
+    Returns:
+        models.SparseVector: The sparse vector.
+    """
+    if isinstance(vector, models.SparseVector):
+        return vector
+    return models.SparseVector(
+        indices=np.asarray(vector["indices"]).tolist(),
+        values=np.asarray(vector["values"]).tolist(),
+    )